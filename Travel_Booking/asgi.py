@@ -3,6 +3,12 @@ ASGI config for Travel_Booking project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Under ASGI the hot read endpoints are served by the native async views in
+core.async_views (ASYNC_API, on by default here). Run with any ASGI server,
+e.g.:
+
+    uvicorn Travel_Booking.asgi:application --workers 4
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
@@ -12,5 +18,6 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Travel_Booking.settings')
+os.environ.setdefault('ASYNC_API', 'True')
 
 application = get_asgi_application()
@@ -63,6 +63,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.metrics.MetricsMiddleware',
+    'core.routing.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -86,6 +88,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'core.page_cache.page_cache',
             ],
         },
     },
@@ -108,6 +111,27 @@ DATABASES = {
     }
 }
 
+# Read replicas (core.routing): DB_REPLICAS is a comma-separated list of
+# replica hosts sharing the default database's name and credentials (for
+# SQLite, of database files). Search, travel option and detail GETs read
+# from them; a user who writes reads from the primary for
+# REPLICA_STICKY_SECONDS afterwards. Set REPLICA_PIN_CACHE_ALIAS to a
+# shared CACHES alias when several nodes serve the same users. Searches
+# cached from a lagging replica can stay stale for SEARCH_CACHE TIMEOUT.
+REPLICA_ROUTING = {
+    'REPLICAS': [],
+    'STICKY_SECONDS': int(os.getenv('REPLICA_STICKY_SECONDS', 10)),
+    'MAX_PINS': 100000,
+    'CACHE_ALIAS': os.getenv('REPLICA_PIN_CACHE_ALIAS') or None,
+}
+for i, replica in enumerate(filter(None, os.getenv('DB_REPLICAS', '').split(',')), start=1):
+    location = 'NAME' if DATABASES['default']['ENGINE'].endswith('sqlite3') else 'HOST'
+    # Tests run against the primary's test database
+    DATABASES[f'replica{i}'] = {**DATABASES['default'], location: replica.strip(), 'TEST': {'MIRROR': 'default'}}
+    REPLICA_ROUTING['REPLICAS'].append(f'replica{i}')
+
+DATABASE_ROUTERS = ['core.routing.ReplicaRouter']
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -150,13 +174,32 @@ STATICFILES_DIRS = [
 ]
 STATIC_ROOT = BASE_DIR / "staticfiles"
 
+# Asset pipeline (core.assets). `manage.py build_assets` minifies each of
+# BUNDLES (paths under the static dirs) into OUTPUT_DIR as a content-hashed
+# file with .gz and (with the brotli package) .br variants; /assets/ serves
+# them with a MAX_AGE immutable Cache-Control. {% asset_tags %} links the
+# built bundle when ENABLED (off with DEBUG by default) and the unbundled
+# sources from STATIC_URL otherwise or before the first build.
+ASSETS = {
+    'ENABLED': os.getenv('ASSETS_ENABLED', str(not DEBUG)).lower() == 'true',
+    'OUTPUT_DIR': BASE_DIR / 'build' / 'assets',
+    'MAX_AGE': 365 * 24 * 3600,
+    'BUNDLES': {
+        'app.css': ['style/styles.css'],
+        'app.js': ['js/scripts.js'],
+        'bookings.js': ['js/pages/bookings.js'],
+        'travel_options.js': ['js/pages/travel_options.js'],
+    },
+}
+
 # Media files
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
 # Add WhiteNoise for static file serving in production
 if not DEBUG:
-    MIDDLEWARE.insert(1, 'whitenoise.middleware.WhiteNoiseMiddleware')
+    MIDDLEWARE.insert(MIDDLEWARE.index('django.middleware.security.SecurityMiddleware') + 1,
+                      'whitenoise.middleware.WhiteNoiseMiddleware')
     STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 
 # Default primary key field type
@@ -167,7 +210,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Add REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'core.authentication.CachedJWTAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
@@ -182,6 +225,138 @@ REST_FRAMEWORK = {
     'PAGE_SIZE': 10,
 }
 
+# Largest timetable accepted by POST /api/travel-options/import/, which
+# imports inside the request (and holds row locks chunk by chunk). Bigger
+# files go through "manage.py import_timetable" instead, away from proxy
+# and worker timeouts.
+TIMETABLE_UPLOAD_MAX_BYTES = int(os.getenv('TIMETABLE_UPLOAD_MAX_BYTES', 5 * 1024 * 1024))
+
+# Serve travel search, travel option listing and booking listing GETs from
+# the native async views in core.async_views. Enabled by default when the
+# project runs under Travel_Booking.asgi; sync WSGI deployments keep the
+# DRF views.
+ASYNC_API = os.getenv('ASYNC_API', 'False').lower() == 'true'
+
+# Per-request metrics (core.metrics), scraped from /api/metrics with
+# "Authorization: Bearer <METRICS_TOKEN>" or a staff session. Set
+# METRICS_MULTIPROCESS_DIR to a directory shared by all worker processes
+# (e.g. gunicorn workers) so the endpoint reports their sum. Empty that
+# directory before the server starts, and call
+# core.metrics.mark_process_dead(worker.pid) from gunicorn's child_exit
+# hook so gauges of exited workers stop being summed.
+METRICS = {
+    'ENABLED': os.getenv('METRICS_ENABLED', 'True').lower() == 'true',
+    'TOKEN': os.getenv('METRICS_TOKEN') or None,
+    'MULTIPROCESS_DIR': os.getenv('METRICS_MULTIPROCESS_DIR') or None,
+    'FLUSH_INTERVAL': int(os.getenv('METRICS_FLUSH_INTERVAL', 5)),
+}
+
+# Travel search result cache. By default entries live in an in-process
+# LRU; set SEARCH_CACHE_ALIAS to a CACHES alias (e.g. Redis/Memcached) to
+# share entries and route versions across nodes.
+SEARCH_CACHE = {
+    'ENABLED': os.getenv('SEARCH_CACHE_ENABLED', 'True').lower() == 'true',
+    'TIMEOUT': int(os.getenv('SEARCH_CACHE_TIMEOUT', 60)),
+    'MAX_ENTRIES': int(os.getenv('SEARCH_CACHE_MAX_ENTRIES', 2048)),
+    'CACHE_ALIAS': os.getenv('SEARCH_CACHE_ALIAS') or None,
+}
+
+# Columnar search index (core.inventory). /api/search/ pages
+# are answered from an in-memory snapshot of the next HORIZON_DAYS of
+# inventory, merged with changed rows every REFRESH_INTERVAL seconds and
+# rebuilt every REBUILD_INTERVAL. Searches it cannot answer exactly, and
+# inventories over MAX_ROWS, run the SQL query instead.
+INVENTORY_INDEX = {
+    'ENABLED': os.getenv('INVENTORY_INDEX_ENABLED', 'True').lower() == 'true',
+    'HORIZON_DAYS': int(os.getenv('INVENTORY_INDEX_HORIZON_DAYS', 30)),
+    'REFRESH_INTERVAL': int(os.getenv('INVENTORY_INDEX_REFRESH_INTERVAL', 5)),
+    'REBUILD_INTERVAL': int(os.getenv('INVENTORY_INDEX_REBUILD_INTERVAL', 600)),
+    'MAX_ROWS': int(os.getenv('INVENTORY_INDEX_MAX_ROWS', 200000)),
+}
+
+# Multi-leg connection search (core.connections). Upcoming options within
+# HORIZON_DAYS are held in memory; changed rows are merged every
+# REFRESH_INTERVAL seconds and the graph is rebuilt every REBUILD_INTERVAL.
+# MIN_CONNECTION_MINUTES is keyed by "arriving-departing" type pair, then
+# arriving type, then "default".
+CONNECTION_SEARCH = {
+    'HORIZON_DAYS': int(os.getenv('CONNECTION_SEARCH_HORIZON_DAYS', 30)),
+    'REFRESH_INTERVAL': int(os.getenv('CONNECTION_SEARCH_REFRESH_INTERVAL', 5)),
+    'REBUILD_INTERVAL': int(os.getenv('CONNECTION_SEARCH_REBUILD_INTERVAL', 600)),
+    'MAX_WAIT_HOURS': int(os.getenv('CONNECTION_SEARCH_MAX_WAIT_HOURS', 24)),
+    'MIN_CONNECTION_MINUTES': {
+        'default': 30,
+        'flight': 90,
+        'flight-flight': 60,
+        'train': 20,
+        'bus': 15,
+    },
+}
+
+# Seat holds: POST /api/bookings/hold/ reserves seats as a pending booking
+# that must be confirmed within TTL_SECONDS. The release_expired_holds
+# command (run with --loop as a background worker) returns the seats of
+# lapsed holds, SWEEP_BATCH_SIZE holds per transaction.
+SEAT_HOLDS = {
+    'TTL_SECONDS': int(os.getenv('SEAT_HOLD_TTL_SECONDS', 600)),
+    'SWEEP_BATCH_SIZE': int(os.getenv('SEAT_HOLD_SWEEP_BATCH_SIZE', 1000)),
+    'SWEEP_INTERVAL': int(os.getenv('SEAT_HOLD_SWEEP_INTERVAL', 5)),
+}
+
+# Admission control for booking writes (core.admission). Every create,
+# hold, confirm and cancel takes a token from its user's bucket (RATE
+# tokens per second, up to BURST) and, when the payload names one, from the
+# travel option's bucket. It also needs one of MAX_CONCURRENT_WRITES write
+# slots per process. Rejections are immediate 429s with Retry-After. A
+# rate or limit of 0 disables that check. Set ADMISSION_CACHE_ALIAS to a
+# CACHES alias to share buckets across nodes.
+ADMISSION = {
+    'ENABLED': os.getenv('ADMISSION_ENABLED', 'True').lower() == 'true',
+    'USER_RATE': float(os.getenv('ADMISSION_USER_RATE', 1)),
+    'USER_BURST': int(os.getenv('ADMISSION_USER_BURST', 20)),
+    'TRAVEL_OPTION_RATE': float(os.getenv('ADMISSION_TRAVEL_OPTION_RATE', 50)),
+    'TRAVEL_OPTION_BURST': int(os.getenv('ADMISSION_TRAVEL_OPTION_BURST', 100)),
+    'MAX_CONCURRENT_WRITES': int(os.getenv('ADMISSION_MAX_CONCURRENT_WRITES', 16)),
+    'RETRY_AFTER': int(os.getenv('ADMISSION_RETRY_AFTER', 1)),
+    'CACHE_ALIAS': os.getenv('ADMISSION_CACHE_ALIAS') or None,
+}
+
+# JWT principals (core.authentication): the token's User and UserProfile
+# are cached for TIMEOUT seconds instead of being queried on every API
+# request, and dropped when either is saved and on logout. The in-process
+# cache only sees this node's changes, so keep TIMEOUT short or set
+# PRINCIPAL_CACHE_ALIAS to a shared CACHES alias.
+PRINCIPAL_CACHE = {
+    'ENABLED': os.getenv('PRINCIPAL_CACHE_ENABLED', 'True').lower() == 'true',
+    'TIMEOUT': int(os.getenv('PRINCIPAL_CACHE_TIMEOUT', 30)),
+    'MAX_ENTRIES': int(os.getenv('PRINCIPAL_CACHE_MAX_ENTRIES', 10000)),
+    'CACHE_ALIAS': os.getenv('PRINCIPAL_CACHE_ALIAS') or None,
+}
+
+# HTML shell pages (core.page_cache): home, bookings and booking details
+# are cached whole for TIMEOUT seconds per path and visitor, and every page
+# caches the layout's navbar and footer fragments per auth state. Entries
+# live in the CACHE_ALIAS cache (per process with the default LocMemCache),
+# so a username change shows up after at most TIMEOUT seconds on other
+# nodes. Compiled templates are already kept by Django's cached template
+# loader, which it uses whenever TEMPLATES sets no explicit 'loaders'.
+PAGE_CACHE = {
+    'ENABLED': os.getenv('PAGE_CACHE_ENABLED', 'True').lower() == 'true',
+    'TIMEOUT': int(os.getenv('PAGE_CACHE_TIMEOUT', 300)),
+    'CACHE_ALIAS': os.getenv('PAGE_CACHE_ALIAS', 'default'),
+}
+
+# Idempotency-Key handling for booking and hold POSTs (core.idempotency).
+# The first response is replayed for TTL_SECONDS; a duplicate waits up to
+# WAIT_TIMEOUT seconds for an in-flight attempt, and an attempt that has
+# not finished after LOCK_TIMEOUT seconds is considered crashed. Expired
+# keys are deleted by the purge_idempotency_keys command.
+IDEMPOTENCY = {
+    'TTL_SECONDS': int(os.getenv('IDEMPOTENCY_TTL_SECONDS', 24 * 3600)),
+    'WAIT_TIMEOUT': float(os.getenv('IDEMPOTENCY_WAIT_TIMEOUT', 10)),
+    'LOCK_TIMEOUT': int(os.getenv('IDEMPOTENCY_LOCK_TIMEOUT', 60)),
+}
+
 # JWT Settings
 from datetime import timedelta
 SIMPLE_JWT = {
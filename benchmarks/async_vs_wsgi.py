@@ -0,0 +1,149 @@
+"""Benchmark: sync DRF views under WSGI vs ASGI vs the native async views.
+
+Drives the travel search, travel option list and booking list endpoints
+with concurrent in-process clients against a throwaway SQLite database and
+reports throughput and latency percentiles for:
+
+    wsgi        sync DRF views, WSGI handler, one thread per client
+    asgi-sync   sync DRF views, ASGI handler (the sync_to_async bridge)
+    asgi-async  core.async_views, ASGI handler
+
+    python benchmarks/async_vs_wsgi.py [--concurrency 32] [--requests 2000] [--options 5000]
+
+The search cache is disabled so every request reaches the database.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Setup Django environment on a scratch database
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Travel_Booking.settings')
+os.environ['DB_ENGINE'] = 'django.db.backends.sqlite3'
+os.environ['DB_NAME'] = os.path.join(tempfile.mkdtemp(), 'bench.sqlite3')
+os.environ['SEARCH_CACHE_ENABLED'] = 'False'
+os.environ.setdefault('SECRET_KEY', 'benchmark')
+os.environ.setdefault('DEBUG', 'False')
+import django
+django.setup()
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import AsyncClient, Client
+from django.urls import path
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from core import async_views, views
+from core.models import Booking, TravelOption
+from dataset import seed_travel_options
+
+urlpatterns = [
+    path('sync/travel-search/', views.TravelSearchView.as_view()),
+    path('sync/travel-options/', views.TravelOptionListCreateView.as_view()),
+    path('sync/bookings/', views.BookingListCreateView.as_view()),
+    path('async/travel-search/', async_views.TravelSearchAsyncView.as_view()),
+    path('async/travel-options/', async_views.TravelOptionListAsyncView.as_view()),
+    path('async/bookings/', async_views.BookingListAsyncView.as_view()),
+]
+
+QUERIES = [
+    ('travel-search/', {'source': 'Delhi', 'destination': 'Mumbai', 'cursor': ''}),
+    ('travel-search/', {'type': 'train', 'max_price': '3000'}),
+    ('travel-options/', {'cursor': ''}),
+    ('bookings/', {}),
+]
+
+
+def seed(option_count):
+    call_command('migrate', verbosity=0)
+    seed_travel_options(option_count)
+    user = User.objects.create_user('bench', 'bench@example.com', 'bench-password')
+    for option in TravelOption.objects.order_by('travel_id')[:25]:
+        Booking.create_booking(user, option, 1, [{'name': 'Bench', 'age': 30}])
+    return str(RefreshToken.for_user(user).access_token)
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def report(name, latencies, elapsed, errors):
+    print(
+        f"{name:<11} {len(latencies) / elapsed:>8.1f} req/s   "
+        f"p50 {percentile(latencies, 50) * 1000:>7.1f} ms   "
+        f"p95 {percentile(latencies, 95) * 1000:>7.1f} ms   "
+        f"p99 {percentile(latencies, 99) * 1000:>7.1f} ms   "
+        f"errors {errors}"
+    )
+
+
+def run_wsgi(name, token, concurrency, total):
+    clients = {}
+    latencies, errors = [], 0
+
+    def one(i):
+        client = clients.setdefault(i % concurrency, Client(HTTP_AUTHORIZATION=f'Bearer {token}'))
+        url, params = QUERIES[i % len(QUERIES)]
+        started = time.perf_counter()
+        response = client.get('/sync/' + url, params)
+        return time.perf_counter() - started, response.status_code
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        for latency, status in pool.map(one, range(total)):
+            latencies.append(latency)
+            errors += status != 200
+    report(name, latencies, time.perf_counter() - started, errors)
+
+
+async def run_asgi(name, prefix, token, concurrency, total):
+    client = AsyncClient()
+    headers = {'Authorization': f'Bearer {token}'}
+    latencies, errors = [], 0
+    counter = iter(range(total))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            url, params = QUERIES[i % len(QUERIES)]
+            started = time.perf_counter()
+            response = await client.get(prefix + url, params, headers=headers)
+            latencies.append(time.perf_counter() - started)
+            errors += response.status_code != 200
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    report(name, latencies, time.perf_counter() - started, errors)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--options', type=int, default=5000)
+    args = parser.parse_args()
+
+    settings.ROOT_URLCONF = __name__
+    settings.ALLOWED_HOSTS = [*settings.ALLOWED_HOSTS, 'testserver']
+    token = seed(args.options)
+    print(f"{args.options} travel options, {args.requests} requests, concurrency {args.concurrency}")
+
+    # Warm up imports, city index and connections on every path
+    run_wsgi('warmup', token, 1, len(QUERIES))
+    asyncio.run(run_asgi('warmup', '/async/', token, 1, len(QUERIES)))
+    print()
+
+    run_wsgi('wsgi', token, args.concurrency, args.requests)
+    asyncio.run(run_asgi('asgi-sync', '/sync/', token, args.concurrency, args.requests))
+    asyncio.run(run_asgi('asgi-async', '/async/', token, args.concurrency, args.requests))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""Deterministic benchmark datasets; import after django.setup()."""
+import random
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from core.models import City, RouteDayFare, TravelOption
+
+CITIES = [
+    'Delhi', 'Mumbai', 'Bangalore', 'Chennai', 'Kolkata', 'Hyderabad', 'Pune', 'Jaipur',
+    'Ahmedabad', 'Lucknow', 'Goa', 'Kochi', 'Chandigarh', 'Indore', 'Bhopal', 'Patna',
+]
+
+TYPES = ('flight', 'train', 'bus')
+
+
+def seed_travel_options(count, days=30, batch_size=5000, seed=0, cities=CITIES, progress=None):
+    """Bulk-insert ``count`` upcoming options spread over ``days`` days.
+
+    Rows are built in batches (duration and timestamps computed here, as
+    the timetable importer does), so millions of rows seed in constant
+    memory. The same ``seed`` always produces the same dataset.
+    """
+    rng = random.Random(seed)
+    city_ids = [City.get_or_create_by_name(name).city_id for name in cities]
+    tz = timezone.get_default_timezone()
+    start = datetime.combine(timezone.localdate() + timedelta(days=1), datetime.min.time())
+    created = 0
+    while created < count:
+        batch = []
+        for _ in range(min(batch_size, count - created)):
+            source_id, destination_id = rng.sample(city_ids, 2)
+            travel_type = rng.choice(TYPES)
+            departure = start + timedelta(days=rng.randrange(days), minutes=rng.randrange(0, 24 * 60, 5))
+            arrival = departure + timedelta(minutes=rng.randrange(60, 24 * 60, 5))
+            seats = rng.choice((40, 60, 180, 300))
+            batch.append(TravelOption(
+                type=travel_type, operator_name=f'{travel_type.title()} Operator {rng.randrange(25)}',
+                source_id=source_id, destination_id=destination_id,
+                departure_date=departure.date(), departure_time=departure.time(),
+                arrival_date=arrival.date(), arrival_time=arrival.time(), duration=arrival - departure,
+                departure_at=timezone.make_aware(departure, tz), arrival_at=timezone.make_aware(arrival, tz),
+                price=Decimal(rng.randrange(500, 15000, 50)), total_seats=seats, available_seats=seats,
+            ))
+        TravelOption.objects.bulk_create(batch, batch_size=batch_size)
+        created += len(batch)
+        if progress:
+            progress(created)
+    # Bulk inserts bypass save(), so build the fare calendar in one pass
+    RouteDayFare.rebuild()
+    return created
+
+
+def create_users(count, prefix='bench'):
+    """``count`` users and an access token for each"""
+    users = User.objects.bulk_create([
+        User(username=f'{prefix}{i}', email=f'{prefix}{i}@example.com') for i in range(count)
+    ])
+    users = list(User.objects.filter(username__in=[user.username for user in users]).order_by('id'))
+    return [(user, str(RefreshToken.for_user(user).access_token)) for user in users]
@@ -0,0 +1,251 @@
+"""Load test for the booking API with regression checks against stored baselines.
+
+Seeds a throwaway database with a reproducible dataset, then runs
+concurrent simulated users against the API through in-process clients:
+each user loops over a weighted mix of travel searches, booking POSTs and
+cancellations of their own bookings. Per-endpoint p50/p95/p99 latency
+and throughput are reported and compared with benchmarks/baselines/.
+
+    python benchmarks/load_test.py                          # SQLite, compare
+    python benchmarks/load_test.py --options 1000000        # bigger dataset
+    python benchmarks/load_test.py --update-baseline        # record a baseline
+    python benchmarks/load_test.py --profile mysql          # DB_* env settings
+
+The run exits non-zero when an endpoint's p95 latency grows, or its
+throughput drops, by more than --tolerance against a baseline recorded
+with the same profile, dataset size and user count. Baselines are
+machine specific: record them on the machine that checks them. Write
+latency on SQLite is dominated by lock waits and varies between runs,
+hence the generous default tolerance.
+
+The mysql profile uses the DB_NAME/DB_USER/DB_PASSWORD/DB_HOST/DB_PORT
+settings and runs against a freshly created test_<DB_NAME> database that
+is dropped afterwards, so no existing data is touched.
+"""
+import argparse
+import contextlib
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+BASELINE_DIR = Path(__file__).resolve().parent / 'baselines'
+
+# Endpoint mix per simulated user action (weights)
+SCENARIO = (('search', 70), ('book', 20), ('cancel', 10))
+
+
+def configure(profile):
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Travel_Booking.settings')
+    os.environ.setdefault('SECRET_KEY', 'benchmark')
+    os.environ.setdefault('DEBUG', 'False')
+    # Measure the write path itself, not the per-user admission limits
+    os.environ.setdefault('ADMISSION_ENABLED', 'False')
+    if profile == 'sqlite':
+        os.environ['DB_ENGINE'] = 'django.db.backends.sqlite3'
+        os.environ['DB_NAME'] = os.path.join(tempfile.mkdtemp(), 'load.sqlite3')
+    else:
+        os.environ.setdefault('DB_ENGINE', 'django.db.backends.mysql')
+    import django
+    django.setup()
+
+    from django.conf import settings
+    settings.ALLOWED_HOSTS = [*settings.ALLOWED_HOSTS, 'testserver']
+    if profile == 'sqlite':
+        # Writers queue for the lock up front instead of failing (or
+        # backing off) when a read transaction upgrades under contention
+        settings.DATABASES['default']['OPTIONS'] = {'timeout': 30, 'transaction_mode': 'IMMEDIATE'}
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))] if ordered else 0.0
+
+
+class LoadRun:
+    def __init__(self, users, travel_ids, cities, duration, seed):
+        self.users = users
+        self.travel_ids = travel_ids
+        self.cities = cities
+        self.duration = duration
+        self.seed = seed
+        self.lock = threading.Lock()
+        self.latencies = {name: [] for name, _ in SCENARIO}
+        self.errors = {name: 0 for name, _ in SCENARIO}
+
+    def record(self, name, seconds, ok):
+        with self.lock:
+            self.latencies[name].append(seconds)
+            self.errors[name] += not ok
+
+    def user(self, index):
+        from django.db import connections
+        from django.test import Client
+        from django.utils import timezone
+        from core.models import Booking
+
+        user, token = self.users[index]
+        rng = random.Random(self.seed * 1000 + index)
+        client = Client(HTTP_AUTHORIZATION=f'Bearer {token}')
+        names = [name for name, _ in SCENARIO]
+        weights = [weight for _, weight in SCENARIO]
+        booked = 0
+        deadline = time.perf_counter() + self.duration
+        while time.perf_counter() < deadline:
+            action = rng.choices(names, weights)[0]
+            if action == 'cancel' and not booked:
+                action = 'book'
+            if action == 'cancel':
+                # The create response has no id; look it up outside the timing
+                booking_id = rng.choice(list(Booking.objects.filter(
+                    user=user, status='confirmed'
+                ).values_list('booking_id', flat=True)))
+            started = time.perf_counter()
+            if action == 'search':
+                source, destination = rng.sample(self.cities, 2)
+                day = timezone.localdate() + timezone.timedelta(days=1 + rng.randrange(30))
+                response = client.get('/api/travel-search/', {
+                    'source': source, 'destination': destination,
+                    'date_from': day.isoformat(), 'date_to': day.isoformat(), 'cursor': '',
+                })
+                ok = response.status_code == 200
+            elif action == 'book':
+                response = client.post('/api/bookings/', {
+                    'travel_option': rng.choice(self.travel_ids),
+                    'number_of_seats': 1,
+                    'passenger_details': [{'name': f'Passenger {index}', 'age': 30}],
+                }, content_type='application/json')
+                # Sold out (409) is a valid outcome under load
+                ok = response.status_code in (201, 409)
+                booked += response.status_code == 201
+            else:
+                response = client.post(f'/api/bookings/{booking_id}/cancel/')
+                ok = response.status_code == 200
+                booked -= ok
+            self.record(action, time.perf_counter() - started, ok)
+        connections.close_all()
+
+    def run(self):
+        started = time.perf_counter()
+        # Keep the booking view's debug prints out of the report
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            with ThreadPoolExecutor(len(self.users)) as pool:
+                list(pool.map(self.user, range(len(self.users))))
+        elapsed = time.perf_counter() - started
+        results = {}
+        for name, _ in SCENARIO:
+            samples = self.latencies[name]
+            results[name] = {
+                'requests': len(samples),
+                'errors': self.errors[name],
+                'throughput': round(len(samples) / elapsed, 2),
+                'p50_ms': round(percentile(samples, 50) * 1000, 2),
+                'p95_ms': round(percentile(samples, 95) * 1000, 2),
+                'p99_ms': round(percentile(samples, 99) * 1000, 2),
+            }
+        return results
+
+
+def compare(results, baseline, tolerance):
+    """Regression messages for endpoints that got slower than the baseline allows"""
+    failures = []
+    for name, current in results.items():
+        expected = baseline.get(name)
+        if not expected:
+            continue
+        if current['p95_ms'] > expected['p95_ms'] * (1 + tolerance):
+            failures.append(f"{name}: p95 {current['p95_ms']} ms > baseline {expected['p95_ms']} ms")
+        if current['throughput'] < expected['throughput'] * (1 - tolerance):
+            failures.append(f"{name}: {current['throughput']} req/s < baseline {expected['throughput']} req/s")
+        if current['errors']:
+            failures.append(f"{name}: {current['errors']} failed requests")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--profile', choices=['sqlite', 'mysql'], default='sqlite')
+    parser.add_argument('--options', type=int, default=10000, help="TravelOption rows to seed")
+    parser.add_argument('--users', type=int, default=16, help="Concurrent simulated users")
+    parser.add_argument('--duration', type=float, default=20.0, help="Seconds each user keeps sending requests")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--tolerance', type=float, default=0.5, help="Allowed regression, e.g. 0.5 = 50%%")
+    parser.add_argument('--baseline', help="Baseline file (default: baselines/<profile>.json)")
+    parser.add_argument('--update-baseline', action='store_true')
+    parser.add_argument('--output', help="Also write the results as JSON to this file")
+    args = parser.parse_args()
+
+    configure(args.profile)
+    from django.core.management import call_command
+    from django.db import connection
+    from dataset import CITIES, create_users, seed_travel_options
+    from core.models import TravelOption
+
+    if args.profile == 'sqlite':
+        # A file (not the in-memory test database) so threads share it
+        call_command('migrate', verbosity=0)
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode=WAL')
+    else:
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        started = time.perf_counter()
+        seed_travel_options(
+            args.options, seed=args.seed,
+            progress=lambda done: print(f"\rSeeding {done}/{args.options}", end='', flush=True),
+        )
+        print(f"\rSeeded {args.options} travel options in {time.perf_counter() - started:.1f}s")
+        users = create_users(args.users)
+        travel_ids = list(TravelOption.objects.values_list('travel_id', flat=True)[:5000])
+        connection.close()
+
+        results = LoadRun(users, travel_ids, CITIES, args.duration, args.seed).run()
+    finally:
+        if args.profile == 'sqlite':
+            connection.close()
+            shutil.rmtree(os.path.dirname(connection.settings_dict['NAME']))
+        else:
+            connection.creation.destroy_test_db(connection.settings_dict['NAME'], verbosity=0)
+
+    config = {'profile': args.profile, 'options': args.options, 'users': args.users}
+    print(f"\n{args.profile}: {args.options} options, {args.users} users, {args.duration:.0f}s")
+    print(f"{'endpoint':<8} {'requests':>9} {'errors':>7} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for name, row in results.items():
+        print(f"{name:<8} {row['requests']:>9} {row['errors']:>7} {row['throughput']:>9} "
+              f"{row['p50_ms']:>9} {row['p95_ms']:>9} {row['p99_ms']:>9}")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps({'config': config, 'results': results}, indent=2) + '\n')
+
+    baseline_path = Path(args.baseline) if args.baseline else BASELINE_DIR / f'{args.profile}.json'
+    if args.update_baseline:
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps({'config': config, 'results': results}, indent=2) + '\n')
+        print(f"\nBaseline written to {baseline_path}")
+        return 0
+    if not baseline_path.exists():
+        print(f"\nNo baseline at {baseline_path}; run with --update-baseline to record one")
+        return 0
+    baseline = json.loads(baseline_path.read_text())
+    if baseline['config'] != config:
+        print(f"\nBaseline was recorded with {baseline['config']}; not comparable, skipping the check")
+        return 0
+    failures = compare(results, baseline['results'], args.tolerance)
+    if failures:
+        print("\nRegressions against the baseline:")
+        for failure in failures:
+            print(f"  {failure}")
+        return 1
+    print(f"\nWithin {args.tolerance:.0%} of the baseline")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,74 @@
+"""Micro-benchmark: HTML shell page render time with and without PAGE_CACHE.
+
+Renders each shell page through the test client (middleware, session,
+auth and templates included) against a throwaway SQLite database, for an
+anonymous and a signed-in visitor:
+
+    python benchmarks/page_render.py [requests]
+"""
+import os
+import sys
+import tempfile
+import timeit
+from pathlib import Path
+
+# Setup Django environment
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Travel_Booking.settings')
+os.environ.setdefault('SECRET_KEY', 'benchmark')
+os.environ.setdefault('DEBUG', 'False')
+os.environ['DB_ENGINE'] = 'django.db.backends.sqlite3'
+os.environ['DB_NAME'] = os.path.join(tempfile.mkdtemp(), 'pages.sqlite3')
+import django
+django.setup()
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.management import call_command
+from django.test import Client
+from django.test.utils import override_settings
+
+PAGES = {
+    'anonymous': ['/', '/travel-options/'],
+    'signed in': ['/', '/travel-options/', '/bookings/', '/booking-details/'],
+}
+
+
+def clients():
+    anonymous = Client()
+    user = User.objects.create_user('benchmark', 'benchmark@example.com', 'benchmark-password')
+    signed_in = Client()
+    signed_in.force_login(user)
+    return {'anonymous': anonymous, 'signed in': signed_in}
+
+
+def time_page(client, path, requests, enabled):
+    with override_settings(PAGE_CACHE={**settings.PAGE_CACHE, 'ENABLED': enabled}):
+        caches[settings.PAGE_CACHE['CACHE_ALIAS']].clear()
+        first = client.get(path)
+        assert first.status_code == 200, (path, first.status_code)
+        # The cached copy must be the page the view renders
+        assert client.get(path).content == first.content
+        return min(timeit.repeat(lambda: client.get(path), number=requests, repeat=3)) / requests
+
+
+def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    settings.ALLOWED_HOSTS = [*settings.ALLOWED_HOSTS, 'testserver']
+    call_command('migrate', verbosity=0)
+    visitors = clients()
+
+    print(f"Requests per page: {requests}")
+    print(f"  {'visitor':<10} {'page':<18} {'uncached':>10} {'cached':>10} {'speed-up':>9}")
+    for visitor, paths in PAGES.items():
+        client = visitors[visitor]
+        for path in paths:
+            uncached = time_page(client, path, requests, enabled=False)
+            cached = time_page(client, path, requests, enabled=True)
+            print(f"  {visitor:<10} {path:<18} {uncached * 1e3:8.3f}ms {cached * 1e3:8.3f}ms "
+                  f"{uncached / cached:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Micro-benchmark: per-row cost of TravelOptionSerializer vs the .values() fast path.
+
+Runs entirely in memory (no database needed):
+
+    python benchmarks/serializer_rows.py [rows] [repeats]
+"""
+import os
+import sys
+import timeit
+from datetime import date, time, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+# Setup Django environment
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Travel_Booking.settings')
+import django
+django.setup()
+
+from django.utils import timezone
+from core.models import City, TravelOption
+from core.serializers import (
+    TravelOptionSerializer, TRAVEL_OPTION_ROW_FIELDS, travel_option_rows_to_data
+)
+
+
+def build_options(count):
+    """Unsaved TravelOption instances plus the equivalent .values() rows"""
+    delhi, mumbai = City(city_id=1, name='Delhi'), City(city_id=2, name='Mumbai')
+    now = timezone.now()
+    options, rows = [], []
+    for i in range(count):
+        option = TravelOption(
+            travel_id=i + 1, type='flight', operator_name='Air India',
+            source=delhi, destination=mumbai,
+            departure_date=date(2030, 1, 1) + timedelta(days=i % 30), departure_time=time(9, 30),
+            arrival_date=date(2030, 1, 1) + timedelta(days=i % 30), arrival_time=time(11, 45),
+            duration=timedelta(hours=2, minutes=15),
+            departure_at=now + timedelta(days=i % 30), arrival_at=now + timedelta(days=i % 30, hours=2),
+            price=Decimal('8500.00'), available_seats=180, total_seats=180,
+            created_at=now, updated_at=now,
+        )
+        options.append(option)
+        row = {field: getattr(option, field) for field in TRAVEL_OPTION_ROW_FIELDS if '__' not in field}
+        row['source__name'] = delhi.name
+        row['destination__name'] = mumbai.name
+        rows.append(row)
+    return options, rows
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    options, rows = build_options(count)
+
+    assert TravelOptionSerializer(options, many=True).data == travel_option_rows_to_data(rows)
+
+    serializer_time = min(timeit.repeat(
+        lambda: TravelOptionSerializer(options, many=True).data, number=repeats, repeat=3
+    ))
+    fast_time = min(timeit.repeat(
+        lambda: travel_option_rows_to_data(rows), number=repeats, repeat=3
+    ))
+
+    per_row = lambda total: total / (repeats * count) * 1e6
+    print(f"Rows per page: {count}, pages: {repeats}")
+    print(f"  TravelOptionSerializer : {per_row(serializer_time):8.2f} µs/row")
+    print(f"  .values() fast path    : {per_row(fast_time):8.2f} µs/row")
+    print(f"  Speed-up               : {serializer_time / fast_time:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
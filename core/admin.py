@@ -3,8 +3,17 @@ from . import models
 
 # Register your models here.
 
-admin.site.register(models.UserProfile)
-admin.site.register(models.TravelOption)
-admin.site.register(models.Booking)
+@admin.register(models.UserProfile)
+class UserProfileAdmin(admin.ModelAdmin):
+    list_select_related = ['user']
 
+admin.site.register(models.City)
 
+@admin.register(models.TravelOption)
+class TravelOptionAdmin(admin.ModelAdmin):
+    list_select_related = ['source', 'destination']
+
+@admin.register(models.Booking)
+class BookingAdmin(admin.ModelAdmin):
+    list_select_related = ['user']
+    raw_id_fields = ['user', 'travel_option']
@@ -0,0 +1,217 @@
+"""Admission control for booking writes.
+
+Each booking write (create, hold, confirm, cancel) must take a token from
+its user's bucket and, when the request names one, from the travel
+option's bucket. It must also get one of a fixed number of write slots
+per process. A request that fails any of these gets an immediate 429
+with Retry-After, before it reaches the database, so a sales spike
+queues at the edge instead of in front of the search traffic. Tokens
+taken by a rejected request are given back, so retrying against a busy
+travel option does not drain the user's own bucket.
+
+Buckets live in process memory by default. With ADMISSION['CACHE_ALIAS']
+set they live in that Django cache (e.g. Redis/Memcached) and are shared
+across nodes. Django's cache API only offers atomic add/incr, so there a
+bucket is a counter per window of BURST / RATE seconds: the same average
+rate and burst, with less smoothing.
+"""
+import math
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import wraps
+
+from django.conf import settings
+from rest_framework.exceptions import Throttled
+
+from .metrics import registry
+from .search_cache import CacheAlias
+
+
+class LocalBuckets:
+    """Thread-safe in-process token buckets, least recently used evicted first"""
+
+    def __init__(self, max_entries=100000):
+        self.max_entries = max_entries
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consume(self, key, rate, burst):
+        """Take a token; returns 0 when admitted, else seconds until one is available"""
+        now = time.monotonic()
+        with self._lock:
+            tokens, stamp = self._buckets.pop(key, (burst, now))
+            tokens = min(burst, tokens + (now - stamp) * rate)
+            if tokens >= 1:
+                tokens -= 1
+                wait = 0.0
+            else:
+                wait = (1 - tokens) / rate
+            self._buckets[key] = (tokens, now)
+            # An idle bucket has refilled anyway, so evicting it is harmless
+            while len(self._buckets) > self.max_entries:
+                self._buckets.popitem(last=False)
+            return wait
+
+    def refund(self, key, rate, burst):
+        """Give back a token taken by consume() for a request that was not admitted"""
+        with self._lock:
+            if key in self._buckets:
+                tokens, stamp = self._buckets[key]
+                self._buckets[key] = (min(burst, tokens + 1), stamp)
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+class CacheBuckets:
+    """Fixed-window counters in a shared Django cache"""
+
+    def __init__(self, cache):
+        self.cache = cache
+
+    @staticmethod
+    def window_key(key, window, now):
+        return f'admission:{key}:{int(now // window)}'
+
+    def consume(self, key, rate, burst):
+        window = burst / rate
+        now = time.time()
+        slot = int(now // window)
+        cache_key = self.window_key(key, window, now)
+        self.cache.add(cache_key, 0, timeout=math.ceil(window) + 1)
+        try:
+            count = self.cache.incr(cache_key)
+        except ValueError:
+            # Expired between add() and incr()
+            self.cache.add(cache_key, 1, timeout=math.ceil(window) + 1)
+            count = 1
+        if count <= burst:
+            return 0.0
+        return (slot + 1) * window - now
+
+    def refund(self, key, rate, burst):
+        """Give back a count taken by consume() for a request that was not admitted"""
+        try:
+            self.cache.decr(self.window_key(key, burst / rate, time.time()))
+        except ValueError:
+            # The window rolled over; its counts are gone anyway
+            pass
+
+    def __len__(self):
+        return 0
+
+
+class AdmissionController:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._configured = False
+        self._in_flight = 0
+
+    def _ensure_configured(self):
+        with self._lock:
+            if self._configured:
+                return
+            alias = settings.ADMISSION.get('CACHE_ALIAS')
+            self.buckets = CacheBuckets(CacheAlias(alias)) if alias else LocalBuckets()
+            self._configured = True
+
+    def check(self, user_id, travel_option_id=None):
+        """(outcome, wait) for this request; an admitted one holds a write slot.
+
+        Tokens are only spent by admitted requests: a rejection by a later
+        bucket or by the concurrency limit gives back the ones already taken.
+        """
+        self._ensure_configured()
+        config = settings.ADMISSION
+        limits = [('user', user_id, config['USER_RATE'], config['USER_BURST'])]
+        if travel_option_id is not None:
+            limits.append(('travel_option', travel_option_id,
+                           config['TRAVEL_OPTION_RATE'], config['TRAVEL_OPTION_BURST']))
+        taken = []
+        outcome, wait = 'admitted', 0.0
+        for scope, ident, rate, burst in limits:
+            if not rate:
+                continue
+            bucket = (f'{scope}:{ident}', rate, burst)
+            wait = self.buckets.consume(*bucket)
+            if wait:
+                outcome = f'rejected_{scope}'
+                break
+            taken.append(bucket)
+        if outcome == 'admitted' and not self.acquire_slot():
+            outcome, wait = 'rejected_concurrency', config['RETRY_AFTER']
+        if outcome != 'admitted':
+            for bucket in taken:
+                self.buckets.refund(*bucket)
+        return outcome, wait
+
+    def acquire_slot(self):
+        limit = settings.ADMISSION['MAX_CONCURRENT_WRITES']
+        with self._lock:
+            if limit and self._in_flight >= limit:
+                return False
+            self._in_flight += 1
+            registry.set('travel_admission_writes_in_flight', (), self._in_flight)
+            return True
+
+    def release_slot(self):
+        with self._lock:
+            self._in_flight -= 1
+            registry.set('travel_admission_writes_in_flight', (), self._in_flight)
+
+    def reset(self):
+        """Forget all buckets (tests and configuration changes)"""
+        with self._lock:
+            self._configured = False
+
+
+admission = AdmissionController()
+
+
+def travel_option_key(value):
+    # Only well-formed ids get a bucket; anything else fails validation later
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+@contextmanager
+def admit(request, travel_option_id=None):
+    """Admit a booking write or raise Throttled (429 with Retry-After)"""
+    if not settings.ADMISSION['ENABLED']:
+        yield
+        return
+    match = getattr(request, 'resolver_match', None)
+    view = match.view_name if match else 'unmatched'
+    outcome, wait = admission.check(request.user.pk, travel_option_key(travel_option_id))
+    registry.inc('travel_admission_requests_total', (('view', view), ('outcome', outcome)))
+    registry.set('travel_admission_buckets', (), len(admission.buckets))
+    if outcome != 'admitted':
+        raise Throttled(wait=math.ceil(wait))
+    try:
+        yield
+    finally:
+        admission.release_slot()
+
+
+def admission_controlled(view_func):
+    """Run a function-based API view under admit() for the request's user"""
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        with admit(request):
+            return view_func(request, *args, **kwargs)
+    return wrapper
+
+
+class AdmissionControlMixin:
+    """Admit a generic view's create() against the user and travel option buckets.
+
+    List it after IdempotentCreateMixin, so replayed responses skip admission.
+    """
+
+    def create(self, request, *args, **kwargs):
+        with admit(request, request.data.get('travel_option')):
+            return super().create(request, *args, **kwargs)
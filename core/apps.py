@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        # Hook the metrics query wrapper into every new database connection
+        from . import metrics  # noqa: F401
+        # Connect the principal cache invalidation signals
+        from . import authentication  # noqa: F401
+        # Connect the inventory index's TravelOption delete hook
+        from . import inventory  # noqa: F401
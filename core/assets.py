@@ -0,0 +1,350 @@
+"""Static asset pipeline: minified, bundled, content-hashed and precompressed.
+
+``manage.py build_assets`` concatenates each bundle in ASSETS['BUNDLES']
+(paths found through the staticfiles finders) and minifies it. It writes
+the result to ASSETS['OUTPUT_DIR'] as ``<name>.<hash>.<ext>`` with gzip
+and, when the optional ``brotli`` package is installed, brotli variants,
+plus a manifest. ``{% asset_tags %}`` (core.templatetags.assets) links the
+hashed bundle, which asset_view serves with the best encoding the client
+accepts and a far-future immutable Cache-Control. Until a build exists,
+or with ASSETS['ENABLED'] off (the DEBUG default), templates link the
+unbundled sources from STATIC_URL instead.
+
+The minifiers only drop comments and whitespace, so they work on any
+valid input without parsing it.
+"""
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import threading
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.core.exceptions import ImproperlyConfigured
+from django.http import FileResponse, Http404
+from django.templatetags.static import static
+from django.urls import reverse
+from django.utils.cache import patch_vary_headers
+from django.views.decorators.http import require_safe
+
+try:
+    import brotli
+except ImportError:  # optional dependency: gzip variants only
+    brotli = None
+
+MANIFEST_NAME = 'manifest.json'
+HASH_LENGTH = 12
+
+# Whitespace before these keeps a JavaScript statement going, so a newline
+# there can never end one (and a newline after them is never needed)
+JS_OPENERS = set('{;,([')
+JS_CLOSERS = set('});,].:?')
+# After these (or the keywords) a '/' starts a regular expression, not a division
+JS_REGEX_PRECEDERS = set('(,=:[!&|?{};+-*%<>~^')
+JS_REGEX_KEYWORDS = {
+    'return', 'typeof', 'instanceof', 'in', 'of', 'new', 'delete', 'void',
+    'throw', 'case', 'do', 'else', 'yield', 'await',
+}
+CSS_TIGHT_BEFORE = set('{};,>~)')
+CSS_TIGHT_AFTER = set('{};:,>~(')
+
+
+def is_word_char(char):
+    return char.isalnum() or char in '_$\\' or ord(char) > 127
+
+
+def minify_js(source):
+    """JavaScript without comments and with whitespace collapsed.
+
+    Strings, template literals (including nested ``${}`` expressions) and
+    regular expression literals are copied verbatim. Line breaks are kept
+    wherever automatic semicolon insertion could depend on them.
+    """
+    out = []
+    pending = ''
+    last = ''
+    # Brace depth of each open ${...} expression inside template literals
+    templates = []
+    i, n = 0, len(source)
+
+    def emit(token):
+        nonlocal pending
+        if pending and out:
+            prev, next_char = out[-1][-1], token[0]
+            if pending == '\n':
+                if prev not in JS_OPENERS and next_char not in JS_CLOSERS:
+                    out.append('\n')
+            elif (is_word_char(prev) and is_word_char(next_char)) or (prev in '+-/' and next_char == prev) \
+                    or (prev == '/' and next_char == '*'):
+                out.append(' ')
+        pending = ''
+        out.append(token)
+
+    def copy_template(start):
+        """Copy template literal text from ``start`` up to its end or next ${"""
+        j = start
+        while j < n:
+            if source[j] == '\\':
+                j += 2
+            elif source[j] == '`':
+                return j + 1, False
+            elif source.startswith('${', j):
+                return j + 2, True
+            else:
+                j += 1
+        return n, False
+
+    while i < n:
+        char = source[i]
+        if char in ' \t\r\n\f\v':
+            if char == '\n':
+                pending = '\n'
+            elif not pending:
+                pending = ' '
+            i += 1
+        elif source.startswith('//', i):
+            end = source.find('\n', i)
+            i = n if end == -1 else end
+        elif source.startswith('/*', i):
+            end = source.find('*/', i + 2)
+            end = n if end == -1 else end + 2
+            if '\n' in source[i:end]:
+                pending = '\n'
+            elif not pending:
+                pending = ' '
+            i = end
+        elif char in '\'"':
+            j = i + 1
+            while j < n and source[j] != char:
+                j += 2 if source[j] == '\\' else 1
+            emit(source[i:j + 1])
+            last, i = 'x', j + 1
+        elif char == '`' or (char == '}' and templates and templates[-1] == 0):
+            if char == '}':
+                templates.pop()
+            end, expression = copy_template(i + 1)
+            emit(source[i:end])
+            if expression:
+                templates.append(0)
+                last = '{'
+            else:
+                last = 'x'
+            i = end
+        elif char == '/' and (not last or last in JS_REGEX_PRECEDERS or last in JS_REGEX_KEYWORDS):
+            j, in_class = i + 1, False
+            while j < n and (in_class or source[j] != '/'):
+                if source[j] == '\\':
+                    j += 1
+                elif source[j] == '[':
+                    in_class = True
+                elif source[j] == ']':
+                    in_class = False
+                j += 1
+            j += 1
+            while j < n and is_word_char(source[j]):
+                j += 1
+            emit(source[i:j])
+            last, i = 'x', j
+        elif is_word_char(char):
+            j = i + 1
+            while j < n and is_word_char(source[j]):
+                j += 1
+            last = source[i:j]
+            emit(last)
+            i = j
+        else:
+            if templates and char == '{':
+                templates[-1] += 1
+            elif templates and char == '}':
+                templates[-1] -= 1
+            emit(char)
+            last, i = char, i + 1
+    return ''.join(out)
+
+
+def minify_css(source):
+    """CSS without comments, redundant whitespace and final semicolons"""
+    out = []
+    pending = False
+    i, n = 0, len(source)
+
+    def emit(token):
+        nonlocal pending
+        if pending and out and out[-1][-1] not in CSS_TIGHT_AFTER and token[0] not in CSS_TIGHT_BEFORE:
+            out.append(' ')
+        pending = False
+        if token == '}' and out and out[-1] == ';':
+            out.pop()
+        out.append(token)
+
+    while i < n:
+        char = source[i]
+        if char in ' \t\r\n\f':
+            pending = True
+            i += 1
+        elif source.startswith('/*', i):
+            end = source.find('*/', i + 2)
+            i = n if end == -1 else end + 2
+            pending = True
+        elif char in '\'"':
+            j = i + 1
+            while j < n and source[j] != char:
+                j += 2 if source[j] == '\\' else 1
+            emit(source[i:j + 1])
+            i = j + 1
+        else:
+            emit(char)
+            i += 1
+    return ''.join(out)
+
+
+MINIFIERS = {'.js': (minify_js, ';\n'), '.css': (minify_css, '\n')}
+
+
+def config():
+    return settings.ASSETS
+
+
+def output_dir():
+    return Path(config()['OUTPUT_DIR'])
+
+
+def bundle_sources(name):
+    try:
+        return config()['BUNDLES'][name]
+    except KeyError:
+        raise ImproperlyConfigured(f"Unknown asset bundle {name!r}; add it to ASSETS['BUNDLES']")
+
+
+class Manifest:
+    """The last build's bundle -> hashed file name map, reread when rebuilt"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stamp = None
+        self._files = {}
+
+    def files(self):
+        path = output_dir() / MANIFEST_NAME
+        try:
+            stamp = (path, path.stat().st_mtime_ns)
+        except FileNotFoundError:
+            return {}
+        if stamp != self._stamp:
+            with self._lock:
+                self._files = json.loads(path.read_text())['bundles']
+                self._stamp = stamp
+        return self._files
+
+
+manifest = Manifest()
+
+
+def asset_urls(name):
+    """URLs to link for a bundle: the built file, or each of its sources"""
+    sources = bundle_sources(name)
+    if config()['ENABLED']:
+        built = manifest.files().get(name)
+        if built:
+            return [reverse('asset', args=[built])]
+    return [static(source) for source in sources]
+
+
+def hashed_name(name, content):
+    stem, suffix = os.path.splitext(name)
+    return f'{stem}.{hashlib.sha256(content).hexdigest()[:HASH_LENGTH]}{suffix}'
+
+
+def write_file(path, content):
+    tmp = path.with_name(path.name + '.tmp')
+    tmp.write_bytes(content)
+    os.replace(tmp, path)
+
+
+def build_bundle(name, directory):
+    """Write one bundle and its compressed variants; returns its size report"""
+    suffix = os.path.splitext(name)[1]
+    minify, separator = MINIFIERS[suffix]
+    texts = []
+    for source in bundle_sources(name):
+        path = finders.find(source)
+        if path is None:
+            raise ImproperlyConfigured(f"Asset {source!r} of bundle {name!r} was not found")
+        texts.append(Path(path).read_text(encoding='utf-8'))
+    original = sum(len(text.encode()) for text in texts)
+    content = separator.join(minify(text) for text in texts).encode()
+    filename = hashed_name(name, content)
+    write_file(directory / filename, content)
+    # mtime=0 keeps the .gz bytes identical between builds of the same content
+    compressed = gzip.compress(content, compresslevel=9, mtime=0)
+    write_file(directory / f'{filename}.gz', compressed)
+    report = {
+        'name': name, 'file': filename, 'original': original,
+        'minified': len(content), 'gzip': len(compressed), 'brotli': None,
+    }
+    if brotli is not None:
+        compressed = brotli.compress(content, quality=11)
+        write_file(directory / f'{filename}.br', compressed)
+        report['brotli'] = len(compressed)
+    return report
+
+
+def build():
+    """Build every bundle and publish a new manifest; returns per-bundle size reports"""
+    directory = output_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    reports = [build_bundle(name, directory) for name in config()['BUNDLES']]
+
+    manifest_path = directory / MANIFEST_NAME
+    previous = json.loads(manifest_path.read_text())['bundles'] if manifest_path.exists() else {}
+    bundles = {report['name']: report['file'] for report in reports}
+    write_file(manifest_path, json.dumps({'bundles': bundles}, indent=2).encode())
+
+    # Keep the previous build too, for pages rendered before a rolling deploy
+    keep = {MANIFEST_NAME}
+    for filename in (*bundles.values(), *previous.values()):
+        keep.update((filename, f'{filename}.gz', f'{filename}.br'))
+    for path in directory.iterdir():
+        if path.name not in keep:
+            path.unlink()
+    return reports
+
+
+def accepted_encodings(header):
+    accepted = set()
+    for part in header.split(','):
+        coding, _, params = part.strip().partition(';')
+        quality = params.strip()
+        if quality.startswith('q='):
+            try:
+                if float(quality[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(coding.strip().lower())
+    return accepted
+
+
+@require_safe
+def asset_view(request, name):
+    """A built bundle, precompressed if the client accepts it, cached for good"""
+    if name not in manifest.files().values():
+        raise Http404('Unknown asset')
+    path = output_dir() / name
+    accepted = accepted_encodings(request.headers.get('Accept-Encoding', ''))
+    encoding = None
+    for coding, suffix in (('br', '.br'), ('gzip', '.gz')):
+        variant = path.with_name(path.name + suffix)
+        if coding in accepted and variant.exists():
+            path, encoding = variant, coding
+            break
+    response = FileResponse(path.open('rb'), content_type=mimetypes.guess_type(name)[0])
+    if encoding:
+        response['Content-Encoding'] = encoding
+    # The name changes with the content, so a copy never goes stale
+    response['Cache-Control'] = f"public, max-age={config()['MAX_AGE']}, immutable"
+    patch_vary_headers(response, ['Accept-Encoding'])
+    return response
@@ -0,0 +1,190 @@
+"""Native async variants of the hot read-only API endpoints.
+
+Served instead of the DRF views when ASYNC_API is enabled (the default
+under Travel_Booking.asgi). GET requests are authenticated, filtered,
+paginated and rendered on the event loop; only the queries themselves go
+through the async ORM. Other methods (e.g. POST to create a booking) are
+handed to the regular DRF view, so behaviour is unchanged.
+"""
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.http import HttpResponse, HttpResponseBase
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+from . import views
+from .authentication import check_user, principal_cache
+from .city_index import city_index
+from .conditional import listing_aggregates, listing_validators, not_modified, set_validators
+from .inventory import inventory_index
+from .models import Booking
+from .routing import allow_replica_reads
+from .pagination import BookingPagination, TravelOptionPagination
+from .search_cache import search_cache
+from .serializers import BookingSerializer, TRAVEL_OPTION_ROW_FIELDS, travel_option_rows_to_data
+
+jwt_authentication = JWTAuthentication()
+
+
+async def aauthenticate(request, claims_only=False):
+    """Async equivalent of the (cached or claims-only) JWT-then-session authenticator chain"""
+    header = jwt_authentication.get_header(request)
+    if header is not None:
+        raw_token = jwt_authentication.get_raw_token(header)
+        if raw_token is not None:
+            validated = jwt_authentication.get_validated_token(raw_token)
+            try:
+                user_id = validated[jwt_settings.USER_ID_CLAIM]
+            except KeyError:
+                raise InvalidToken('Token contained no recognizable user identification')
+            if claims_only:
+                return jwt_settings.TOKEN_USER_CLASS(validated)
+            try:
+                user = await principal_cache.aget_user(user_id)
+            except User.DoesNotExist:
+                raise exceptions.AuthenticationFailed('User not found', code='user_not_found')
+            return check_user(user, validated)
+    # Session cookies are only trusted for safe methods here; writes go
+    # through DRF's SessionAuthentication and its CSRF check
+    return await request.auser()
+
+
+def render(data, status=200, headers=None):
+    # Same bytes as DRF's JSONRenderer on the sync views
+    response = HttpResponse(JSONRenderer().render(data), content_type='application/json', status=status)
+    for name, value in (headers or {}).items():
+        response[name] = value
+    return response
+
+
+def render_exception(exc):
+    detail = exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+    headers = {}
+    if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+        headers['WWW-Authenticate'] = jwt_authentication.authenticate_header(None)
+    return render(detail, status=exc.status_code, headers=headers)
+
+
+class AsyncAPIView(View):
+    """Async GET handler in front of a DRF view that serves every other method"""
+    sync_view = None
+    sync_handler = None
+    login_required = False
+    # Mirror ClaimsJWTAuthentication and ReplicaReadMixin on the sync view
+    claims_only = False
+    replica_reads = False
+    validators = None
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(sync_handler=sync_to_async(cls.sync_view.as_view()), **initkwargs)
+        # Authentication is token based; DRF enforces CSRF for session writes
+        return csrf_exempt(view)
+
+    async def dispatch(self, request, *args, **kwargs):
+        if request.method != 'GET':
+            return await self.sync_handler(request, *args, **kwargs)
+        return await self.get(request, *args, **kwargs)
+
+    async def get(self, request, *args, **kwargs):
+        drf_request = Request(request)
+        try:
+            user = await aauthenticate(request, claims_only=self.claims_only)
+            if self.login_required and not user.is_authenticated:
+                raise exceptions.NotAuthenticated()
+            drf_request.user = user
+            if self.replica_reads:
+                allow_replica_reads(drf_request)
+            data = await self.aget(drf_request, *args, **kwargs)
+        except exceptions.APIException as exc:
+            return render_exception(exc)
+        if isinstance(data, HttpResponseBase):
+            return data
+        response = render(data)
+        if self.validators is not None:
+            set_validators(response, *self.validators)
+        return response
+
+    async def aget(self, request, *args, **kwargs):
+        raise NotImplementedError
+
+    async def anot_modified(self, request, queryset):
+        """Async ConditionalGetMixin.list() check; a 304 response or None"""
+        fields = self.sync_view.validator_fields
+        result = await queryset.order_by().aaggregate(**listing_aggregates(fields))
+        self.validators = listing_validators(request, result, fields)
+        return not_modified(request._request, self.validators[0])
+
+
+class TravelSearchAsyncView(AsyncAPIView):
+    sync_view = views.TravelSearchView
+    claims_only = True
+    replica_reads = True
+
+    async def aget(self, request, *args, **kwargs):
+        await city_index.aensure_loaded()
+        params = views.travel_search_params(request.query_params)
+        cache_key = await search_cache.amake_key(
+            views.travel_search_cache_params(params, request),
+            source_ids=params['source'],
+            destination_ids=params['destination'],
+        )
+        data = await search_cache.aget(cache_key)
+        if data is None:
+            await inventory_index.aensure_fresh()
+            data = views.travel_search_index_data(params, request, TravelOptionPagination())
+            if data is None:
+                # Same filter backends (ordering) as the DRF view; none of them query
+                view = views.TravelSearchView(request=request, args=args, kwargs=kwargs, format_kwarg=None)
+                rows = view.filter_queryset(views.travel_search_queryset(params)).values(*TRAVEL_OPTION_ROW_FIELDS)
+                data = await paginated_rows(TravelOptionPagination(), rows, request)
+            await search_cache.aset(cache_key, data)
+        return data
+
+
+class TravelOptionListAsyncView(AsyncAPIView):
+    sync_view = views.TravelOptionListCreateView
+    login_required = True
+    claims_only = True
+    replica_reads = True
+
+    async def aget(self, request, *args, **kwargs):
+        view = views.TravelOptionListCreateView(request=request, args=args, kwargs=kwargs, format_kwarg=None)
+        # No filter validates its input with a query, so nothing runs yet
+        queryset = view.filter_queryset(view.get_queryset())
+        response = await self.anot_modified(request, queryset)
+        if response is not None:
+            return response
+        return await paginated_rows(TravelOptionPagination(), queryset.values(*TRAVEL_OPTION_ROW_FIELDS), request)
+
+
+class BookingListAsyncView(AsyncAPIView):
+    sync_view = views.BookingListCreateView
+    login_required = True
+
+    async def aget(self, request, *args, **kwargs):
+        queryset = Booking.objects.filter(user=request.user).select_related(
+            'travel_option__source', 'travel_option__destination'
+        )
+        response = await self.anot_modified(request, queryset)
+        if response is not None:
+            return response
+        paginator = BookingPagination()
+        page = await paginator.apaginate_queryset(queryset, request)
+        context = {'request': request}
+        if page is None:
+            return BookingSerializer([booking async for booking in queryset], many=True, context=context).data
+        return paginator.get_paginated_response(BookingSerializer(page, many=True, context=context).data).data
+
+
+async def paginated_rows(paginator, rows, request):
+    page = await paginator.apaginate_queryset(rows, request)
+    if page is None:
+        return travel_option_rows_to_data([row async for row in rows])
+    return paginator.get_paginated_response(travel_option_rows_to_data(page)).data
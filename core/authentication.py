@@ -0,0 +1,159 @@
+"""JWT authentication without a user query on every request.
+
+CachedJWTAuthentication (the default) resolves the token's user through
+principal_cache, a short-lived cache of User rows with their UserProfile
+joined in. ClaimsJWTAuthentication goes further for read-only requests to
+endpoints that never need the user row: request.user is a TokenUser built
+from the signed claims alone.
+
+Cached principals are dropped whenever the user or profile is saved or
+deleted and on logout. They are also bounded by PRINCIPAL_CACHE['TIMEOUT']
+for changes made on other nodes when the in-process cache is used.
+"""
+import copy
+import threading
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.auth.signals import user_logged_out
+from django.db.models.signals import post_delete, post_save
+from django.utils.translation import gettext_lazy as _
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .models import UserProfile
+from .search_cache import CacheAlias, LRUCache
+
+
+class PrincipalCache:
+    """User rows (with UserProfile) by primary key, for a few seconds"""
+
+    def __init__(self):
+        self._configured = False
+        self._lock = threading.Lock()
+
+    def _configure(self):
+        with self._lock:
+            if self._configured:
+                return
+            config = getattr(settings, 'PRINCIPAL_CACHE', {})
+            self.enabled = config.get('ENABLED', True)
+            self.timeout = config.get('TIMEOUT', 30)
+            alias = config.get('CACHE_ALIAS')
+            self.shared = bool(alias)
+            self.entries = CacheAlias(alias) if alias else LRUCache(config.get('MAX_ENTRIES', 10000), self.timeout)
+            self._configured = True
+
+    def _ensure_configured(self):
+        if not self._configured:
+            self._configure()
+
+    @staticmethod
+    def key(user_id):
+        return f'principal:{user_id}'
+
+    @staticmethod
+    def load(user_id):
+        return User.objects.select_related('userprofile').get(**{jwt_settings.USER_ID_FIELD: user_id})
+
+    def get_user(self, user_id):
+        """The user (raises User.DoesNotExist); each caller gets its own copy"""
+        self._ensure_configured()
+        if not self.enabled:
+            return self.load(user_id)
+        user = self.entries.get(self.key(user_id))
+        if user is None:
+            user = self.load(user_id)
+            self.entries.set(self.key(user_id), user, self.timeout)
+        # Views may modify request.user; never hand out the cached instance
+        return user if self.shared else copy.deepcopy(user)
+
+    async def aget_user(self, user_id):
+        self._ensure_configured()
+        if self.enabled and not self.shared:
+            user = self.entries.get(self.key(user_id))
+            if user is not None:
+                return copy.deepcopy(user)
+        return await sync_to_async(self.get_user)(user_id)
+
+    def invalidate(self, user_id):
+        self._ensure_configured()
+        self.entries.delete(self.key(user_id))
+
+
+principal_cache = PrincipalCache()
+
+
+def invalidate_user(sender, instance, **kwargs):
+    principal_cache.invalidate(instance.pk)
+
+
+def invalidate_profile(sender, instance, **kwargs):
+    principal_cache.invalidate(instance.user_id)
+
+
+def invalidate_on_logout(sender, request, user, **kwargs):
+    if user is not None:
+        principal_cache.invalidate(user.pk)
+
+
+post_save.connect(invalidate_user, sender=User)
+post_delete.connect(invalidate_user, sender=User)
+post_save.connect(invalidate_profile, sender=UserProfile)
+post_delete.connect(invalidate_profile, sender=UserProfile)
+user_logged_out.connect(invalidate_on_logout)
+
+
+def check_user(user, validated_token):
+    """simplejwt's checks on a resolved user"""
+    if jwt_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+        raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+    if jwt_settings.CHECK_REVOKE_TOKEN:
+        if validated_token.get(jwt_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+            raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+    return user
+
+
+def token_user_id(validated_token):
+    try:
+        return validated_token[jwt_settings.USER_ID_CLAIM]
+    except KeyError as e:
+        raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication resolving the user through principal_cache"""
+
+    def get_user(self, validated_token):
+        try:
+            user = principal_cache.get_user(token_user_id(validated_token))
+        except User.DoesNotExist as e:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found") from e
+        return check_user(user, validated_token)
+
+
+class ClaimsJWTAuthentication(CachedJWTAuthentication):
+    """Trust the signed claims on safe methods: request.user is a TokenUser.
+
+    Only for views whose reads use nothing but the user id. Unsafe methods
+    still resolve the full user.
+    """
+
+    def authenticate(self, request):
+        # DRF creates authenticators per request, so this is request-local
+        self.claims_only = request.method in SAFE_METHODS
+        return super().authenticate(request)
+
+    def get_user(self, validated_token):
+        if self.claims_only:
+            token_user_id(validated_token)
+            return jwt_settings.TOKEN_USER_CLASS(validated_token)
+        return super().get_user(validated_token)
+
+
+CLAIMS_AUTHENTICATION_CLASSES = [ClaimsJWTAuthentication, SessionAuthentication]
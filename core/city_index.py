@@ -0,0 +1,153 @@
+import threading
+import time
+from bisect import bisect_left, insort
+from difflib import SequenceMatcher
+
+from asgiref.sync import sync_to_async
+
+
+def normalize_city_name(name):
+    """Collapse whitespace and case so 'new  delhi' and 'New Delhi' match"""
+    return ' '.join(str(name).split()).casefold()
+
+
+def trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class CityIndex:
+    """In-process prefix and trigram index over the City table.
+
+    Resolves free-text user input to City ids so route search can filter
+    TravelOption on indexed source/destination ids instead of scanning
+    with icontains. Cities saved in this process are added to the live
+    index once their transaction commits; the index is rebuilt at most
+    every ``ttl`` seconds so cities added by other processes are picked up.
+    """
+
+    def __init__(self, ttl=300, fuzzy_threshold=0.75, fuzzy_limit=5):
+        self.ttl = ttl
+        self.fuzzy_threshold = fuzzy_threshold
+        self.fuzzy_limit = fuzzy_limit
+        self._lock = threading.Lock()
+        self._loaded_at = None
+        self._exact = {}
+        self._entries = []
+        self._trigrams = {}
+        self._names = {}
+
+    def invalidate(self):
+        self._loaded_at = None
+
+    def add(self, city_id, name):
+        """Index a saved city in place, without reloading the table.
+
+        Readers do not lock, so every structure changes in one atomic
+        step: a sorted insert, or a dict item set to a new posting set.
+        """
+        key = normalize_city_name(name)
+        with self._lock:
+            if self._loaded_at is None or self._exact.get(key) == city_id:
+                return
+            if city_id in self._names:
+                # Renamed: the old name's entries have to go
+                self._loaded_at = None
+                return
+            self._names[city_id] = key
+            words = key.split(' ')
+            for i in range(len(words)):
+                insort(self._entries, (' '.join(words[i:]), city_id))
+            for gram in trigrams(key):
+                self._trigrams[gram] = self._trigrams.get(gram, frozenset()) | {city_id}
+            self._exact[key] = city_id
+
+    def _ensure_loaded(self):
+        loaded_at = self._loaded_at
+        if loaded_at is not None and time.monotonic() - loaded_at < self.ttl:
+            return
+        with self._lock:
+            if self._loaded_at is not None and time.monotonic() - self._loaded_at < self.ttl:
+                return
+            from .models import City
+            self._build(City.objects.values_list('city_id', 'name'))
+
+    async def aensure_loaded(self):
+        """Load or refresh the index from async code, off the event loop"""
+        loaded_at = self._loaded_at
+        if loaded_at is None or time.monotonic() - loaded_at >= self.ttl:
+            await sync_to_async(self._ensure_loaded)()
+
+    def _build(self, rows):
+        exact = {}
+        entries = []
+        grams = {}
+        names = {}
+        for city_id, name in rows:
+            key = normalize_city_name(name)
+            exact[key] = city_id
+            # Index every word start so "delhi" also finds "New Delhi"
+            words = key.split(' ')
+            for i in range(len(words)):
+                entries.append((' '.join(words[i:]), city_id))
+            names[city_id] = key
+            for gram in trigrams(key):
+                grams.setdefault(gram, set()).add(city_id)
+        entries.sort()
+        self._exact = exact
+        self._entries = entries
+        self._trigrams = grams
+        self._names = names
+        self._loaded_at = time.monotonic()
+
+    def lookup(self, name):
+        """Exact (normalized) name to City id, or None"""
+        self._ensure_loaded()
+        return self._exact.get(normalize_city_name(name))
+
+    def prefix(self, text):
+        """City ids whose name, or any word in it, starts with ``text``"""
+        self._ensure_loaded()
+        text = normalize_city_name(text)
+        entries = self._entries
+        ids = set()
+        i = bisect_left(entries, (text,))
+        while i < len(entries) and entries[i][0].startswith(text):
+            ids.add(entries[i][1])
+            i += 1
+        return ids
+
+    def fuzzy(self, text):
+        """Closest City ids for a misspelt name, for typo tolerance.
+
+        Trigram postings narrow the candidates to cities sharing at least
+        one trigram with the input; those are ranked by edit similarity.
+        """
+        self._ensure_loaded()
+        text = normalize_city_name(text)
+        candidates = set()
+        for gram in trigrams(text):
+            candidates |= self._trigrams.get(gram, set())
+        scored = []
+        for city_id in candidates:
+            score = SequenceMatcher(None, text, self._names[city_id]).ratio()
+            if score >= self.fuzzy_threshold:
+                scored.append((score, city_id))
+        scored.sort(reverse=True)
+        return {city_id for _, city_id in scored[:self.fuzzy_limit]}
+
+    def resolve(self, text):
+        """Resolve user input to a set of City ids.
+
+        Tries an exact match, then prefix matches, then trigram similarity.
+        An empty set means no city matched.
+        """
+        if not text or not text.strip():
+            return set()
+        city_id = self.lookup(text)
+        if city_id is not None:
+            return {city_id}
+        return self.prefix(text) or self.fuzzy(text)
+
+
+city_index = CityIndex()
@@ -0,0 +1,102 @@
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+
+def make_etag(request, *parts):
+    """Weak ETag over the validator ``parts`` and everything else the body depends on.
+
+    The full path covers filters, ordering and the page or cursor; the
+    user is included because booking payloads embed the user block, and
+    Accept because the browsable API renders the same data as HTML.
+    """
+    user = getattr(request, 'user', None)
+    raw = repr((
+        request.get_full_path(),
+        request.META.get('HTTP_ACCEPT', ''),
+        getattr(user, 'pk', None),
+        getattr(user, 'username', None),
+        getattr(user, 'email', None),
+        getattr(user, 'first_name', None),
+        getattr(user, 'last_name', None),
+        parts,
+    ))
+    return 'W/' + quote_etag(hashlib.md5(raw.encode()).hexdigest())
+
+
+def listing_aggregates(fields):
+    aggregates = {f'max_{i}': Max(field) for i, field in enumerate(fields)}
+    aggregates['row_count'] = Count('pk')
+    return aggregates
+
+
+def listing_validators(request, result, fields):
+    """(etag, last_modified) from the listing aggregate ``result``"""
+    stamps = [result[f'max_{i}'] for i in range(len(fields))]
+    stamps = [stamp for stamp in stamps if stamp is not None]
+    last_modified = max(stamps) if stamps else None
+    etag = make_etag(request, result['row_count'], *(stamp.isoformat() for stamp in stamps))
+    return etag, last_modified
+
+
+def not_modified(request, etag, last_modified=None):
+    """HttpResponseNotModified when the request's validators still match, else None"""
+    response = get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=int(last_modified.timestamp()) if last_modified else None,
+    )
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
+
+
+def set_validators(response, etag, last_modified):
+    if response.status_code in (200, 304):
+        response['ETag'] = etag
+        if last_modified:
+            response['Last-Modified'] = http_date(last_modified.timestamp())
+        # Validators are per user; shared caches must not reuse the body
+        response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+class ConditionalGetMixin:
+    """ETag / Last-Modified validation for DRF list and retrieve views.
+
+    Listings are validated by max(``validator_fields``) plus the row count
+    of the filtered queryset, details by the row's own ``validator_fields``;
+    either way one query runs before anything is fetched or serialized,
+    and a matching If-None-Match / If-Modified-Since gets a 304.
+
+    A listing's Last-Modified cannot see deletions, so only its ETag is
+    used to answer conditional requests.
+    """
+    validator_fields = ('updated_at',)
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        result = queryset.order_by().aggregate(**listing_aggregates(self.validator_fields))
+        etag, last_modified = listing_validators(request, result, self.validator_fields)
+        response = not_modified(request._request, etag)
+        if response is not None:
+            return response
+        return set_validators(super().list(request, *args, **kwargs), etag, last_modified)
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        stamps = self.get_queryset().filter(
+            **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        ).values_list(*self.validator_fields).first()
+        if stamps is None:
+            # Let the regular lookup raise its 404
+            return super().retrieve(request, *args, **kwargs)
+        stamps = [stamp for stamp in stamps if stamp is not None]
+        last_modified = max(stamps) if stamps else None
+        etag = make_etag(request, *(stamp.isoformat() for stamp in stamps))
+        response = not_modified(request._request, etag, last_modified)
+        if response is not None:
+            return response
+        return set_validators(super().retrieve(request, *args, **kwargs), etag, last_modified)
@@ -0,0 +1,225 @@
+import heapq
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .inventory import REFRESH_OVERLAP
+from .models import TravelOption
+
+Leg = namedtuple('Leg', [
+    'travel_id', 'type', 'source_id', 'destination_id',
+    'departure', 'arrival', 'price', 'available_seats',
+])
+
+SORT_KEYS = ('arrival', 'price', 'transfers')
+
+# Upper bound on partial itineraries expanded per search
+MAX_EXPANSIONS = 50000
+
+
+def epoch(value):
+    return int(value.timestamp())
+
+
+class ConnectionGraph:
+    """Time-expanded route graph over upcoming TravelOption rows.
+
+    Every upcoming option with seats left is a leg (an edge from its
+    source city at departure time to its destination city at arrival
+    time). Departures are kept per city, sorted by time, so feasible
+    onward legs after a transfer are found with a bisect instead of a SQL
+    self-join.
+
+    The graph is held in memory and refreshed incrementally: at most every
+    ``refresh_interval`` seconds, rows whose ``updated_at`` moved since
+    the last refresh are merged in (or dropped once sold out or moved out
+    of the horizon); a full rebuild runs every ``rebuild_interval``
+    seconds to drop deleted and departed rows. The legs and departures
+    are swapped in together as one tuple, and changed city lists are
+    replaced, never mutated in place, so readers always see a consistent
+    snapshot.
+    """
+
+    def __init__(self, horizon_days=30, refresh_interval=5, rebuild_interval=600, max_wait_hours=24):
+        self.horizon_days = horizon_days
+        self.refresh_interval = refresh_interval
+        self.rebuild_interval = rebuild_interval
+        self.max_wait = max_wait_hours * 3600
+        self._lock = threading.Lock()
+        # (legs by travel_id, sorted (departure, travel_id) lists by source city)
+        self._graph = ({}, {})
+        self._watermark = None
+        self._refreshed_at = None
+        self._rebuilt_at = None
+
+    def _load(self, **filters):
+        rows = TravelOption.objects.filter(**filters).values_list(
+            'travel_id', 'type', 'source_id', 'destination_id',
+            'departure_at', 'arrival_at', 'price', 'available_seats'
+        )
+        return [
+            Leg(travel_id, travel_type, source_id, destination_id,
+                epoch(departure_at), epoch(arrival_at), price, seats)
+            for travel_id, travel_type, source_id, destination_id, departure_at, arrival_at, price, seats
+            in rows.iterator(chunk_size=5000)
+        ]
+
+    def rebuild(self):
+        started = timezone.now()
+        legs = self._load(
+            available_seats__gt=0,
+            departure_at__gte=started,
+            departure_at__lt=started + timedelta(days=self.horizon_days),
+        )
+        departures = {}
+        for leg in legs:
+            departures.setdefault(leg.source_id, []).append((leg.departure, leg.travel_id))
+        for entries in departures.values():
+            entries.sort()
+        self._graph = ({leg.travel_id: leg for leg in legs}, departures)
+        self._watermark = started - REFRESH_OVERLAP
+        self._rebuilt_at = self._refreshed_at = time.monotonic()
+
+    def refresh(self):
+        """Merge rows changed since the last refresh (seats, times, prices)"""
+        started = timezone.now()
+        # No departure filter: rows moved out of the horizon must leave the graph
+        changed = self._load(updated_at__gte=self._watermark)
+        if changed:
+            current_legs, current_departures = self._graph
+            horizon = (epoch(started), epoch(started + timedelta(days=self.horizon_days)))
+            kept = [leg for leg in changed if leg.available_seats > 0 and horizon[0] <= leg.departure < horizon[1]]
+            legs = dict(current_legs)
+            touched = {}
+            for leg in changed:
+                old = legs.pop(leg.travel_id, None)
+                if old is not None:
+                    touched.setdefault(old.source_id, set()).add((old.departure, old.travel_id))
+            departures = dict(current_departures)
+            for source_id, removed in touched.items():
+                departures[source_id] = [entry for entry in departures.get(source_id, []) if entry not in removed]
+            for leg in kept:
+                legs[leg.travel_id] = leg
+                entries = departures.get(leg.source_id, [])
+                if entries is current_departures.get(leg.source_id):
+                    entries = list(entries)
+                entries.insert(bisect_left(entries, (leg.departure, leg.travel_id)), (leg.departure, leg.travel_id))
+                departures[leg.source_id] = entries
+            self._graph = (legs, departures)
+        self._watermark = started - REFRESH_OVERLAP
+        self._refreshed_at = time.monotonic()
+
+    def ensure_fresh(self):
+        now = time.monotonic()
+        if self._refreshed_at is not None and now - self._refreshed_at < self.refresh_interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            if self._rebuilt_at is None or now - self._rebuilt_at >= self.rebuild_interval:
+                self.rebuild()
+            elif now - self._refreshed_at >= self.refresh_interval:
+                self.refresh()
+
+    def search(self, origins, destinations, window_start, window_end, sort='arrival',
+               limit=5, max_legs=3, seats=1, types=None):
+        """Top-``limit`` itineraries from any origin city to any destination city.
+
+        Itineraries start with a leg departing in [window_start, window_end)
+        and are ranked by arrival time, total price or number of transfers.
+        Each criterion only grows as an itinerary is extended, so a
+        best-first search over partial itineraries pops complete ones in
+        rank order and can stop after ``limit`` results.
+        """
+        self.ensure_fresh()
+        legs, departures = self._graph
+        min_connection = connection_rules()
+        max_wait = self.max_wait
+        now = epoch(timezone.now())
+        window_start = max(epoch(window_start), now)
+        window_end = epoch(window_end)
+        origins = set(origins)
+        destinations = set(destinations)
+
+        def usable(leg):
+            return leg.available_seats >= seats and (not types or leg.type in types)
+
+        def rank(path, price):
+            last = path[-1]
+            if sort == 'price':
+                return (price, last.arrival, len(path))
+            if sort == 'transfers':
+                return (len(path), last.arrival, price)
+            return (last.arrival, price, len(path))
+
+        heap = []
+        counter = 0
+        for origin in origins:
+            entries = departures.get(origin, [])
+            start = bisect_left(entries, (window_start, -1))
+            end = bisect_left(entries, (window_end, -1))
+            for _, travel_id in entries[start:end]:
+                leg = legs[travel_id]
+                if usable(leg) and leg.destination_id not in origins:
+                    path = (leg,)
+                    heapq.heappush(heap, (rank(path, leg.price), counter, path, leg.price))
+                    counter += 1
+
+        results = []
+        expansions = 0
+        while heap and len(results) < limit and expansions < MAX_EXPANSIONS:
+            _, _, path, price = heapq.heappop(heap)
+            last = path[-1]
+            if last.destination_id in destinations:
+                results.append(path)
+                continue
+            if len(path) >= max_legs:
+                continue
+            expansions += 1
+            visited = {leg.source_id for leg in path}
+            entries = departures.get(last.destination_id, [])
+            start = bisect_left(entries, (last.arrival, -1))
+            end = bisect_right(entries, (last.arrival + max_wait, float('inf')))
+            for departure, travel_id in entries[start:end]:
+                leg = legs[travel_id]
+                if departure - last.arrival < min_connection.get((last.type, leg.type), 0):
+                    continue
+                if not usable(leg) or leg.destination_id in visited:
+                    continue
+                extended = path + (leg,)
+                total = price + leg.price
+                heapq.heappush(heap, (rank(extended, total), counter, extended, total))
+                counter += 1
+        return results
+
+
+def connection_rules():
+    """Minimum connection time in seconds per (arriving type, departing type).
+
+    MIN_CONNECTION_MINUTES is looked up by "arriving-departing" pair, then
+    by arriving type, then falls back to "default".
+    """
+    minutes = getattr(settings, 'CONNECTION_SEARCH', {}).get('MIN_CONNECTION_MINUTES', {})
+    default = minutes.get('default', 30)
+    types = [choice for choice, _ in TravelOption.TRAVEL_TYPE_CHOICES]
+    return {
+        (arriving, departing): 60 * minutes.get(f'{arriving}-{departing}', minutes.get(arriving, default))
+        for arriving in types for departing in types
+    }
+
+
+def build_connection_graph():
+    config = getattr(settings, 'CONNECTION_SEARCH', {})
+    return ConnectionGraph(
+        horizon_days=config.get('HORIZON_DAYS', 30),
+        refresh_interval=config.get('REFRESH_INTERVAL', 5),
+        rebuild_interval=config.get('REBUILD_INTERVAL', 600),
+        max_wait_hours=config.get('MAX_WAIT_HOURS', 24),
+    )
+
+
+connection_graph = build_connection_graph()
@@ -0,0 +1,117 @@
+import csv
+import json
+
+from django.utils import timezone
+
+from .models import Booking
+
+# (output column, Booking.values() path)
+BOOKING_COLUMNS = [
+    ('booking_id', 'booking_id'),
+    ('reference_number', 'reference_number'),
+    ('status', 'status'),
+    ('booking_date', 'booking_date'),
+    ('username', 'user__username'),
+    ('number_of_seats', 'number_of_seats'),
+    ('total_price', 'total_price'),
+    ('travel_id', 'travel_option_id'),
+    ('travel_type', 'travel_option__type'),
+    ('operator_name', 'travel_option__operator_name'),
+    ('source', 'travel_option__source__name'),
+    ('destination', 'travel_option__destination__name'),
+    ('departure_at', 'travel_option__departure_at'),
+    ('arrival_at', 'travel_option__arrival_at'),
+    ('seat_price', 'travel_option__price'),
+]
+
+PASSENGER_FIELDS = ['name', 'age', 'id_number', 'special_requirements']
+
+EXPORT_HEADER = (
+    [column for column, _ in BOOKING_COLUMNS]
+    + ['passenger_index']
+    + [f'passenger_{field}' for field in PASSENGER_FIELDS]
+)
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+def iter_bookings(queryset, chunk_size=2000):
+    """Yield Booking rows as dicts, one keyset-paged chunk at a time.
+
+    Each chunk is a separate ``booking_id > last`` query, so memory stays
+    flat on every backend (MySQLdb buffers a whole result set even for
+    .iterator()) and no long-lived cursor or transaction is held open.
+    """
+    paths = [path for _, path in BOOKING_COLUMNS] + ['passenger_details']
+    queryset = queryset.order_by('booking_id').values(*paths)
+    last_id = 0
+    while True:
+        chunk = list(queryset.filter(booking_id__gt=last_id)[:chunk_size])
+        if not chunk:
+            return
+        yield from chunk
+        last_id = chunk[-1]['booking_id']
+
+
+def flatten_booking(row):
+    """One flat record per passenger (or one with blank passenger columns)"""
+    tz = timezone.get_current_timezone()
+    base = {}
+    for column, path in BOOKING_COLUMNS:
+        value = row[path]
+        if hasattr(value, 'astimezone'):
+            value = value.astimezone(tz).isoformat()
+        elif value is not None and not isinstance(value, (int, str)):
+            value = str(value)
+        base[column] = value
+
+    passengers = row['passenger_details']
+    if not isinstance(passengers, list) or not passengers:
+        passengers = [None]
+    for index, passenger in enumerate(passengers, start=1):
+        record = dict(base)
+        passenger = passenger if isinstance(passenger, dict) else {}
+        record['passenger_index'] = index if passenger else None
+        for field in PASSENGER_FIELDS:
+            record[f'passenger_{field}'] = passenger.get(field)
+        yield record
+
+
+class Echo:
+    """File-like object whose write() hands the line back to the caller"""
+
+    def write(self, value):
+        return value
+
+
+def iter_export_lines(queryset, fmt, chunk_size=2000):
+    """Yield the export as CSV or NDJSON text, one line at a time"""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {fmt}")
+    if fmt == 'csv':
+        writer = csv.writer(Echo())
+        yield writer.writerow(EXPORT_HEADER)
+        for row in iter_bookings(queryset, chunk_size):
+            for record in flatten_booking(row):
+                yield writer.writerow(['' if record[column] is None else record[column] for column in EXPORT_HEADER])
+    else:
+        for row in iter_bookings(queryset, chunk_size):
+            for record in flatten_booking(row):
+                yield json.dumps(record, default=str) + '\n'
+
+
+def export_queryset(user=None, status=None, date_from=None, date_to=None):
+    """Bookings to export, optionally narrowed to one user, status and booking window"""
+    queryset = Booking.objects.all()
+    if user is not None:
+        queryset = queryset.filter(user=user)
+    if status:
+        queryset = queryset.filter(status=status)
+    if date_from:
+        queryset = queryset.filter(booking_date__gte=date_from)
+    if date_to:
+        queryset = queryset.filter(booking_date__lt=date_to)
+    return queryset
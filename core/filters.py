@@ -0,0 +1,20 @@
+import django_filters
+
+from .models import City, TravelOption
+
+
+class TravelOptionFilter(django_filters.FilterSet):
+    """Listing filters; ``source`` and ``destination`` take city names.
+
+    Both are foreign keys to City, which django-filter would turn into id
+    choices. Names match case- and whitespace-insensitively, as City does.
+    """
+    source = django_filters.CharFilter(method='filter_city')
+    destination = django_filters.CharFilter(method='filter_city')
+
+    class Meta:
+        model = TravelOption
+        fields = ['type', 'source', 'destination', 'departure_date']
+
+    def filter_city(self, queryset, name, value):
+        return queryset.filter(**{f'{name}__name__iexact': City.normalize_name(value)})
@@ -0,0 +1,139 @@
+"""Idempotency-Key support for POST endpoints that create bookings.
+
+The first request with a given key claims it (a unique row per user and
+key) before running; its response is stored compressed and replayed to
+every retry with the same key until it expires, without running the view
+again. A duplicate arriving while the first attempt is still in flight
+polls until that attempt stores its response.
+
+Only responses the view returns (status < 500) are stored. Exceptions,
+such as validation errors or a sold-out 409, have no side effects and
+release the key, so a retry runs normally.
+"""
+import hashlib
+import json
+import time
+import zlib
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+from .models import IdempotencyKey
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+MAX_KEY_LENGTH = 255
+POLL_INTERVAL = 0.05
+
+
+def request_hash(request):
+    """Fingerprint of what the key was first used for; reuse with another payload is an error"""
+    raw = json.dumps([request.method, request.path, request.data], sort_keys=True, cls=JSONEncoder)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def claim(user, key, fingerprint):
+    """Claim ``key`` for this attempt, or wait for the attempt that holds it.
+
+    Returns ``(record, None)`` when this attempt owns the key and must run
+    the view, else ``(None, response)`` with the replayed (or error)
+    response.
+    """
+    config = settings.IDEMPOTENCY
+    deadline = time.monotonic() + config['WAIT_TIMEOUT']
+    while True:
+        now = timezone.now()
+        expires_at = now + timedelta(seconds=config['TTL_SECONDS'])
+        # Read first: replays are the common case and cost this one query
+        record = IdempotencyKey.objects.filter(user=user, key=key).first()
+        if record is None:
+            try:
+                with transaction.atomic():
+                    record = IdempotencyKey.objects.create(
+                        user=user, key=key, request_hash=fingerprint, claimed_at=now, expires_at=expires_at
+                    )
+                return record, None
+            except IntegrityError:
+                # A concurrent duplicate claimed it first
+                continue
+        abandoned = (
+            record.status_code is None
+            and record.claimed_at <= now - timedelta(seconds=config['LOCK_TIMEOUT'])
+        )
+        if record.expires_at <= now or abandoned:
+            # Take over an expired key or a crashed attempt; the claim stamp
+            # makes sure only one waiter wins
+            taken = IdempotencyKey.objects.filter(pk=record.pk, claimed_at=record.claimed_at).update(
+                request_hash=fingerprint, status_code=None, response_body=None,
+                claimed_at=now, expires_at=expires_at
+            )
+            if taken:
+                record.request_hash, record.status_code, record.response_body = fingerprint, None, None
+                record.claimed_at, record.expires_at = now, expires_at
+                return record, None
+            continue
+
+        if record.request_hash != fingerprint:
+            return None, Response({
+                'error': f'{IDEMPOTENCY_HEADER} was already used for a different request'
+            }, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+        if record.status_code is not None:
+            return None, replay(record)
+        if time.monotonic() >= deadline:
+            return None, Response({
+                'error': 'A request with this Idempotency-Key is still in progress. Retry later.'
+            }, status=status.HTTP_409_CONFLICT, headers={'Retry-After': '1'})
+        time.sleep(POLL_INTERVAL)
+
+
+def replay(record):
+    data = json.loads(zlib.decompress(bytes(record.response_body)))
+    return Response(data, status=record.status_code, headers={REPLAYED_HEADER: 'true'})
+
+
+def store(record, response):
+    body = zlib.compress(json.dumps(response.data, cls=JSONEncoder, separators=(',', ':')).encode())
+    IdempotencyKey.objects.filter(pk=record.pk, claimed_at=record.claimed_at).update(
+        status_code=response.status_code, response_body=body
+    )
+
+
+def release(record):
+    IdempotencyKey.objects.filter(pk=record.pk, claimed_at=record.claimed_at).delete()
+
+
+def idempotent_response(request, handler):
+    """Run ``handler()`` at most once per Idempotency-Key and replay its response"""
+    key = request.headers.get(IDEMPOTENCY_HEADER)
+    if not key:
+        return handler()
+    if len(key) > MAX_KEY_LENGTH:
+        return Response({
+            'error': f'{IDEMPOTENCY_HEADER} must be at most {MAX_KEY_LENGTH} characters'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    record, response = claim(request.user, key, request_hash(request))
+    if response is not None:
+        return response
+    try:
+        response = handler()
+    except BaseException:
+        release(record)
+        raise
+    if response.status_code < 500:
+        store(record, response)
+    else:
+        release(record)
+    return response
+
+
+class IdempotentCreateMixin:
+    """Honour the Idempotency-Key header on a generic view's create()"""
+
+    def create(self, request, *args, **kwargs):
+        return idempotent_response(request, lambda: super(IdempotentCreateMixin, self).create(request, *args, **kwargs))
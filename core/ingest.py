@@ -0,0 +1,219 @@
+import csv
+import io
+import json
+import time
+from datetime import date, datetime, time as dt_time
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import City, RouteDayFare, TravelOption, group_by_route, route_lookups
+from .search_cache import search_cache
+
+UPDATE_FIELDS = [
+    'type', 'arrival_date', 'arrival_time', 'arrival_at', 'duration',
+    'price', 'total_seats', 'available_seats', 'updated_at',
+]
+
+MAX_REPORTED_ERRORS = 50
+
+
+class TimetableRowError(ValueError):
+    pass
+
+
+def iter_timetable_records(stream, fmt):
+    """Yield one dict per timetable row from a text stream, lazily"""
+    if fmt == 'csv':
+        yield from csv.DictReader(stream)
+    elif fmt == 'jsonl':
+        for line in stream:
+            line = line.strip()
+            if line:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError as e:
+                    yield TimetableRowError(f"Invalid JSON: {e}")
+    else:
+        raise ValueError(f"Unsupported timetable format: {fmt}")
+
+
+def detect_format(name):
+    return 'jsonl' if str(name).lower().endswith(('.jsonl', '.ndjson', '.json')) else 'csv'
+
+
+def open_text(binary_stream):
+    return io.TextIOWrapper(binary_stream, encoding='utf-8-sig', newline='')
+
+
+class TimetableImporter:
+    """Upsert operator timetables into TravelOption in constant memory.
+
+    Records are consumed in chunks of ``chunk_size``. For each chunk the
+    duration and departure/arrival timestamps are computed in the loader
+    (no per-row save()), existing options are matched on
+    (operator, source, destination, departure) with a query per
+    ROUTE_LOOKUP_BATCH routes, and the chunk is written with one bulk
+    insert plus one primary-key upsert in a transaction. Seats already
+    booked on an existing option are kept: its row is locked while its
+    available seats become the new total minus the booked count.
+    """
+
+    def __init__(self, chunk_size=2000, progress=None):
+        self.chunk_size = chunk_size
+        self.progress = progress
+        self.cities = {}
+        self.tz = timezone.get_default_timezone()
+        self.stats = {'rows': 0, 'created': 0, 'updated': 0, 'skipped': 0, 'errors': []}
+
+    def run(self, records):
+        started = time.perf_counter()
+        records = iter(records)
+        seen = 0
+        while True:
+            chunk = list(islice(records, self.chunk_size))
+            if not chunk:
+                break
+            options = []
+            for record in chunk:
+                seen += 1
+                try:
+                    options.append(self.build_option(record))
+                except TimetableRowError as e:
+                    self.stats['skipped'] += 1
+                    if len(self.stats['errors']) < MAX_REPORTED_ERRORS:
+                        self.stats['errors'].append(f"Record {seen}: {e}")
+            self.stats['rows'] += len(chunk)
+            self.write_chunk(options)
+            if self.progress:
+                self.progress(self.report(time.perf_counter() - started))
+        return self.report(time.perf_counter() - started)
+
+    def report(self, elapsed):
+        return {
+            **self.stats,
+            'seconds': round(elapsed, 3),
+            'rows_per_second': round(self.stats['rows'] / elapsed, 1) if elapsed else 0.0,
+        }
+
+    def city(self, name):
+        if not isinstance(name, str) or not name.strip():
+            raise TimetableRowError("Source and destination are required.")
+        key = ' '.join(name.split()).casefold()
+        if key not in self.cities:
+            self.cities[key] = City.get_or_create_by_name(name).city_id
+        return self.cities[key]
+
+    def build_option(self, record):
+        if isinstance(record, TimetableRowError):
+            raise record
+        if not isinstance(record, dict):
+            raise TimetableRowError("Row must be an object.")
+        try:
+            travel_type = str(record['type']).strip().lower()
+            operator_name = str(record['operator_name']).strip()
+            departure_date = parse_value(date, record['departure_date'])
+            departure_time = parse_value(dt_time, record['departure_time'])
+            arrival_date = parse_value(date, record['arrival_date'])
+            arrival_time = parse_value(dt_time, record['arrival_time'])
+            price = Decimal(str(record['price']))
+            total_seats = int(record['total_seats'])
+            available_seats = record.get('available_seats')
+            available_seats = total_seats if available_seats in (None, '') else int(available_seats)
+        except KeyError as e:
+            raise TimetableRowError(f"Missing field {e}.")
+        except (TypeError, ValueError, InvalidOperation) as e:
+            raise TimetableRowError(str(e))
+
+        if travel_type not in dict(TravelOption.TRAVEL_TYPE_CHOICES):
+            raise TimetableRowError(f"Unknown travel type '{travel_type}'.")
+        if not operator_name:
+            raise TimetableRowError("Operator name is required.")
+        if not 0 <= available_seats <= total_seats:
+            raise TimetableRowError("Available seats must be between 0 and total seats.")
+
+        departure = datetime.combine(departure_date, departure_time)
+        arrival = datetime.combine(arrival_date, arrival_time)
+        if departure >= arrival:
+            raise TimetableRowError("Departure must be before arrival.")
+
+        return TravelOption(
+            type=travel_type,
+            operator_name=operator_name,
+            source_id=self.city(record.get('source')),
+            destination_id=self.city(record.get('destination')),
+            departure_date=departure_date,
+            departure_time=departure_time,
+            arrival_date=arrival_date,
+            arrival_time=arrival_time,
+            duration=arrival - departure,
+            departure_at=timezone.make_aware(departure, timezone=self.tz),
+            arrival_at=timezone.make_aware(arrival, timezone=self.tz),
+            price=price,
+            total_seats=total_seats,
+            available_seats=available_seats,
+        )
+
+    @staticmethod
+    def key(option):
+        return (option.operator_name, option.source_id, option.destination_id, option.departure_at)
+
+    def write_chunk(self, options):
+        if not options:
+            return
+        # Later rows for the same key win within a chunk
+        by_key = {self.key(option): option for option in options}
+
+        routes = group_by_route(key[1:] for key in by_key)
+
+        to_create, to_update = [], []
+        with transaction.atomic():
+            # Lock the matched rows (in key order, against deadlocks) until the
+            # upsert: a booking committed in between would be overwritten
+            # by the available seats computed here and oversell the option
+            existing = {
+                (row['operator_name'], row['source_id'], row['destination_id'], row['departure_at']): row
+                for lookup in route_lookups(routes, 'departure_at')
+                for row in TravelOption.objects.filter(lookup).select_for_update().order_by('travel_id').values(
+                    'travel_id', 'operator_name', 'source_id', 'destination_id',
+                    'departure_at', 'total_seats', 'available_seats'
+                )
+            }
+            for key, option in by_key.items():
+                row = existing.get(key)
+                if row is None:
+                    to_create.append(option)
+                    continue
+                booked = row['total_seats'] - row['available_seats']
+                option.travel_id = row['travel_id']
+                option.available_seats = max(option.total_seats - booked, 0)
+                to_update.append(option)
+
+            TravelOption.objects.bulk_create(to_create, batch_size=self.chunk_size)
+            # Upsert matched rows on their primary key (INSERT ... ON CONFLICT /
+            # ON DUPLICATE KEY UPDATE); far cheaper than bulk_update's CASE chains
+            TravelOption.objects.bulk_create(
+                to_update,
+                batch_size=self.chunk_size,
+                update_conflicts=True,
+                unique_fields=['travel_id'] if connection.features.supports_update_conflicts_with_target else None,
+                update_fields=UPDATE_FIELDS,
+            )
+            # Bulk writes bypass save(), so invalidate cached searches and
+            # refresh the fare calendar cells here
+            for source_id, destination_id in routes:
+                search_cache.bump_route_on_commit(source_id, destination_id)
+            RouteDayFare.refresh_on_commit(
+                (option.source_id, option.destination_id, option.departure_date) for option in by_key.values()
+            )
+
+        self.stats['created'] += len(to_create)
+        self.stats['updated'] += len(to_update)
+
+
+def parse_value(kind, value):
+    if isinstance(value, kind) and not (kind is date and isinstance(value, datetime)):
+        return value
+    return kind.fromisoformat(str(value).strip())
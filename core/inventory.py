@@ -0,0 +1,275 @@
+"""Columnar in-memory index of upcoming TravelOption rows for route search.
+
+The next HORIZON_DAYS of inventory is small enough to keep in memory as
+NumPy arrays (type, source, destination, departure, price, seats), sorted
+by (departure_at, travel_id) like the search results. A search bisects the
+departure column for its date window, filters the slice with vectorized
+masks and reads its page of rows from the snapshot, without a query.
+
+The snapshot follows the database like ConnectionGraph: rows whose
+``updated_at`` moved are merged every REFRESH_INTERVAL seconds, and a full
+rebuild every REBUILD_INTERVAL seconds drops rows deleted by other
+processes. Anything the snapshot cannot answer exactly falls back to SQL:
+searches reaching past the horizon (unless the page fills before it), or
+an inventory larger than MAX_ROWS.
+"""
+import sys
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import ROUND_CEILING, ROUND_FLOOR
+
+import numpy as np
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models.signals import post_delete
+from django.utils import timezone
+
+from .models import TravelOption
+from .serializers import TRAVEL_OPTION_ROW_FIELDS
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+ONE_MICROSECOND = timedelta(microseconds=1)
+
+# Rows committed shortly after a refresh can carry an earlier updated_at
+# stamp; re-reading this much overlap picks them up (merging is idempotent)
+REFRESH_OVERLAP = timedelta(seconds=2)
+
+LOAD_FIELDS = TRAVEL_OPTION_ROW_FIELDS + ('source_id', 'destination_id')
+FIELD_INDEX = {field: i for i, field in enumerate(LOAD_FIELDS)}
+TYPE_CODES = {choice: code for code, (choice, _) in enumerate(TravelOption.TRAVEL_TYPE_CHOICES)}
+
+
+def micros(value):
+    return (value - EPOCH) // ONE_MICROSECOND
+
+
+def cents(value, rounding):
+    return int((value * 100).to_integral_value(rounding))
+
+
+class InventorySnapshot:
+    """Immutable column arrays plus the full rows, sorted by (departure_at, travel_id)"""
+
+    def __init__(self, rows, columns, horizon_end):
+        self.horizon_end = horizon_end
+        order = np.lexsort((columns['ids'], columns['departures']))
+        self.rows = [rows[i] for i in order.tolist()]
+        for name, values in columns.items():
+            setattr(self, name, values[order])
+
+    @staticmethod
+    def columns(rows):
+        def column(field, dtype, convert=None):
+            i = FIELD_INDEX[field]
+            values = (row[i] for row in rows) if convert is None else (convert(row[i]) for row in rows)
+            return np.fromiter(values, dtype=dtype, count=len(rows))
+
+        return {
+            'ids': column('travel_id', np.int64),
+            'types': column('type', np.int8, lambda value: TYPE_CODES.get(value, -1)),
+            'sources': column('source_id', np.int64),
+            'destinations': column('destination_id', np.int64),
+            'departures': column('departure_at', np.int64, micros),
+            'prices': column('price', np.int64, lambda value: cents(value, ROUND_CEILING)),
+            'seats': column('available_seats', np.int64),
+        }
+
+    @classmethod
+    def build(cls, rows, horizon_end):
+        rows = list(rows)
+        return cls(rows, cls.columns(rows), horizon_end)
+
+    def merge(self, changed):
+        """A new snapshot with ``changed`` rows replacing (or adding to) these"""
+        departure = FIELD_INDEX['departure_at']
+        keep = ~np.isin(self.ids, [row[0] for row in changed])
+        # Rows moved past the horizon only leave the snapshot
+        added = [row for row in changed if row[departure] < self.horizon_end]
+        kept = np.flatnonzero(keep).tolist()
+        rows = [self.rows[i] for i in kept] + added
+        new = self.columns(added)
+        columns = {
+            name: np.concatenate((getattr(self, name)[keep], new[name]))
+            for name in new
+        }
+        return InventorySnapshot(rows, columns, self.horizon_end)
+
+    def __len__(self):
+        return len(self.rows)
+
+
+class IndexMatches:
+    """Matching rows in result order, materialized as .values() dicts on access.
+
+    ``complete`` is False when the search reaches past the snapshot's
+    horizon, so more matching rows may exist after the last one here.
+    """
+
+    def __init__(self, snapshot, positions, complete):
+        self.snapshot = snapshot
+        self.positions = positions
+        self.complete = complete
+
+    def __len__(self):
+        return len(self.positions)
+
+    def __getitem__(self, index):
+        rows = self.snapshot.rows
+        if isinstance(index, slice):
+            return [dict(zip(LOAD_FIELDS, rows[i])) for i in self.positions[index].tolist()]
+        return dict(zip(LOAD_FIELDS, rows[int(self.positions[index])]))
+
+
+class InventoryIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._configured = False
+        self._snapshot = None
+        self._watermark = None
+        self._refreshed_at = None
+        self._rebuilt_at = None
+
+    def _ensure_configured(self):
+        with self._lock:
+            if self._configured:
+                return
+            config = getattr(settings, 'INVENTORY_INDEX', {})
+            self.enabled = config.get('ENABLED', True)
+            self.horizon_days = config.get('HORIZON_DAYS', 30)
+            self.refresh_interval = config.get('REFRESH_INTERVAL', 5)
+            self.rebuild_interval = config.get('REBUILD_INTERVAL', 600)
+            self.max_rows = config.get('MAX_ROWS', 200000)
+            self._configured = True
+
+    @property
+    def available(self):
+        if not self._configured:
+            self._ensure_configured()
+        return self.enabled
+
+    def _load(self, **filters):
+        # Always the primary: a lagging replica would slip rows past the watermark
+        rows = TravelOption.objects.using(DEFAULT_DB_ALIAS).filter(**filters).values_list(*LOAD_FIELDS)
+        intern = sys.intern
+        name_fields = [FIELD_INDEX[field] for field in ('type', 'operator_name', 'source__name', 'destination__name')]
+        for row in rows.iterator(chunk_size=5000):
+            # Cities and operators repeat across thousands of rows; share the strings
+            row = list(row)
+            for i in name_fields:
+                row[i] = intern(row[i])
+            yield tuple(row)
+
+    def rebuild(self):
+        started = timezone.now()
+        horizon_end = started + timedelta(days=self.horizon_days)
+        count = TravelOption.objects.using(DEFAULT_DB_ALIAS).filter(
+            departure_at__gte=started, departure_at__lt=horizon_end
+        ).count()
+        if count > self.max_rows:
+            # Too large to hold; serve from SQL until the next rebuild
+            snapshot = None
+        else:
+            snapshot = InventorySnapshot.build(
+                self._load(departure_at__gte=started, departure_at__lt=horizon_end), horizon_end
+            )
+        self._snapshot = snapshot
+        self._watermark = started - REFRESH_OVERLAP
+        self._rebuilt_at = self._refreshed_at = time.monotonic()
+
+    def refresh(self):
+        """Merge rows changed since the last refresh (seats, prices, times)"""
+        started = timezone.now()
+        snapshot = self._snapshot
+        if snapshot is not None:
+            # No departure filter: rows moved out of the horizon must leave it
+            changed = list(self._load(updated_at__gte=self._watermark))
+            if changed:
+                self._snapshot = snapshot.merge(changed)
+        self._watermark = started - REFRESH_OVERLAP
+        self._refreshed_at = time.monotonic()
+
+    def ensure_fresh(self):
+        if not self.available:
+            return
+        refreshed_at = self._refreshed_at
+        if refreshed_at is not None and time.monotonic() - refreshed_at < self.refresh_interval:
+            return
+        with self._lock:
+            # invalidate() does not take the lock; read each stamp once
+            now = time.monotonic()
+            rebuilt_at, refreshed_at = self._rebuilt_at, self._refreshed_at
+            if rebuilt_at is None or refreshed_at is None or now - rebuilt_at >= self.rebuild_interval:
+                self.rebuild()
+            elif now - refreshed_at >= self.refresh_interval:
+                self.refresh()
+
+    async def aensure_fresh(self):
+        """ensure_fresh() from async code, off the event loop when it has to query"""
+        if not self.available:
+            return
+        refreshed_at = self._refreshed_at
+        if refreshed_at is None or time.monotonic() - refreshed_at >= self.refresh_interval:
+            await sync_to_async(self.ensure_fresh)()
+
+    def invalidate(self):
+        """Rebuild on next use (after local deletes)"""
+        self._rebuilt_at = None
+        self._refreshed_at = None
+
+    def reset(self):
+        """Drop the snapshot and configuration (tests and configuration changes)"""
+        with self._lock:
+            self._configured = False
+            self._snapshot = None
+            self._rebuilt_at = self._refreshed_at = None
+
+    def search(self, travel_type=None, source_ids=None, destination_ids=None, departure_from=None,
+               departure_before=None, min_price=None, max_price=None, after=None):
+        """Upcoming options with seats left matching the filters, as IndexMatches.
+
+        Bounds are aware datetimes (``departure_before`` exclusive) and
+        Decimal prices; ``after`` is a (departure_at, travel_id) keyset
+        position. Returns None when there is no snapshot to search.
+        Call ensure_fresh() first.
+        """
+        snapshot = self._snapshot
+        if not self.available or snapshot is None:
+            return None
+        start = micros(timezone.now())
+        if departure_from is not None:
+            start = max(start, micros(departure_from))
+        if after is not None:
+            start = max(start, micros(after[0]))
+        complete = departure_before is not None and departure_before <= snapshot.horizon_end
+        end = micros(departure_before) if departure_before is not None else None
+
+        departures = snapshot.departures
+        lo = int(np.searchsorted(departures, start, side='left'))
+        hi = int(np.searchsorted(departures, end, side='left')) if end is not None else len(departures)
+        mask = snapshot.seats[lo:hi] > 0
+        if travel_type is not None:
+            mask &= snapshot.types[lo:hi] == TYPE_CODES.get(travel_type, -1)
+        if source_ids is not None:
+            mask &= np.isin(snapshot.sources[lo:hi], source_ids)
+        if destination_ids is not None:
+            mask &= np.isin(snapshot.destinations[lo:hi], destination_ids)
+        if min_price is not None:
+            mask &= snapshot.prices[lo:hi] >= cents(min_price, ROUND_CEILING)
+        if max_price is not None:
+            mask &= snapshot.prices[lo:hi] <= cents(max_price, ROUND_FLOOR)
+        if after is not None:
+            position = micros(after[0])
+            mask &= (departures[lo:hi] > position) | (snapshot.ids[lo:hi] > after[1])
+        return IndexMatches(snapshot, np.flatnonzero(mask) + lo, complete)
+
+
+inventory_index = InventoryIndex()
+
+
+def invalidate_on_delete(sender, instance, **kwargs):
+    inventory_index.invalidate()
+
+
+post_delete.connect(invalidate_on_delete, sender=TravelOption)
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from core.assets import brotli, build
+
+
+class Command(BaseCommand):
+    help = "Minify, bundle, hash and precompress ASSETS['BUNDLES'] and report the transfer sizes"
+
+    def handle(self, *args, **options):
+        reports = build()
+        compressed = 'brotli' if brotli is not None else 'gzip'
+        self.stdout.write(f"{'bundle':<20} {'source':>10} {'minified':>10} {'gzip':>10} {'brotli':>10}")
+        for report in reports:
+            brotli_size = report['brotli'] if report['brotli'] is not None else '-'
+            self.stdout.write(
+                f"{report['name']:<20} {report['original']:>10} {report['minified']:>10} "
+                f"{report['gzip']:>10} {brotli_size:>10}"
+            )
+        before = sum(report['original'] for report in reports)
+        after = sum(report[compressed] for report in reports)
+        self.stdout.write(self.style.SUCCESS(
+            f"Transfer size: {before} bytes as source, {after} bytes built ({compressed}), "
+            f"{100 * (1 - after / before):.1f}% smaller."
+        ))
@@ -0,0 +1,41 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from core.export import EXPORT_FORMATS, export_queryset, iter_export_lines
+
+
+class Command(BaseCommand):
+    help = "Stream bookings to CSV or NDJSON, one row per passenger"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', default='-', help="Output file, or '-' for stdout (default)")
+        parser.add_argument('--format', choices=list(EXPORT_FORMATS), help="Defaults to the file extension, else csv")
+        parser.add_argument('--user', help="Only export this username's bookings")
+        parser.add_argument('--status', choices=['pending', 'confirmed', 'cancelled'])
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or ('ndjson' if path.lower().endswith(('.ndjson', '.jsonl')) else 'csv')
+        if options['chunk_size'] <= 0:
+            raise CommandError("--chunk-size must be positive.")
+
+        user = None
+        if options['user']:
+            try:
+                user = User.objects.get(username=options['user'])
+            except User.DoesNotExist:
+                raise CommandError(f"User '{options['user']}' does not exist.")
+
+        lines = iter_export_lines(
+            export_queryset(user=user, status=options['status']), fmt, chunk_size=options['chunk_size']
+        )
+        try:
+            if path == '-':
+                for line in lines:
+                    self.stdout.write(line, ending='')
+            else:
+                with open(path, 'w', encoding='utf-8', newline='') as f:
+                    f.writelines(lines)
+        except OSError as e:
+            raise CommandError(str(e))
@@ -0,0 +1,44 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.ingest import TimetableImporter, detect_format, iter_timetable_records, open_text
+
+
+class Command(BaseCommand):
+    help = "Stream a CSV or JSONL operator timetable into TravelOption (bulk upsert)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Timetable file, or '-' to read from stdin")
+        parser.add_argument('--format', choices=['csv', 'jsonl'], help="Defaults to the file extension")
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or ('csv' if path == '-' else detect_format(path))
+        if options['chunk_size'] <= 0:
+            raise CommandError("--chunk-size must be positive.")
+
+        def progress(report):
+            self.stdout.write(
+                f"{report['rows']} rows ({report['created']} created, {report['updated']} updated, "
+                f"{report['skipped']} skipped) - {report['rows_per_second']:.0f} rows/sec"
+            )
+
+        importer = TimetableImporter(chunk_size=options['chunk_size'], progress=progress)
+        try:
+            if path == '-':
+                report = importer.run(iter_timetable_records(open_text(sys.stdin.buffer), fmt))
+            else:
+                with open(path, 'rb') as f:
+                    report = importer.run(iter_timetable_records(open_text(f), fmt))
+        except OSError as e:
+            raise CommandError(str(e))
+
+        for error in report['errors']:
+            self.stderr.write(error)
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {report['rows']} rows in {report['seconds']}s "
+            f"({report['rows_per_second']:.0f} rows/sec): {report['created']} created, "
+            f"{report['updated']} updated, {report['skipped']} skipped"
+        ))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from core.models import RouteDayFare
+
+
+class Command(BaseCommand):
+    help = "Recompute the RouteDayFare fare calendar from TravelOption"
+
+    def handle(self, *args, **options):
+        RouteDayFare.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {RouteDayFare.objects.count()} fare calendar cells."))
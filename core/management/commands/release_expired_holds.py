@@ -0,0 +1,35 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from core.models import Booking
+
+
+class Command(BaseCommand):
+    help = "Cancel expired seat holds and return their seats, once or continuously"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.SEAT_HOLDS['SWEEP_BATCH_SIZE'])
+        parser.add_argument('--loop', action='store_true', help="Keep sweeping as a background worker")
+        parser.add_argument('--interval', type=float, default=settings.SEAT_HOLDS['SWEEP_INTERVAL'],
+                            help="Seconds between sweeps with --loop")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        if batch_size <= 0:
+            raise CommandError("--batch-size must be positive.")
+
+        if not options['loop']:
+            released = Booking.release_expired_holds(batch_size=batch_size)
+            self.stdout.write(self.style.SUCCESS(f"Released {released} expired seat holds."))
+            return
+
+        while True:
+            started = time.monotonic()
+            close_old_connections()
+            released = Booking.release_expired_holds(batch_size=batch_size)
+            if released:
+                self.stdout.write(f"Released {released} expired seat holds.")
+            time.sleep(max(0.0, options['interval'] - (time.monotonic() - started)))
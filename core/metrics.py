@@ -0,0 +1,332 @@
+import glob
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# (name, type, help) in exposition order
+METRICS = (
+    ('travel_http_requests_total', 'counter', 'Requests served, by URL name, method and status'),
+    ('travel_http_request_duration_seconds', 'histogram', 'Request latency, by URL name and method'),
+    ('travel_db_queries_total', 'counter', 'Database queries executed while serving requests'),
+    ('travel_db_query_duration_seconds_total', 'counter', 'Time spent in database queries'),
+    ('travel_serializer_duration_seconds_total', 'counter', 'Time spent turning rows and models into response data'),
+    ('travel_http_response_bytes_total', 'counter', 'Response body bytes sent'),
+    ('travel_admission_requests_total', 'counter', 'Booking writes admitted or rejected, by URL name and outcome'),
+    ('travel_admission_writes_in_flight', 'gauge', 'Booking writes currently running'),
+    ('travel_admission_buckets', 'gauge', 'Token buckets held in process memory'),
+)
+
+GAUGES = frozenset(name for name, kind, _ in METRICS if kind == 'gauge')
+
+_current = ContextVar('request_metrics', default=None)
+
+
+class RequestStats:
+    __slots__ = ('queries', 'db_seconds', 'serializer_seconds', 'serializing')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.serializer_seconds = 0.0
+        self.serializing = False
+
+
+class MetricsRegistry:
+    """In-process metric aggregation with optional multi-process export.
+
+    Samples are plain floats in a dict keyed by (metric, labels), updated
+    under one lock, so recording a request costs a few dict operations.
+
+    With ``multiprocess_dir`` set (gunicorn-style pre-fork workers), each
+    process periodically writes its own snapshot to ``metrics-<pid>.json``
+    in that directory with an atomic rename, and the exposition sums the
+    snapshots of every process. Files of exited workers are kept so
+    counters never go backwards; mark_process_dead() drops their gauges.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._samples = {}
+        self._configured = False
+        self._flushed_at = 0.0
+
+    def configure(self):
+        config = getattr(settings, 'METRICS', {})
+        self.enabled = config.get('ENABLED', True)
+        self.multiprocess_dir = config.get('MULTIPROCESS_DIR')
+        self.flush_interval = config.get('FLUSH_INTERVAL', 5)
+        self._configured = True
+
+    def _ensure_configured(self):
+        if not self._configured:
+            self.configure()
+
+    def inc(self, name, labels, value=1.0):
+        key = (name, labels)
+        with self._lock:
+            self._samples[key] = self._samples.get(key, 0.0) + value
+
+    def set(self, name, labels, value):
+        with self._lock:
+            self._samples[(name, labels)] = float(value)
+
+    def observe(self, name, labels, value):
+        """Histogram observation, stored as cumulative bucket counters"""
+        with self._lock:
+            # Every bucket is written so a series always exposes the full set
+            for bound in LATENCY_BUCKETS:
+                key = (name + '_bucket', labels + (('le', repr(bound)),))
+                self._samples[key] = self._samples.get(key, 0.0) + (value <= bound)
+            for key, amount in (
+                ((name + '_bucket', labels + (('le', '+Inf'),)), 1),
+                ((name + '_count', labels), 1),
+                ((name + '_sum', labels), value),
+            ):
+                self._samples[key] = self._samples.get(key, 0.0) + amount
+
+    def record_request(self, view, method, status, seconds, stats, response_bytes):
+        self._ensure_configured()
+        if not self.enabled:
+            return
+        view_label = (('view', view),)
+        self.inc('travel_http_requests_total', view_label + (('method', method), ('status', str(status))))
+        self.observe('travel_http_request_duration_seconds', view_label + (('method', method),), seconds)
+        self.inc('travel_db_queries_total', view_label, stats.queries)
+        self.inc('travel_db_query_duration_seconds_total', view_label, stats.db_seconds)
+        self.inc('travel_serializer_duration_seconds_total', view_label, stats.serializer_seconds)
+        if response_bytes is not None:
+            self.inc('travel_http_response_bytes_total', view_label, response_bytes)
+        if self.multiprocess_dir and time.monotonic() - self._flushed_at >= self.flush_interval:
+            self.flush()
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._samples)
+
+    def flush(self):
+        """Write this process's samples to the multi-process directory"""
+        self._flushed_at = time.monotonic()
+        rows = [[name, list(labels), value] for (name, labels), value in self.snapshot().items()]
+        write_json(self.multiprocess_dir, f'metrics-{os.getpid()}.json', rows)
+
+    def collect(self):
+        """Samples of this process, or of every process in multi-process mode"""
+        self._ensure_configured()
+        if not self.multiprocess_dir:
+            return self.snapshot()
+        self.flush()
+        merged = {}
+        for path in glob.glob(os.path.join(self.multiprocess_dir, 'metrics-*.json')):
+            rows = read_json(path)
+            if rows is None:
+                continue
+            for name, labels, value in rows:
+                key = (name, tuple(tuple(pair) for pair in labels))
+                merged[key] = merged.get(key, 0.0) + value
+        return merged
+
+    def exposition(self):
+        """Prometheus text format (version 0.0.4)"""
+        by_name = {}
+        for (name, labels), value in self.collect().items():
+            by_name.setdefault(name, []).append((labels, value))
+        lines = []
+        for name, kind, help_text in METRICS:
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            names = (name + '_bucket', name + '_count', name + '_sum') if kind == 'histogram' else (name,)
+            for sample_name in names:
+                for labels, value in sorted(by_name.get(sample_name, []), key=sample_order):
+                    label_text = ','.join(f'{k}="{escape(v)}"' for k, v in labels)
+                    series = f'{sample_name}{{{label_text}}}' if label_text else sample_name
+                    lines.append(f'{series} {value!r}')
+        return '\n'.join(lines) + '\n'
+
+
+def read_json(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_json(directory, filename, data):
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.metrics-')
+    with os.fdopen(fd, 'w') as f:
+        json.dump(data, f)
+    os.replace(tmp_path, os.path.join(directory, filename))
+
+
+def mark_process_dead(pid, directory=None):
+    """Drop an exited worker's gauges from the exposition; its counters stay.
+
+    Call it from the process manager once the worker is gone, e.g. from
+    gunicorn's ``child_exit(server, worker)`` hook with ``worker.pid``.
+    The file is rewritten in place, so a scrape never sees it missing.
+    """
+    directory = directory or settings.METRICS['MULTIPROCESS_DIR']
+    filename = f'metrics-{pid}.json'
+    rows = read_json(os.path.join(directory, filename))
+    if rows is not None:
+        write_json(directory, filename, [row for row in rows if row[0] not in GAUGES])
+
+
+def sample_order(sample):
+    # Group by series, then buckets in increasing "le" order
+    labels = sample[0]
+    series = tuple(pair for pair in labels if pair[0] != 'le')
+    le = dict(labels).get('le')
+    return series, float(le) if le is not None else 0.0
+
+
+def escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+registry = MetricsRegistry()
+
+
+def record_query(execute, sql, params, many, context):
+    """Execute wrapper counting queries and DB time for the current request"""
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries += 1
+        stats.db_seconds += time.perf_counter() - started
+
+
+def install_query_wrapper(sender, connection, **kwargs):
+    # Installed once per connection; it only records while a request's
+    # stats are active in the current context (threads and async tasks alike)
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+connection_created.connect(install_query_wrapper)
+
+
+@contextmanager
+def serializer_timer():
+    """Count time spent building response data; nested timers count once"""
+    stats = _current.get()
+    if stats is None or stats.serializing:
+        yield
+        return
+    stats.serializing = True
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats.serializer_seconds += time.perf_counter() - started
+        stats.serializing = False
+
+
+class TimedSerializerMixin:
+    """Serializer mixin adding to_representation() time to the request metrics"""
+
+    def to_representation(self, instance):
+        with serializer_timer():
+            return super().to_representation(instance)
+
+
+class MetricsMiddleware:
+    """Record latency, DB, serializer and size metrics per URL name"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        # Connections opened before the signal handler was connected
+        for connection in connections.all(initialized_only=True):
+            install_query_wrapper(None, connection)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        stats, token, started = self.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, stats, started)
+
+    async def __acall__(self, request):
+        stats, token, started = self.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, stats, started)
+
+    def start(self):
+        stats = RequestStats()
+        return stats, _current.set(stats), time.perf_counter()
+
+    def finish(self, request, response, stats, started):
+        match = getattr(request, 'resolver_match', None)
+        view = (match.view_name or match._func_path) if match else 'unmatched'
+        seconds = time.perf_counter() - started
+        if response.streaming:
+            # Size is only known once the body has been sent
+            count = self.acount_stream if response.is_async else self.count_stream
+            response.streaming_content = count(
+                response.streaming_content, view, request.method, response.status_code, seconds, stats
+            )
+            return response
+        registry.record_request(view, request.method, response.status_code, seconds, stats, len(response.content))
+        return response
+
+    def count_stream(self, content, view, method, status, seconds, stats):
+        # Queries made while the body is generated (e.g. chunked exports)
+        # still belong to this request
+        sent = 0
+        token = _current.set(stats)
+        try:
+            for chunk in content:
+                sent += len(chunk)
+                yield chunk
+        finally:
+            _current.reset(token)
+            registry.record_request(view, method, status, seconds, stats, sent)
+
+    async def acount_stream(self, content, view, method, status, seconds, stats):
+        sent = 0
+        token = _current.set(stats)
+        try:
+            async for chunk in content:
+                sent += len(chunk)
+                yield chunk
+        finally:
+            _current.reset(token)
+            registry.record_request(view, method, status, seconds, stats, sent)
+
+
+def metrics_view(request):
+    """Prometheus scrape endpoint; bearer METRICS['TOKEN'] or a staff session"""
+    token = getattr(settings, 'METRICS', {}).get('TOKEN')
+    authorized = request.user.is_authenticated and request.user.is_staff
+    if token and request.headers.get('Authorization') == f'Bearer {token}':
+        authorized = True
+    if not authorized:
+        return HttpResponse('Forbidden\n', status=403, content_type='text/plain')
+    return HttpResponse(registry.exposition(), content_type='text/plain; version=0.0.4; charset=utf-8')
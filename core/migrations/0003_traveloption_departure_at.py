@@ -0,0 +1,67 @@
+# Generated by Django 5.2.5 on 2026-10-18 10:12
+
+import datetime
+import zoneinfo
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_departure_arrival(apps, schema_editor):
+    TravelOption = apps.get_model('core', 'TravelOption')
+    tz = zoneinfo.ZoneInfo(settings.TIME_ZONE)
+    batch = []
+    for option in TravelOption.objects.only(
+        'departure_date', 'departure_time', 'arrival_date', 'arrival_time'
+    ).iterator(chunk_size=2000):
+        option.departure_at = datetime.datetime.combine(
+            option.departure_date, option.departure_time, tzinfo=tz
+        )
+        option.arrival_at = datetime.datetime.combine(
+            option.arrival_date, option.arrival_time, tzinfo=tz
+        )
+        batch.append(option)
+        if len(batch) >= 2000:
+            TravelOption.objects.bulk_update(batch, ['departure_at', 'arrival_at'])
+            batch = []
+    if batch:
+        TravelOption.objects.bulk_update(batch, ['departure_at', 'arrival_at'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_alter_booking_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='traveloption',
+            name='departure_at',
+            field=models.DateTimeField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='traveloption',
+            name='arrival_at',
+            field=models.DateTimeField(editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_departure_arrival, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='traveloption',
+            name='departure_at',
+            field=models.DateTimeField(db_index=True, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='traveloption',
+            name='arrival_at',
+            field=models.DateTimeField(editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='traveloption',
+            index=models.Index(fields=['source', 'destination', 'departure_at'], name='travel_route_departure_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='traveloption',
+            index=models.Index(fields=['type', 'departure_at'], name='travel_type_departure_idx'),
+        ),
+    ]
@@ -0,0 +1,112 @@
+# Generated by Django 5.2.5 on 2026-10-18 11:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def convert_city_names(apps, schema_editor):
+    City = apps.get_model('core', 'City')
+    TravelOption = apps.get_model('core', 'TravelOption')
+
+    names = set(TravelOption.objects.values_list('source', flat=True))
+    names |= set(TravelOption.objects.values_list('destination', flat=True))
+
+    # Merge case/whitespace variants of the same city into one row
+    cities = {}
+    for raw in sorted(names):
+        name = ' '.join(raw.split())
+        key = name.casefold()
+        if key not in cities:
+            cities[key] = City.objects.create(name=name)
+
+    for raw in names:
+        city = cities[' '.join(raw.split()).casefold()]
+        TravelOption.objects.filter(source=raw).update(source_city=city)
+        TravelOption.objects.filter(destination=raw).update(destination_city=city)
+
+
+def restore_city_names(apps, schema_editor):
+    TravelOption = apps.get_model('core', 'TravelOption')
+    for city in apps.get_model('core', 'City').objects.all():
+        TravelOption.objects.filter(source_city=city).update(source=city.name)
+        TravelOption.objects.filter(destination_city=city).update(destination=city.name)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_traveloption_departure_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='City',
+            fields=[
+                ('city_id', models.AutoField(primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name_plural': 'cities',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='traveloption',
+            name='source_city',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='core.city'),
+        ),
+        migrations.AddField(
+            model_name='traveloption',
+            name='destination_city',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='core.city'),
+        ),
+        # Nullable while converting so the migration can also be reversed
+        migrations.AlterField(
+            model_name='traveloption',
+            name='source',
+            field=models.CharField(max_length=100, null=True),
+        ),
+        migrations.AlterField(
+            model_name='traveloption',
+            name='destination',
+            field=models.CharField(max_length=100, null=True),
+        ),
+        migrations.RunPython(convert_city_names, restore_city_names),
+        migrations.RemoveIndex(
+            model_name='traveloption',
+            name='travel_route_departure_idx',
+        ),
+        migrations.RemoveField(
+            model_name='traveloption',
+            name='source',
+        ),
+        migrations.RemoveField(
+            model_name='traveloption',
+            name='destination',
+        ),
+        migrations.RenameField(
+            model_name='traveloption',
+            old_name='source_city',
+            new_name='source',
+        ),
+        migrations.RenameField(
+            model_name='traveloption',
+            old_name='destination_city',
+            new_name='destination',
+        ),
+        migrations.AlterField(
+            model_name='traveloption',
+            name='source',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='departures', to='core.city'),
+        ),
+        migrations.AlterField(
+            model_name='traveloption',
+            name='destination',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='arrivals', to='core.city'),
+        ),
+        migrations.AddIndex(
+            model_name='traveloption',
+            index=models.Index(fields=['source', 'destination', 'departure_at'], name='travel_route_departure_idx'),
+        ),
+    ]
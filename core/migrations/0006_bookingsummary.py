@@ -0,0 +1,65 @@
+# Generated by Django 5.2.5 on 2026-10-18 05:32
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+
+def backfill_booking_summaries(apps, schema_editor):
+    Booking = apps.get_model('core', 'Booking')
+    BookingSummary = apps.get_model('core', 'BookingSummary')
+    now = timezone.now()
+    rows = Booking.objects.values('user_id').annotate(
+        total=Count('booking_id'),
+        confirmed=Count('booking_id', filter=Q(status='confirmed')),
+        pending=Count('booking_id', filter=Q(status='pending')),
+        cancelled=Count('booking_id', filter=Q(status='cancelled')),
+        spent=Sum('total_price', filter=Q(status='confirmed')),
+    ).order_by()
+    summaries = []
+    for row in rows.iterator(chunk_size=2000):
+        next_booking = Booking.objects.filter(
+            user_id=row['user_id'], status='confirmed', travel_option__departure_at__gte=now
+        ).select_related('travel_option').order_by('travel_option__departure_at').first()
+        summaries.append(BookingSummary(
+            user_id=row['user_id'],
+            total_bookings=row['total'],
+            confirmed_bookings=row['confirmed'],
+            pending_bookings=row['pending'],
+            cancelled_bookings=row['cancelled'],
+            total_spent=row['spent'] or 0,
+            next_booking=next_booking,
+            next_departure_at=next_booking.travel_option.departure_at if next_booking else None,
+        ))
+        if len(summaries) >= 2000:
+            BookingSummary.objects.bulk_create(summaries)
+            summaries = []
+    BookingSummary.objects.bulk_create(summaries)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('core', '0005_booking_user_date_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookingSummary',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='booking_summary', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('total_bookings', models.PositiveIntegerField(default=0)),
+                ('confirmed_bookings', models.PositiveIntegerField(default=0)),
+                ('pending_bookings', models.PositiveIntegerField(default=0)),
+                ('cancelled_bookings', models.PositiveIntegerField(default=0)),
+                ('total_spent', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('next_departure_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('next_booking', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='core.booking')),
+            ],
+        ),
+        migrations.RunPython(backfill_booking_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.5 on 2026-10-18 05:35
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, F, Min, Q, Sum
+from django.db.models.functions import Coalesce
+
+
+def backfill_route_day_fares(apps, schema_editor):
+    TravelOption = apps.get_model('core', 'TravelOption')
+    RouteDayFare = apps.get_model('core', 'RouteDayFare')
+    with_seats = Q(available_seats__gt=0)
+    rows = TravelOption.objects.values('source_id', 'destination_id', 'departure_date').annotate(
+        min_price=Min('price', filter=with_seats),
+        option_count=Count('travel_id', filter=with_seats),
+        seats_left=Coalesce(Sum('available_seats'), 0),
+    ).values(
+        'source_id', 'destination_id', 'min_price', 'option_count', 'seats_left',
+        travel_date=F('departure_date'),
+    ).order_by()
+    batch = []
+    for row in rows.iterator(chunk_size=2000):
+        batch.append(RouteDayFare(**row))
+        if len(batch) >= 2000:
+            RouteDayFare.objects.bulk_create(batch)
+            batch = []
+    RouteDayFare.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_bookingsummary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RouteDayFare',
+            fields=[
+                ('fare_id', models.AutoField(primary_key=True, serialize=False)),
+                ('travel_date', models.DateField()),
+                ('min_price', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('option_count', models.PositiveIntegerField(default=0)),
+                ('seats_left', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('destination', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.city')),
+                ('source', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.city')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('source', 'destination', 'travel_date'), name='route_day_fare_unique')],
+            },
+        ),
+        migrations.RunPython(backfill_route_day_fares, migrations.RunPython.noop),
+    ]
@@ -1,9 +1,45 @@
 from django.db import models
+from django.conf import settings
 from django.contrib.auth.models import User
 from django.utils import timezone
 from django.core.exceptions import ValidationError
-from django.db import transaction
+from django.db import connection, transaction
+from django.db.models import Case, Count, F, Min, Sum, Value, When
+from django.db.models.functions import Coalesce, Least
+from collections import Counter
+from datetime import timedelta
+from itertools import islice
 import uuid
+from .city_index import city_index
+from .search_cache import search_cache
+
+
+class SeatsUnavailable(ValidationError):
+    """Raised when a conditional seat decrement finds too few seats left"""
+    pass
+
+
+# Routes ORed into one lookup; SQLite rejects expression trees over 1000 deep
+ROUTE_LOOKUP_BATCH = 200
+
+
+def route_lookups(routes, date_field, batch_size=ROUTE_LOOKUP_BATCH):
+    """Q objects matching {(source_id, destination_id): dates}, batch_size routes each"""
+    routes = list(routes.items())
+    for start in range(0, len(routes), batch_size):
+        lookup = models.Q()
+        for (source_id, destination_id), dates in routes[start:start + batch_size]:
+            lookup |= models.Q(source_id=source_id, destination_id=destination_id, **{f'{date_field}__in': dates})
+        yield lookup
+
+
+def group_by_route(cells):
+    """{(source_id, destination_id): [dates]} from (source_id, destination_id, date) cells"""
+    routes = {}
+    for source_id, destination_id, day in cells:
+        routes.setdefault((source_id, destination_id), []).append(day)
+    return routes
+
 
 class UserProfile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
@@ -16,6 +52,45 @@ class UserProfile(models.Model):
     def __str__(self):
         return f"{self.user.username} Profile"
 
+class City(models.Model):
+    city_id = models.AutoField(primary_key=True)
+    name = models.CharField(max_length=100, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name_plural = 'cities'
+        ordering = ['name']
+
+    def save(self, *args, **kwargs):
+        self.name = ' '.join(self.name.split())
+        super().save(*args, **kwargs)
+        # Only committed cities may be found by id; until then find_by_name
+        # falls back to the table
+        transaction.on_commit(lambda: city_index.add(self.city_id, self.name))
+
+    @classmethod
+    def find_by_name(cls, name):
+        """The city with this case/whitespace-insensitive name, or None"""
+        city_id = city_index.lookup(name)
+        if city_id is not None:
+            return cls.objects.get(pk=city_id)
+        return cls.objects.filter(name__iexact=cls.normalize_name(name)).first()
+
+    @classmethod
+    def get_or_create_by_name(cls, name):
+        """Find a city by case/whitespace-insensitive name, creating it if new"""
+        city = cls.find_by_name(name)
+        if city is None:
+            city = cls.objects.create(name=cls.normalize_name(name))
+        return city
+
+    @staticmethod
+    def normalize_name(name):
+        return ' '.join(str(name).split())
+
+    def __str__(self):
+        return self.name
+
 class TravelOption(models.Model):
     TRAVEL_TYPE_CHOICES = [
         ('flight', 'Flight'),
@@ -26,19 +101,29 @@ class TravelOption(models.Model):
     travel_id = models.AutoField(primary_key=True)
     type = models.CharField(max_length=10, choices=TRAVEL_TYPE_CHOICES)
     operator_name = models.CharField(max_length=100)
-    source = models.CharField(max_length=100)
-    destination = models.CharField(max_length=100)
+    source = models.ForeignKey(City, on_delete=models.PROTECT, related_name='departures')
+    destination = models.ForeignKey(City, on_delete=models.PROTECT, related_name='arrivals')
     departure_date = models.DateField()
     departure_time = models.TimeField()
     arrival_date = models.DateField()
     arrival_time = models.TimeField()
     duration = models.DurationField(blank=True, null=True)
+    # Denormalized, timezone-aware copies of the date/time pairs above so
+    # "not yet departed" and date-window filters are a single range predicate
+    departure_at = models.DateTimeField(editable=False, db_index=True)
+    arrival_at = models.DateTimeField(editable=False)
     price = models.DecimalField(max_digits=10, decimal_places=2)
     available_seats = models.PositiveIntegerField()
     total_seats = models.PositiveIntegerField()
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['source', 'destination', 'departure_at'], name='travel_route_departure_idx'),
+            models.Index(fields=['type', 'departure_at'], name='travel_type_departure_idx'),
+        ]
+
     def clean(self):
         # Ensure departure is before arrival
         dep_dt = timezone.datetime.combine(self.departure_date, self.departure_time)
@@ -53,28 +138,80 @@ class TravelOption(models.Model):
         dep_dt = timezone.datetime.combine(self.departure_date, self.departure_time)
         arr_dt = timezone.datetime.combine(self.arrival_date, self.arrival_time)
         self.duration = arr_dt - dep_dt
+        # Keep the stored timestamps in sync with the date/time columns
+        tz = timezone.get_default_timezone()
+        self.departure_at = timezone.make_aware(dep_dt, timezone=tz)
+        self.arrival_at = timezone.make_aware(arr_dt, timezone=tz)
+        update_fields = kwargs.get('update_fields')
+        if update_fields:
+            kwargs['update_fields'] = set(update_fields) | {'duration', 'departure_at', 'arrival_at'}
         super().save(*args, **kwargs)
+        self.invalidate_route_caches()
+        # The saved state is now the stored one for later moves
+        self._loaded_route = (self.source_id, self.destination_id)
+        self._loaded_departure_date = self.departure_date
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        self.invalidate_route_caches()
+        return result
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored route and day so a save that moves them also
+        # invalidates searches and fare calendar cells on the old ones
+        instance._loaded_route = (
+            instance.__dict__.get('source_id'),
+            instance.__dict__.get('destination_id'),
+        )
+        instance._loaded_departure_date = instance.__dict__.get('departure_date')
+        return instance
+
+    def invalidate_route_caches(self):
+        """Bump the cached-search version and fare calendar cell of this option's route"""
+        route = (self.source_id, self.destination_id)
+        cells = {(*route, self.departure_date)}
+        search_cache.bump_route_on_commit(*route)
+        loaded_route = getattr(self, '_loaded_route', None)
+        if loaded_route and None not in loaded_route:
+            if loaded_route != route:
+                search_cache.bump_route_on_commit(*loaded_route)
+            loaded_date = getattr(self, '_loaded_departure_date', None)
+            if loaded_date is not None:
+                cells.add((*loaded_route, loaded_date))
+        RouteDayFare.refresh_on_commit(cells)
 
     def reserve_seats(self, number_of_seats):
-        """Reserve seats for a booking"""
-        if self.available_seats >= number_of_seats:
-            self.available_seats -= number_of_seats
-            self.save()
-            return True
-        return False
+        """Reserve seats for a booking.
+
+        Uses a single conditional UPDATE (available_seats >= n) so concurrent
+        reservations can never oversell and no row lock is held beyond the
+        statement itself. Returns False when the seats are sold out.
+        """
+        updated = TravelOption.objects.filter(
+            pk=self.pk,
+            available_seats__gte=number_of_seats
+        ).update(
+            available_seats=F('available_seats') - number_of_seats,
+            updated_at=timezone.now()
+        )
+        if not updated:
+            return False
+        self.refresh_from_db(fields=['available_seats', 'updated_at'])
+        self.invalidate_route_caches()
+        return True
 
     def release_seats(self, number_of_seats):
         """Release seats back to available pool"""
-        # Remove the restrictive validation - just ensure we don't exceed total seats
-        if self.available_seats + number_of_seats <= self.total_seats:
-            self.available_seats += number_of_seats
-            self.save()
-            return True
-        else:
-            # If we would exceed total seats, just set to total seats
-            self.available_seats = self.total_seats
-            self.save()
-            return True
+        # Same single-statement primitive, capped at total seats
+        TravelOption.objects.filter(pk=self.pk).update(
+            available_seats=Least(F('available_seats') + number_of_seats, F('total_seats')),
+            updated_at=timezone.now()
+        )
+        self.refresh_from_db(fields=['available_seats', 'updated_at'])
+        self.invalidate_route_caches()
+        return True
 
     def get_departure_datetime_local(self):
         """Get departure datetime in local timezone"""
@@ -102,9 +239,7 @@ class TravelOption(models.Model):
 
     def is_departed(self):
         """Check if the travel option has already departed"""
-        now = timezone.now()
-        departure = self.get_departure_datetime_local()
-        return departure < now
+        return self.departure_at < timezone.now()
 
     def get_formatted_departure_time(self):
         """Get formatted departure time for display"""
@@ -133,9 +268,17 @@ class Booking(models.Model):
     total_price = models.DecimalField(max_digits=10, decimal_places=2)
     booking_date = models.DateTimeField(auto_now_add=True)
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='confirmed')
+    # Set while the booking is a pending seat hold; the hold lapses then
+    expires_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-booking_date', '-booking_id'], name='booking_user_date_idx'),
+            models.Index(fields=['status', 'expires_at'], name='booking_hold_expiry_idx'),
+        ]
+
     def clean(self):
         if self.number_of_seats > self.travel_option.available_seats:
             raise ValidationError("Not enough available seats for this booking.")
@@ -149,46 +292,385 @@ class Booking(models.Model):
         super().save(*args, **kwargs)
 
     @classmethod
-    def create_booking(cls, user, travel_option, number_of_seats, passenger_details):
-        """Create a booking with seat reservation"""
+    def create_booking(cls, user, travel_option, number_of_seats, passenger_details, expires_at=None):
+        """Create a booking with seat reservation; a pending hold when ``expires_at`` is given"""
         try:
             with transaction.atomic():
-                # Double-check seat availability
-                if travel_option.available_seats < number_of_seats:
-                    raise ValidationError("Not enough available seats for this booking.")
-                
-                # Create booking first
+                # Reserve seats first; the conditional decrement is the
+                # only availability check that is safe under concurrency
+                if not travel_option.reserve_seats(number_of_seats):
+                    raise SeatsUnavailable("Sold out: not enough available seats for this booking.")
+
                 booking = cls.objects.create(
                     user=user,
                     travel_option=travel_option,
                     number_of_seats=number_of_seats,
                     passenger_details=passenger_details,
-                    status='confirmed'
+                    status='pending' if expires_at else 'confirmed',
+                    expires_at=expires_at
                 )
-                
-                # Then reserve seats
-                travel_option.available_seats -= number_of_seats
-                travel_option.save()
-                
+                BookingSummary.record_booking(booking)
                 return booking
+        except SeatsUnavailable:
+            raise
         except Exception as e:
             raise ValidationError(f"Failed to create booking: {str(e)}")
 
+    @classmethod
+    def hold_seats(cls, user, travel_option, number_of_seats, passenger_details):
+        """Reserve seats as a pending booking that lapses unless confirmed in time"""
+        ttl = settings.SEAT_HOLDS['TTL_SECONDS']
+        return cls.create_booking(
+            user, travel_option, number_of_seats, passenger_details,
+            expires_at=timezone.now() + timedelta(seconds=ttl)
+        )
+
+    def confirm_hold(self):
+        """Turn an unexpired hold into a confirmed booking"""
+        if self.status != 'pending':
+            return False
+        try:
+            with transaction.atomic():
+                now = timezone.now()
+                # Conditional flip: loses to the sweeper once the hold lapses
+                confirmed = Booking.objects.filter(
+                    pk=self.pk,
+                    status='pending',
+                    expires_at__gt=now
+                ).update(status='confirmed', expires_at=None, updated_at=now)
+                if not confirmed:
+                    return False
+                self.status = 'confirmed'
+                self.expires_at = None
+                BookingSummary.record_confirmation(self)
+                return True
+        except Exception as e:
+            raise ValidationError(f"Error confirming booking: {str(e)}")
+
     def cancel_booking(self):
-        """Cancel booking and release seats"""
-        if self.status == 'confirmed':
+        """Cancel booking (or release a hold early) and release seats"""
+        if self.status in ('pending', 'confirmed'):
+            previous_status = self.status
             try:
                 with transaction.atomic():
-                    # Release seats back to available pool
-                    if self.travel_option.release_seats(self.number_of_seats):
-                        self.status = 'cancelled'
-                        self.save()
-                        return True
-                    else:
-                        raise ValidationError("Failed to release seats.")
+                    # Flip the status conditionally so a concurrent cancel
+                    # cannot release the same seats twice
+                    cancelled = Booking.objects.filter(
+                        pk=self.pk,
+                        status=previous_status
+                    ).update(status='cancelled', updated_at=timezone.now())
+                    if not cancelled:
+                        return False
+                    self.status = 'cancelled'
+                    self.travel_option.release_seats(self.number_of_seats)
+                    BookingSummary.record_cancellation(self, previous_status=previous_status)
+                    return True
             except Exception as e:
                 raise ValidationError(f"Error cancelling booking: {str(e)}")
         return False
 
+    @classmethod
+    def release_expired_holds(cls, batch_size=1000):
+        """Cancel lapsed holds and return their seats; returns how many were released.
+
+        Works through the expiry index ``batch_size`` holds per transaction,
+        each batch a fixed handful of set-based statements however large it
+        is: one UPDATE of the bookings, one CASE UPDATE of the seat counts
+        of the affected travel options and one of the owners' summaries.
+        Holds are claimed with SKIP LOCKED where the database supports it,
+        so several sweepers can run side by side.
+        """
+        released = 0
+        while True:
+            claimed, count = cls._release_expired_batch(batch_size)
+            released += count
+            if claimed < batch_size:
+                return released
+
+    @classmethod
+    def _release_expired_batch(cls, batch_size):
+        with transaction.atomic():
+            holds = cls.objects.filter(status='pending', expires_at__lte=timezone.now()).order_by('expires_at')
+            if connection.features.has_select_for_update:
+                holds = holds.select_for_update(skip_locked=connection.features.has_select_for_update_skip_locked)
+            rows = list(holds.values_list('booking_id', 'user_id', 'travel_option_id', 'number_of_seats')[:batch_size])
+            if not rows:
+                return 0, 0
+
+            stamp = timezone.now()
+            ids = [row[0] for row in rows]
+            released = cls.objects.filter(booking_id__in=ids, status='pending').update(
+                status='cancelled', updated_at=stamp
+            )
+            if released != len(rows):
+                # Some holds were confirmed or cancelled in the meantime
+                # (no row locks on this database); keep only the ones we flipped
+                flipped = set(cls.objects.filter(
+                    booking_id__in=ids, status='cancelled', updated_at=stamp
+                ).values_list('booking_id', flat=True))
+                rows = [row for row in rows if row[0] in flipped]
+            if not rows:
+                return len(ids), 0
+
+            seats = Counter()
+            holds_per_user = Counter()
+            for _, user_id, travel_option_id, number_of_seats in rows:
+                seats[travel_option_id] += number_of_seats
+                holds_per_user[user_id] += 1
+            TravelOption.objects.filter(pk__in=seats).update(
+                available_seats=Least(
+                    F('available_seats') + Case(
+                        *(When(pk=pk, then=Value(n)) for pk, n in seats.items()),
+                        output_field=models.PositiveIntegerField()
+                    ),
+                    F('total_seats')
+                ),
+                updated_at=stamp
+            )
+            BookingSummary.record_expirations(holds_per_user)
+
+            # Set-based writes bypass release_seats(), so invalidate here
+            cells = set(TravelOption.objects.filter(pk__in=seats).values_list(
+                'source_id', 'destination_id', 'departure_date'
+            ))
+            for route in {cell[:2] for cell in cells}:
+                search_cache.bump_route_on_commit(*route)
+            RouteDayFare.refresh_on_commit(cells)
+            return len(ids), len(rows)
+
+    def __str__(self):
+        return f"Booking {self.reference_number} by {self.user.username}"
+
+class BookingSummary(models.Model):
+    """Per-user booking counters, maintained in the booking transactions.
+
+    Updated with F() increments inside Booking.create_booking,
+    confirm_hold, cancel_booking and the expired-hold sweeper, so profile
+    statistics are a single-row read instead of COUNT queries over the
+    user's whole booking history.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='booking_summary')
+    total_bookings = models.PositiveIntegerField(default=0)
+    confirmed_bookings = models.PositiveIntegerField(default=0)
+    pending_bookings = models.PositiveIntegerField(default=0)
+    cancelled_bookings = models.PositiveIntegerField(default=0)
+    total_spent = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    next_booking = models.ForeignKey(Booking, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    next_departure_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    STATUS_COUNTERS = {
+        'pending': 'pending_bookings',
+        'confirmed': 'confirmed_bookings',
+        'cancelled': 'cancelled_bookings',
+    }
+
+    @classmethod
+    def for_user(cls, user):
+        """Summary for a user, refreshing the next trip once it has departed"""
+        summary, _ = cls.objects.select_related('next_booking__travel_option__source',
+                                                'next_booking__travel_option__destination').get_or_create(user_id=user.pk)
+        if summary.next_departure_at is not None and summary.next_departure_at < timezone.now():
+            summary.refresh_next_trip()
+        return summary
+
+    @classmethod
+    def record_booking(cls, booking):
+        """Count a new booking; call inside the booking transaction"""
+        cls.objects.get_or_create(user_id=booking.user_id)
+        counters = {
+            'total_bookings': F('total_bookings') + 1,
+            cls.STATUS_COUNTERS[booking.status]: F(cls.STATUS_COUNTERS[booking.status]) + 1,
+        }
+        if booking.status == 'confirmed':
+            counters['total_spent'] = F('total_spent') + booking.total_price
+        cls.objects.filter(user_id=booking.user_id).update(**counters)
+        if booking.status == 'confirmed':
+            cls.consider_next_trip(booking)
+
+    @classmethod
+    def record_confirmation(cls, booking):
+        """Move a confirmed hold's counters from pending; call inside its transaction"""
+        cls.objects.filter(user_id=booking.user_id).update(
+            pending_bookings=F('pending_bookings') - 1,
+            confirmed_bookings=F('confirmed_bookings') + 1,
+            total_spent=F('total_spent') + booking.total_price,
+        )
+        cls.consider_next_trip(booking)
+
+    @classmethod
+    def record_expirations(cls, holds_per_user):
+        """Move lapsed holds ({user_id: count}) from pending to cancelled in one UPDATE"""
+        count = Case(
+            *(When(user_id=user_id, then=Value(n)) for user_id, n in holds_per_user.items()),
+            output_field=models.PositiveIntegerField()
+        )
+        cls.objects.filter(user_id__in=holds_per_user).update(
+            pending_bookings=F('pending_bookings') - count,
+            cancelled_bookings=F('cancelled_bookings') + count,
+        )
+
+    @classmethod
+    def consider_next_trip(cls, booking):
+        """Make a confirmed booking the next trip if it departs sooner"""
+        departure_at = booking.travel_option.departure_at
+        if departure_at >= timezone.now():
+            cls.objects.filter(user_id=booking.user_id).filter(
+                models.Q(next_departure_at__isnull=True) | models.Q(next_departure_at__gt=departure_at)
+            ).update(next_booking=booking, next_departure_at=departure_at)
+
+    @classmethod
+    def record_cancellation(cls, booking, previous_status):
+        """Move a booking's counters to cancelled; call inside its transaction"""
+        cls.objects.get_or_create(user_id=booking.user_id)
+        counters = {
+            'cancelled_bookings': F('cancelled_bookings') + 1,
+            cls.STATUS_COUNTERS[previous_status]: F(cls.STATUS_COUNTERS[previous_status]) - 1,
+        }
+        if previous_status == 'confirmed':
+            counters['total_spent'] = F('total_spent') - booking.total_price
+        cls.objects.filter(user_id=booking.user_id).update(**counters)
+        next_booking_id = cls.objects.filter(
+            user_id=booking.user_id
+        ).values_list('next_booking_id', flat=True).first()
+        if next_booking_id == booking.pk:
+            cls(user_id=booking.user_id).refresh_next_trip()
+
+    def refresh_next_trip(self):
+        """Recompute the next upcoming confirmed trip (one indexed query)"""
+        booking = Booking.objects.filter(
+            user_id=self.user_id,
+            status='confirmed',
+            travel_option__departure_at__gte=timezone.now()
+        ).select_related(
+            'travel_option__source', 'travel_option__destination'
+        ).order_by('travel_option__departure_at').first()
+        self.next_booking = booking
+        self.next_departure_at = booking.travel_option.departure_at if booking else None
+        BookingSummary.objects.filter(user_id=self.user_id).update(
+            next_booking=self.next_booking, next_departure_at=self.next_departure_at
+        )
+
+    def __str__(self):
+        return f"{self.user.username} booking summary"
+
+
+class IdempotencyKey(models.Model):
+    """First response to a client's Idempotency-Key, replayed on retries.
+
+    A row is claimed (unique per user and key) before the request runs, so
+    concurrent duplicates find it and wait; ``status_code`` stays null
+    until the response is stored. Bodies are kept as zlib-compressed JSON.
+    """
+    key_id = models.AutoField(primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    key = models.CharField(max_length=255)
+    request_hash = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.BinaryField(null=True, blank=True)
+    # When the current attempt claimed the key; a claim still in flight
+    # after IDEMPOTENCY['LOCK_TIMEOUT'] is treated as abandoned
+    claimed_at = models.DateTimeField()
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'key'], name='idempotency_user_key_unique'),
+        ]
+
+    @classmethod
+    def purge_expired(cls, batch_size=5000):
+        """Delete expired keys in batches; returns how many were removed"""
+        purged = 0
+        while True:
+            ids = list(cls.objects.filter(expires_at__lte=timezone.now()).values_list('key_id', flat=True)[:batch_size])
+            if not ids:
+                return purged
+            purged += cls.objects.filter(key_id__in=ids).delete()[0]
+
+    def __str__(self):
+        return f"Idempotency key {self.key} for user {self.user_id}"
+
+
+class RouteDayFare(models.Model):
+    """Daily fare calendar rollup: one row per route and departure day.
+
+    Each cell holds the cheapest fare, the number of options and the seats
+    left over options that still have seats. Cells are recomputed from the
+    handful of options on that route and day whenever one of them is
+    saved, deleted or has seats reserved or released, so the fare calendar
+    endpoint only reads this table.
+    """
+    fare_id = models.AutoField(primary_key=True)
+    source = models.ForeignKey(City, on_delete=models.CASCADE, related_name='+')
+    destination = models.ForeignKey(City, on_delete=models.CASCADE, related_name='+')
+    travel_date = models.DateField()
+    min_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    option_count = models.PositiveIntegerField(default=0)
+    seats_left = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['source', 'destination', 'travel_date'], name='route_day_fare_unique'),
+        ]
+
+    @classmethod
+    def refresh_on_commit(cls, cells):
+        """Recompute (source_id, destination_id, date) cells once the transaction commits"""
+        cells = set(cells)
+        transaction.on_commit(lambda: cls.refresh(cells))
+
+    @classmethod
+    def refresh(cls, cells):
+        """Recompute the given cells: an aggregate query per ROUTE_LOOKUP_BATCH routes, one upsert"""
+        cells = {cell for cell in cells if None not in cell}
+        if not cells:
+            return
+        rows = []
+        for lookup in route_lookups(group_by_route(cells), 'departure_date'):
+            rows.extend(cls.aggregate_options(TravelOption.objects.filter(lookup)))
+        now = timezone.now()
+        fares = [cls(**row, updated_at=now) for row in rows]
+        with transaction.atomic():
+            found = {(fare.source_id, fare.destination_id, fare.travel_date) for fare in fares}
+            empty = cells - found
+            for lookup in route_lookups(group_by_route(empty), 'travel_date'):
+                cls.objects.filter(lookup).delete()
+            cls.upsert(fares)
+
+    @classmethod
+    def rebuild(cls, batch_size=2000):
+        """Recompute the whole calendar from TravelOption (repairs and backfills)"""
+        with transaction.atomic():
+            cls.objects.all().delete()
+            fares = (cls(**row) for row in cls.aggregate_options(TravelOption.objects.all()).iterator(chunk_size=batch_size))
+            while True:
+                batch = list(islice(fares, batch_size))
+                if not batch:
+                    break
+                cls.objects.bulk_create(batch, batch_size=batch_size)
+
+    @staticmethod
+    def aggregate_options(queryset):
+        with_seats = models.Q(available_seats__gt=0)
+        return queryset.values('source_id', 'destination_id', 'departure_date').annotate(
+            min_price=Min('price', filter=with_seats),
+            option_count=Count('travel_id', filter=with_seats),
+            seats_left=Coalesce(Sum('available_seats'), 0),
+        ).values(
+            'source_id', 'destination_id', 'min_price', 'option_count', 'seats_left',
+            travel_date=F('departure_date'),
+        ).order_by()
+
+    @classmethod
+    def upsert(cls, fares):
+        cls.objects.bulk_create(
+            fares,
+            update_conflicts=True,
+            unique_fields=['source', 'destination', 'travel_date'] if connection.features.supports_update_conflicts_with_target else None,
+            update_fields=['min_price', 'option_count', 'seats_left', 'updated_at'],
+        )
+
     def __str__(self):
-        return f"Booking {self.reference_number} by {self.user.username}"
\ No newline at end of file
+        return f"{self.source_id}-{self.destination_id} on {self.travel_date}"
@@ -0,0 +1,61 @@
+"""Caching for the HTML shell pages.
+
+The shell pages only vary with the visitor: anonymous, or which user (the
+navbar shows the username). cache_shell_page caches a whole GET response
+per path and visitor. The shared layout caches its navbar and footer with
+``{% cache fragment_cache_timeout ... %}``, so pages rendered fresh (the
+travel options page with its embedded first page of data, or a first
+visit) skip most of the layout too.
+
+Requests with pending django.contrib.messages are never cached, because
+the messages are rendered into the page once.
+"""
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+
+
+def visitor_key(user):
+    # The username is shown in the navbar, so a rename must miss the cache
+    if user.is_authenticated:
+        return f'user:{user.pk}:{user.get_username()}'
+    return 'anonymous'
+
+
+def shell_cache_key(request):
+    path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return f'shell-page:{path}:{visitor_key(request.user)}'
+
+
+def cache_shell_page(view_func):
+    """Serve a GET shell page from PAGE_CACHE per path and visitor"""
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        config = settings.PAGE_CACHE
+        if not config['ENABLED'] or request.method != 'GET' or len(get_messages(request)):
+            return view_func(request, *args, **kwargs)
+        cache = caches[config['CACHE_ALIAS']]
+        key = shell_cache_key(request)
+        cached = cache.get(key)
+        if cached is not None:
+            content, content_type = cached
+            response = HttpResponse(content, content_type=content_type)
+            # The key depends on the session's user
+            patch_vary_headers(response, ['Cookie'])
+            return response
+        response = view_func(request, *args, **kwargs)
+        if response.status_code == 200 and not response.streaming and not response.cookies:
+            cache.set(key, (response.content, response['Content-Type']), config['TIMEOUT'])
+        return response
+    return wrapper
+
+
+def page_cache(request):
+    """Template context processor: the timeout for {% cache %} fragments (0 disables them)"""
+    config = settings.PAGE_CACHE
+    return {'fragment_cache_timeout': config['TIMEOUT'] if config['ENABLED'] else 0}
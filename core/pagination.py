@@ -0,0 +1,164 @@
+import base64
+import json
+from collections import OrderedDict
+from functools import reduce
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import InvalidPage
+from django.db.models import Q
+from rest_framework.exceptions import NotFound, ParseError
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """Keyset (seek) pagination with opaque cursors and no total count.
+
+    Pages are ordered by ``keyset``, a tuple of field names ending in a
+    unique column (prefix with '-' for descending). Each page is fetched
+    with a "greater than the last row seen" predicate, so deep pages cost
+    the same as the first one and no COUNT(*) is issued.
+
+    The mode is chosen per request: passing ``?cursor=`` (empty for the
+    first page) selects keyset paging, otherwise the regular page-number
+    pagination is used so existing clients keep working.
+    """
+    keyset = ()
+    page_size = api_settings.PAGE_SIZE
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+    fallback_class = PageNumberPagination
+
+    def __init__(self):
+        self.fallback = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.cursor_query_param not in request.query_params:
+            self.fallback = self.fallback_class()
+            if not queryset.ordered:
+                queryset = queryset.order_by(*self.keyset)
+            return self.fallback.paginate_queryset(queryset, request, view)
+        return self.keyset_page(list(self.keyset_queryset(queryset, request)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """paginate_queryset() for async views, using the async ORM"""
+        if self.cursor_query_param not in request.query_params:
+            self.fallback = self.fallback_class()
+            if not queryset.ordered:
+                queryset = queryset.order_by(*self.keyset)
+            return await self.apaginate_fallback(queryset, request)
+        return self.keyset_page([row async for row in self.keyset_queryset(queryset, request)])
+
+    def keyset_queryset(self, queryset, request):
+        """One row past the page, so has_next needs no extra query"""
+        self.request = request
+        queryset = queryset.order_by(*self.keyset)
+        position = self.decode_cursor(request, queryset.model)
+        if position is not None:
+            queryset = queryset.filter(self.after(position))
+        return queryset[:self.page_size + 1]
+
+    def keyset_page(self, rows):
+        fields = [field.lstrip('-') for field in self.keyset]
+        self.has_next = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        self.next_position = None
+        if self.has_next:
+            self.next_position = [self.get_value(rows[-1], field) for field in fields]
+        return rows
+
+    async def apaginate_fallback(self, queryset, request):
+        """PageNumberPagination.paginate_queryset with the COUNT and page fetched async"""
+        fallback = self.fallback
+        page_size = fallback.get_page_size(request)
+        if not page_size:
+            return None
+        paginator = fallback.django_paginator_class(queryset, page_size)
+        # Paginator.count is a cached_property; prime it so nothing below queries
+        paginator.count = await queryset.acount()
+        page_number = fallback.get_page_number(request, paginator)
+        try:
+            fallback.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            raise NotFound(fallback.invalid_page_message.format(page_number=page_number, message=str(exc)))
+        fallback.page.object_list = [row async for row in fallback.page.object_list]
+        if paginator.num_pages > 1 and fallback.template is not None:
+            fallback.display_page_controls = True
+        fallback.request = request
+        return list(fallback.page)
+
+    def get_value(self, row, field):
+        if isinstance(row, dict):
+            return row[field]
+        return getattr(row, field)
+
+    def after(self, position):
+        """Lexicographic "row comes after position" predicate over the keyset"""
+        clauses = []
+        for i, field in enumerate(self.keyset):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            equal = {
+                prev.lstrip('-'): position[j] for j, prev in enumerate(self.keyset[:i])
+            }
+            clauses.append(Q(**equal, **{f'{name}__{lookup}': position[i]}))
+        return reduce(lambda a, b: a | b, clauses)
+
+    def encode_cursor(self, position):
+        values = [value.isoformat() if hasattr(value, 'isoformat') else value for value in position]
+        raw = json.dumps(values, separators=(',', ':')).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    def decode_cursor(self, request, model):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            if not isinstance(values, list) or len(values) != len(self.keyset):
+                raise ValueError
+            return [
+                model._meta.get_field(field.lstrip('-')).to_python(value)
+                for field, value in zip(self.keyset, values)
+            ]
+        except (TypeError, ValueError, ValidationError):
+            raise ParseError(self.invalid_cursor_message)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.next_position))
+
+    def get_paginated_response(self, data):
+        if self.fallback is not None:
+            return self.fallback.get_paginated_response(data)
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', None),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        if self.fallback is not None:
+            return self.fallback.get_paginated_response_schema(schema)
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class TravelOptionPagination(KeysetPagination):
+    keyset = ('departure_at', 'travel_id')
+
+
+class BookingPagination(KeysetPagination):
+    keyset = ('-booking_date', '-booking_id')
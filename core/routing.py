@@ -0,0 +1,155 @@
+"""Read-replica routing with read-your-writes stickiness.
+
+Views opt in to replica reads with ReplicaReadMixin (or ``replica_reads``
+on the async views). They read from a random replica from
+REPLICA_ROUTING['REPLICAS'] for safe methods, once the user is known.
+Everything else reads and writes on ``default``. That covers every other
+view, transactions, and requests outside ReplicaRoutingMiddleware
+(commands, the shell).
+
+ReplicaRoutingMiddleware notices any write a request makes through the
+router. It then pins that user to the primary for STICKY_SECONDS, so
+their next reads see the seats and bookings they just changed. Later
+reads in the same request also stay on the primary.
+"""
+import random
+import threading
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from rest_framework.permissions import SAFE_METHODS
+
+from .search_cache import CacheAlias, LRUCache
+
+_state = ContextVar('replica_routing', default=None)
+
+
+class RoutingState:
+    __slots__ = ('replica_ok', 'wrote')
+
+    def __init__(self):
+        self.replica_ok = False
+        self.wrote = False
+
+
+def replicas():
+    return getattr(settings, 'REPLICA_ROUTING', {}).get('REPLICAS', [])
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or not state.replica_ok or state.wrote:
+            return DEFAULT_DB_ALIAS
+        # Reads inside a transaction must see its own writes
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        aliases = replicas()
+        return random.choice(aliases) if aliases else DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas receive the schema through replication
+        return db == DEFAULT_DB_ALIAS
+
+
+class PrimaryPins:
+    """Users whose reads stay on the primary until a recent write has replicated"""
+
+    def __init__(self):
+        self._configured = False
+        self._lock = threading.Lock()
+
+    def _ensure_configured(self):
+        with self._lock:
+            if self._configured:
+                return
+            config = getattr(settings, 'REPLICA_ROUTING', {})
+            alias = config.get('CACHE_ALIAS')
+            self.entries = CacheAlias(alias) if alias else LRUCache(config.get('MAX_PINS', 100000))
+            self._configured = True
+
+    def pin(self, user_id):
+        self._ensure_configured()
+        self.entries.set(f'primary-pin:{user_id}', True, settings.REPLICA_ROUTING['STICKY_SECONDS'])
+
+    def is_pinned(self, user_id):
+        self._ensure_configured()
+        return bool(self.entries.get(f'primary-pin:{user_id}'))
+
+
+primary_pins = PrimaryPins()
+
+
+def allow_replica_reads(request):
+    """Let the rest of this request read from a replica, unless the user is pinned"""
+    state = _state.get()
+    if state is None or request.method not in SAFE_METHODS or not replicas():
+        return
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated and primary_pins.is_pinned(user.pk):
+        return
+    state.replica_ok = True
+
+
+class ReplicaReadMixin:
+    """Serve this view's safe-method reads from a replica (see allow_replica_reads)"""
+
+    def initial(self, request, *args, **kwargs):
+        # Authentication has run, so the user (and any pin) is known
+        super().initial(request, *args, **kwargs)
+        allow_replica_reads(request)
+
+
+class ReplicaRoutingMiddleware:
+    """Track writes per request and pin the writing user to the primary"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        state = RoutingState()
+        token = _state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+        self.finish(request, state)
+        return response
+
+    async def __acall__(self, request):
+        state = RoutingState()
+        token = _state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _state.reset(token)
+        if state.wrote:
+            # Resolving a session user is a (sync) query
+            await sync_to_async(self.finish)(request, state)
+        return response
+
+    def finish(self, request, state):
+        if not state.wrote or not replicas():
+            return
+        # DRF copies the authenticated (e.g. JWT) user onto the HttpRequest
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            primary_pins.pin(user.pk)
@@ -0,0 +1,218 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+
+class LRUCache:
+    """Small thread-safe in-process LRU cache with per-entry TTL.
+
+    Implements the subset of Django's cache API used by SearchCache
+    (get/set/get_many/add/incr/delete) so a shared Django cache backend can be
+    swapped in for multi-node deployments.
+    """
+
+    def __init__(self, max_entries=2048, timeout=60):
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            value, expires = item
+            if expires is not None and expires < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout=None):
+        timeout = self.timeout if timeout is None else timeout
+        expires = time.monotonic() + timeout if timeout else None
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def get_many(self, keys):
+        found = {}
+        for key in keys:
+            value = self.get(key)
+            if value is not None:
+                found[key] = value
+        return found
+
+    def add(self, key, value, timeout=None):
+        with self._lock:
+            if key in self._data:
+                return False
+        self.set(key, value, timeout)
+        return True
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def incr(self, key, delta=1):
+        with self._lock:
+            if key not in self._data:
+                raise ValueError(f"Key '{key}' not found")
+            value, expires = self._data[key]
+            self._data[key] = (value + delta, expires)
+            return value + delta
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class CacheAlias:
+    """A configured Django cache, looked up on every call.
+
+    ``caches`` hands each thread and async context its own backend client;
+    holding on to ``caches[alias]`` would share one connection between all
+    of them.
+    """
+
+    def __init__(self, alias):
+        self.alias = alias
+
+    def __getattr__(self, name):
+        return getattr(caches[self.alias], name)
+
+
+class SearchCache:
+    """Versioned cache of TravelSearchView responses.
+
+    Entries are keyed on the normalized search parameters plus the current
+    version counters of every route the search can touch. Changing a
+    TravelOption (save, seat reservation or release) bumps the counters of
+    its route, so stale entries are never read again and simply age out.
+
+    Counters are seeded from the clock rather than 0, so a counter that is
+    evicted and recreated can never match a version an old entry was
+    stored under.
+    """
+
+    def __init__(self):
+        self._configured = False
+        self._lock = threading.Lock()
+
+    def _configure(self):
+        with self._lock:
+            if self._configured:
+                return
+            config = getattr(settings, 'SEARCH_CACHE', {})
+            self.enabled = config.get('ENABLED', True)
+            self.timeout = config.get('TIMEOUT', 60)
+            alias = config.get('CACHE_ALIAS')
+            self.shared = bool(alias)
+            if alias:
+                # Shared Django cache (e.g. Redis/Memcached) for multi-node setups
+                self.entries = self.versions = CacheAlias(alias)
+            else:
+                self.entries = LRUCache(config.get('MAX_ENTRIES', 2048), self.timeout)
+                # Versions live apart from entries so LRU eviction never drops them
+                self.versions = LRUCache(max_entries=config.get('MAX_VERSIONS', 100000), timeout=0)
+            self._configured = True
+
+    def _ensure_configured(self):
+        if not self._configured:
+            self._configure()
+
+    def reset(self):
+        """Reread the configuration; in-process entries and versions are dropped (tests)"""
+        with self._lock:
+            self._configured = False
+
+    @staticmethod
+    def route_version_keys(source_ids, destination_ids):
+        if source_ids is not None and destination_ids is not None:
+            return [f'search-version:route:{s}:{d}' for s in source_ids for d in destination_ids]
+        if source_ids is not None:
+            return [f'search-version:source:{s}' for s in source_ids]
+        if destination_ids is not None:
+            return [f'search-version:destination:{d}' for d in destination_ids]
+        return ['search-version:all']
+
+    def _versions(self, keys):
+        found = self.versions.get_many(keys)
+        for key in keys:
+            if key not in found:
+                self.versions.add(key, time.time_ns(), timeout=None)
+                found[key] = self.versions.get(key)
+        return [found[key] for key in keys]
+
+    def make_key(self, params, source_ids=None, destination_ids=None):
+        """Cache key for normalized search ``params`` and the routes they cover"""
+        self._ensure_configured()
+        versions = self._versions(self.route_version_keys(source_ids, destination_ids))
+        raw = json.dumps([params, versions], sort_keys=True, default=str)
+        return 'search:' + hashlib.sha1(raw.encode()).hexdigest()
+
+    def get(self, key):
+        self._ensure_configured()
+        if not self.enabled:
+            return None
+        return self.entries.get(key)
+
+    def set(self, key, data):
+        self._ensure_configured()
+        if self.enabled:
+            self.entries.set(key, data, self.timeout)
+
+    # Async variants for ASGI views. The in-process LRU never blocks, so it
+    # is used directly; a shared cache backend is called off the event loop.
+
+    async def amake_key(self, params, source_ids=None, destination_ids=None):
+        self._ensure_configured()
+        if self.shared:
+            return await sync_to_async(self.make_key, thread_sensitive=False)(params, source_ids, destination_ids)
+        return self.make_key(params, source_ids, destination_ids)
+
+    async def aget(self, key):
+        self._ensure_configured()
+        if self.shared and self.enabled:
+            return await self.entries.aget(key)
+        return self.get(key)
+
+    async def aset(self, key, data):
+        self._ensure_configured()
+        if self.shared and self.enabled:
+            await self.entries.aset(key, data, self.timeout)
+        else:
+            self.set(key, data)
+
+    def bump_route(self, source_id, destination_id):
+        """Invalidate every cached search that can include this route"""
+        self._ensure_configured()
+        keys = [
+            f'search-version:route:{source_id}:{destination_id}',
+            f'search-version:source:{source_id}',
+            f'search-version:destination:{destination_id}',
+            'search-version:all',
+        ]
+        for key in keys:
+            try:
+                self.versions.incr(key)
+            except ValueError:
+                self.versions.add(key, time.time_ns(), timeout=None)
+
+    def bump_route_on_commit(self, source_id, destination_id):
+        # Bump after commit so a concurrent reader cannot re-cache the
+        # pre-commit state under the new version
+        transaction.on_commit(lambda: self.bump_route(source_id, destination_id))
+
+
+search_cache = SearchCache()
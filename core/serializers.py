@@ -1,16 +1,28 @@
-from rest_framework import serializers
+from rest_framework import serializers, status
+from rest_framework.exceptions import APIException
 from django.contrib.auth.models import User
 from django.contrib.auth.password_validation import validate_password
 from django.db import transaction
-from .models import UserProfile, TravelOption, Booking
+from django.utils import timezone
+from django.utils.duration import duration_string
+from datetime import timedelta
+from decimal import Decimal
+from .models import UserProfile, City, TravelOption, Booking, BookingSummary, SeatsUnavailable
+from .metrics import TimedSerializerMixin, serializer_timer
 
-class UserSerializer(serializers.ModelSerializer):
+
+class SoldOut(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'Sold out: not enough available seats for this booking.'
+    default_code = 'sold_out'
+
+class UserSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ['id', 'username', 'email', 'first_name', 'last_name']
         read_only_fields = ['id']
 
-class UserProfileSerializer(serializers.ModelSerializer):
+class UserProfileSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
     
     class Meta:
@@ -18,7 +30,7 @@ class UserProfileSerializer(serializers.ModelSerializer):
         fields = ['id', 'user', 'phone_number', 'date_of_birth', 'address', 'created_at', 'updated_at']
         read_only_fields = ['id', 'created_at', 'updated_at']
 
-class RegisterSerializer(serializers.ModelSerializer):
+class RegisterSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, required=True, validators=[validate_password])
     password2 = serializers.CharField(write_only=True, required=True)
     phone_number = serializers.CharField(max_length=20, required=True)
@@ -50,24 +62,158 @@ class RegisterSerializer(serializers.ModelSerializer):
         )
         return user
 
-class TravelOptionSerializer(serializers.ModelSerializer):
+class CityNameField(serializers.SlugRelatedField):
+    """Represents a City by its name; unknown names create a new City on write.
+
+    Validation only looks the name up: an unknown name becomes an unsaved
+    City, which the serializer's save() creates, so a rejected payload
+    leaves no rows behind.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(slug_field='name', queryset=City.objects.all(), **kwargs)
+
+    def to_internal_value(self, data):
+        if not isinstance(data, str) or not data.strip():
+            self.fail('invalid')
+        return City.find_by_name(data) or City(name=City.normalize_name(data))
+
+class TravelOptionSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    source = CityNameField()
+    destination = CityNameField()
+
     class Meta:
         model = TravelOption
         fields = '__all__'
         read_only_fields = ['travel_id', 'created_at', 'updated_at']
 
-class BookingSerializer(serializers.ModelSerializer):
+    def create(self, validated_data):
+        with transaction.atomic():
+            return super().create(self.save_new_cities(validated_data))
+
+    def update(self, instance, validated_data):
+        with transaction.atomic():
+            return super().update(instance, self.save_new_cities(validated_data))
+
+    @staticmethod
+    def save_new_cities(validated_data):
+        for field in ('source', 'destination'):
+            city = validated_data.get(field)
+            if city is not None and city.pk is None:
+                # Also reuses a city created by a concurrent request since validation
+                validated_data[field] = City.get_or_create_by_name(city.name)
+        return validated_data
+
+# Read-only fast path for listings: rows come from .values() and are turned
+# into the same JSON shape as TravelOptionSerializer by a precompiled
+# converter, skipping model instantiation and per-field DRF machinery.
+TRAVEL_OPTION_ROW_FIELDS = (
+    'travel_id', 'type', 'operator_name', 'source__name', 'destination__name',
+    'departure_date', 'departure_time', 'arrival_date', 'arrival_time', 'duration',
+    'departure_at', 'arrival_at', 'price', 'available_seats', 'total_seats',
+    'created_at', 'updated_at',
+)
+
+def _build_travel_option_row_converter():
+    cent = Decimal('0.01')
+
+    def date_or_time(value):
+        return value.isoformat() if value is not None else None
+
+    def duration(value):
+        return duration_string(value) if value is not None else None
+
+    def price(value):
+        return format(value.quantize(cent), 'f') if value is not None else None
+
+    def identity(value):
+        return value
+
+    columns = [
+        ('travel_id', 'travel_id', identity),
+        ('type', 'type', identity),
+        ('operator_name', 'operator_name', identity),
+        ('source', 'source__name', identity),
+        ('destination', 'destination__name', identity),
+        ('departure_date', 'departure_date', date_or_time),
+        ('departure_time', 'departure_time', date_or_time),
+        ('arrival_date', 'arrival_date', date_or_time),
+        ('arrival_time', 'arrival_time', date_or_time),
+        ('duration', 'duration', duration),
+        ('departure_at', 'departure_at', None),
+        ('arrival_at', 'arrival_at', None),
+        ('price', 'price', price),
+        ('available_seats', 'available_seats', identity),
+        ('total_seats', 'total_seats', identity),
+        ('created_at', 'created_at', None),
+        ('updated_at', 'updated_at', None),
+    ]
+
+    def convert(rows):
+        # Same rendering as DRF's DateTimeField: current timezone, 'Z' for UTC
+        tz = timezone.get_current_timezone()
+
+        def aware(value):
+            if value is None:
+                return None
+            value = value.astimezone(tz).isoformat()
+            if value.endswith('+00:00'):
+                value = value[:-6] + 'Z'
+            return value
+
+        compiled = [(key, column, fn or aware) for key, column, fn in columns]
+        with serializer_timer():
+            return [{key: fn(row[column]) for key, column, fn in compiled} for row in rows]
+
+    return convert
+
+travel_option_rows_to_data = _build_travel_option_row_converter()
+
+class BookingSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     travel_option = TravelOptionSerializer(read_only=True)
-    user = UserSerializer(read_only=True)
+    user = serializers.SerializerMethodField()
+    
+    def get_user(self, booking):
+        """Serialize each distinct user once per response.
+
+        A booking listing belongs to a single user, so the block is built
+        once (from request.user when it is the owner, without a query) and
+        reused for every item.
+        """
+        cache = self.context.setdefault('user_data', {})
+        if booking.user_id not in cache:
+            request = self.context.get('request')
+            if request is not None and request.user.pk == booking.user_id:
+                user = request.user
+            else:
+                user = booking.user
+            cache[booking.user_id] = UserSerializer(user).data
+        return cache[booking.user_id]
     
     class Meta:
         model = Booking
         fields = ['booking_id', 'reference_number', 'user', 'travel_option', 'number_of_seats', 
-                 'passenger_details', 'total_price', 'booking_date', 'status', 'created_at', 'updated_at']
+                 'passenger_details', 'total_price', 'booking_date', 'status', 'expires_at', 'created_at', 'updated_at']
         read_only_fields = ['booking_id', 'reference_number', 'user', 'total_price', 
-                           'booking_date', 'created_at', 'updated_at']
+                           'booking_date', 'expires_at', 'created_at', 'updated_at']
+
+class NextTripSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    travel_option = TravelOptionSerializer(read_only=True)
+
+    class Meta:
+        model = Booking
+        fields = ['booking_id', 'reference_number', 'number_of_seats', 'travel_option']
+
+class BookingSummarySerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    next_trip = NextTripSerializer(source='next_booking', read_only=True)
 
-class CreateBookingSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = BookingSummary
+        fields = ['total_bookings', 'confirmed_bookings', 'pending_bookings', 'cancelled_bookings',
+                  'total_spent', 'next_trip', 'updated_at']
+        read_only_fields = fields
+
+class CreateBookingSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     travel_option = serializers.PrimaryKeyRelatedField(queryset=TravelOption.objects.all())
     
     class Meta:
@@ -88,13 +234,7 @@ class CreateBookingSerializer(serializers.ModelSerializer):
         
         # Check if travel option has departed with specific error message
         try:
-            from django.utils import timezone
-            now = timezone.now()
-            dep_dt = timezone.make_aware(
-                timezone.datetime.combine(travel_option.departure_date, travel_option.departure_time),
-                timezone=timezone.get_current_timezone()
-            )
-            if dep_dt < now:
+            if travel_option.is_departed():
                 # Create a more specific error message
                 travel_type = travel_option.type.title()
                 departure_time = travel_option.get_formatted_departure_time()
@@ -158,5 +298,26 @@ class CreateBookingSerializer(serializers.ModelSerializer):
                 passenger_details=passenger_details
             )
             return booking
+        except SeatsUnavailable:
+            raise SoldOut()
         except Exception as e:
             raise serializers.ValidationError(f"Failed to create booking: {str(e)}")
+
+def itineraries_to_data(itineraries, rows):
+    """Render ConnectionGraph itineraries; ``rows`` maps travel_id to a .values() row"""
+    legs = {
+        data['travel_id']: data
+        for data in travel_option_rows_to_data(rows[leg.travel_id] for path in itineraries for leg in path)
+    }
+    cent = Decimal('0.01')
+    return [
+        {
+            'departure_at': legs[path[0].travel_id]['departure_at'],
+            'arrival_at': legs[path[-1].travel_id]['arrival_at'],
+            'duration': duration_string(timedelta(seconds=path[-1].arrival - path[0].departure)),
+            'total_price': format(sum(leg.price for leg in path).quantize(cent), 'f'),
+            'transfers': len(path) - 1,
+            'legs': [legs[leg.travel_id] for leg in path],
+        }
+        for path in itineraries
+    ]
@@ -0,0 +1,16 @@
+from django import template
+from django.utils.html import format_html_join
+
+from core.assets import asset_urls
+
+register = template.Library()
+
+
+@register.simple_tag
+def asset_tags(name):
+    """<script>/<link> tags for an asset bundle (see core.assets)"""
+    if name.endswith('.css'):
+        element = '<link rel="stylesheet" href="{}">'
+    else:
+        element = '<script src="{}"></script>'
+    return format_html_join('\n    ', element, ((url,) for url in asset_urls(name)))
@@ -1,3 +1,1206 @@
-from django.test import TestCase
+import gzip
+import json
+import os
+import tempfile
+import threading
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from unittest import mock
+from urllib.parse import parse_qs, urlsplit
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.template import Context, Template
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from benchmarks.dataset import create_users, seed_travel_options
+from benchmarks.load_test import BASELINE_DIR, compare, percentile
+
+from .admission import admission
+from .async_views import TravelOptionListAsyncView, TravelSearchAsyncView
+from .assets import build, minify_js
+from .city_index import city_index
+from .connections import ConnectionGraph
+from .export import EXPORT_HEADER, export_queryset, iter_export_lines
+from .inventory import inventory_index
+from .ingest import TimetableImporter
+from .metrics import MetricsRegistry, mark_process_dead
+from .models import City, TravelOption, Booking, BookingSummary, RouteDayFare, SeatsUnavailable, UserProfile
+from .pagination import TravelOptionPagination
+from .routing import PrimaryPins, ReplicaRouter, ReplicaRoutingMiddleware, _state, allow_replica_reads
+from .search_cache import search_cache
+from .serializers import (
+    TRAVEL_OPTION_ROW_FIELDS, CreateBookingSerializer, SoldOut, TravelOptionSerializer, travel_option_rows_to_data
+)
+from .views import FareCalendarView, TravelOptionListCreateView, TravelSearchView
 
 # Create your tests here.
+
+class TravelTestCase(TestCase):
+    """TestCase with a factory for travel options"""
+
+    def setUp(self):
+        # Test transactions never commit, so saved cities are not added to
+        # the live index; reload it from the table instead
+        city_index.invalidate()
+
+    @staticmethod
+    def make_option(departure=None, hours=2, **overrides):
+        """A TravelOption leaving at ``departure`` (default: this time tomorrow).
+
+        ``source`` and ``destination`` take City instances or names; new
+        names are created. Total seats default to the available seats.
+        """
+        departure = departure or timezone.localtime() + timedelta(days=1)
+        arrival = departure + timedelta(hours=hours)
+        fields = {
+            'type': 'bus', 'operator_name': 'Operator', 'source': 'Delhi', 'destination': 'Mumbai',
+            'price': 500, 'available_seats': 10, **overrides,
+        }
+        fields.setdefault('total_seats', fields['available_seats'])
+        for end in ('source', 'destination'):
+            if isinstance(fields[end], str):
+                fields[end] = City.objects.get_or_create(name=fields[end])[0]
+        return TravelOption.objects.create(
+            departure_date=departure.date(), departure_time=departure.time(),
+            arrival_date=arrival.date(), arrival_time=arrival.time(), **fields,
+        )
+
+
+class SeatReservationTests(TravelTestCase):
+    """The last seat is sold once; later attempts fail without driving seats negative"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('first', password='first-pass')
+        cls.other = User.objects.create_user('second', password='second-pass')
+        cls.travel_option = cls.make_option(
+            hours=1, type='flight', source='Kochi', destination='Bengaluru',
+            price=3000, available_seats=1, total_seats=100,
+        )
+
+    def test_last_seat_is_booked_once(self):
+        passengers = [{'name': 'Passenger', 'age': 30}]
+        # Both requests loaded the option while one seat was left
+        first = TravelOption.objects.get(pk=self.travel_option.pk)
+        second = TravelOption.objects.get(pk=self.travel_option.pk)
+        Booking.create_booking(self.user, first, 1, passengers)
+        with self.assertRaises(SeatsUnavailable):
+            Booking.create_booking(self.other, second, 1, passengers)
+
+        self.client.force_login(self.other)
+        # Validation passed on a stale read; the decrement still refuses the seat
+        with mock.patch.object(CreateBookingSerializer, 'validate', lambda serializer, attrs: attrs):
+            response = self.client.post('/api/bookings/', {
+                'travel_option': self.travel_option.travel_id, 'number_of_seats': 1, 'passenger_details': passengers,
+            }, content_type='application/json')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['detail'], SoldOut.default_detail)
+        self.travel_option.refresh_from_db()
+        self.assertEqual(self.travel_option.available_seats, 0)
+        self.assertEqual(Booking.objects.count(), 1)
+
+
+class TravelOptionTimestampTests(TravelTestCase):
+    """departure_at/arrival_at follow the local date and time columns and bound searches"""
+
+    def setUp(self):
+        super().setUp()
+        search_cache.reset()
+        self.addCleanup(search_cache.reset)
+
+    def option(self, departure, hours):
+        return self.make_option(departure, hours, type='train', source='Patna', destination='Ranchi', price=600)
+
+    def test_timestamps_follow_date_and_time(self):
+        departure = datetime.combine(timezone.localdate() + timedelta(days=4), time(23, 30))
+        option = self.option(departure, 1.75)
+        tz = timezone.get_default_timezone()
+        self.assertEqual(option.departure_at, timezone.make_aware(departure, tz))
+        self.assertEqual(option.arrival_at, timezone.make_aware(departure + timedelta(hours=1.75), tz))
+
+        option.departure_time = time(22, 0)
+        option.save(update_fields=['departure_time'])
+        option.refresh_from_db()
+        self.assertEqual(option.departure_at, timezone.make_aware(departure - timedelta(minutes=90), tz))
+        self.assertEqual(option.duration, timedelta(hours=3, minutes=15))
+
+    def test_search_skips_departed_options(self):
+        departed = self.option(timezone.localtime().replace(tzinfo=None) - timedelta(hours=1), 3)
+        upcoming = self.option(timezone.localtime().replace(tzinfo=None) + timedelta(hours=1), 3)
+        response = self.client.get('/api/travel-search/', {'source': 'Patna'})
+        ids = [row['travel_id'] for row in response.json()['results']]
+        self.assertEqual(ids, [upcoming.pk])
+        self.assertNotIn(departed.pk, ids)
+
+
+class CityNameFieldTests(TravelTestCase):
+    """Travel option payloads and listing filters name their cities; new cities are only created on save"""
+
+    def payload(self, **fields):
+        departure = timezone.localdate() + timedelta(days=5)
+        return {
+            'type': 'flight', 'operator_name': 'IndiGo', 'source': ' delhi ', 'destination': 'Surat',
+            'departure_date': departure.isoformat(), 'departure_time': '07:00',
+            'arrival_date': departure.isoformat(), 'arrival_time': '09:00', 'duration': '02:00:00',
+            'price': '4200.00', 'available_seats': 100, 'total_seats': 100, **fields,
+        }
+
+    def test_rejected_payload_creates_no_cities(self):
+        delhi = City.objects.create(name='Delhi')
+        serializer = TravelOptionSerializer(data=self.payload(price='cheap'))
+        self.assertFalse(serializer.is_valid())
+        self.assertEqual(list(City.objects.values_list('name', flat=True)), ['Delhi'])
+
+        serializer = TravelOptionSerializer(data=self.payload())
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        option = serializer.save()
+        self.assertEqual(option.source, delhi)
+        self.assertEqual(option.destination.name, 'Surat')
+        self.assertEqual(City.objects.count(), 2)
+
+    def test_listing_filters_by_city_name(self):
+        outbound = self.make_option(source='New Delhi', destination='Surat')
+        self.make_option(source='Surat', destination='New Delhi')
+        self.client.force_login(User.objects.create_user('lister', password='lister-pass'))
+        for params in ({'source': 'new  delhi'}, {'destination': 'SURAT'}, {'source': 'New Delhi', 'destination': 'Surat'}):
+            with self.subTest(params=params):
+                response = self.client.get('/api/travel-options/', params)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual([row['travel_id'] for row in response.json()['results']], [outbound.pk])
+        response = self.client.get('/api/travel-options/', {'source': 'Nowhere'})
+        self.assertEqual(response.json()['results'], [])
+
+    def test_imported_cities_join_the_live_index(self):
+        departure = timezone.localdate() + timedelta(days=2)
+        records = [{
+            'type': 'bus', 'operator_name': 'Operator', 'source': f'Town {i}', 'destination': f'Town {i + 1}',
+            'departure_date': departure.isoformat(), 'departure_time': '08:00',
+            'arrival_date': departure.isoformat(), 'arrival_time': '12:00', 'price': 300, 'total_seats': 30,
+        } for i in range(40)]
+        city_index.resolve('Delhi')
+        # One index load per import, not one per new city
+        with mock.patch.object(city_index, '_build', wraps=city_index._build) as build:
+            with self.captureOnCommitCallbacks(execute=True):
+                TimetableImporter().run(records)
+        build.assert_not_called()
+        town = City.objects.get(name='Town 40')
+        with self.assertNumQueries(0):
+            self.assertEqual(city_index.resolve('town 40'), {town.pk})
+            self.assertEqual(len(city_index.resolve('Town')), 41)
+            self.assertIn(town.pk, city_index.resolve('Twon 40'))
+
+
+class KeysetPaginationTests(TravelTestCase):
+    """?cursor= pages by (departure_at, travel_id) without gaps or repeats; page numbers stay as they were"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('pager', password='pager-pass')
+        start = timezone.localtime().replace(microsecond=0) + timedelta(days=1)
+        # Eight options share each departure, so pages split ties
+        cls.options = [
+            cls.make_option(start + timedelta(hours=i % 3), operator_name=f'Operator {i}', source='Kanpur')
+            for i in range(24)
+        ]
+
+    def setUp(self):
+        super().setUp()
+        search_cache.reset()
+        inventory_index.reset()
+        self.addCleanup(search_cache.reset)
+        self.addCleanup(inventory_index.reset)
+        self.client.force_login(self.user)
+
+    def test_cursor_pages_split_ties(self):
+        expected = [option.pk for option in sorted(self.options, key=lambda option: (option.departure_at, option.pk))]
+        for path in ('/api/travel-options/', '/api/travel-search/'):
+            with self.subTest(path=path):
+                seen, url, params = [], path, {'source': 'Kanpur', 'cursor': ''}
+                while url:
+                    page = self.client.get(url, params).json()
+                    self.assertNotIn('count', page)
+                    seen.extend(row['travel_id'] for row in page['results'])
+                    url, params = page['next'], None
+                self.assertEqual(seen, expected)
+
+    def test_invalid_cursors_are_rejected(self):
+        def encode(values):
+            return TravelOptionPagination().encode_cursor(values)
+
+        for cursor in ('not-a-cursor', encode(['yesterday', 1]), encode([1]), encode({'departure_at': 1})):
+            with self.subTest(cursor=cursor):
+                response = self.client.get('/api/travel-options/', {'cursor': cursor})
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json()['detail'], 'Invalid cursor')
+
+    def test_page_numbers_without_cursor(self):
+        first = self.client.get('/api/travel-options/').json()
+        self.assertEqual((first['count'], len(first['results']), first['previous']), (24, 10, None))
+        self.assertEqual(parse_qs(urlsplit(first['next']).query), {'page': ['2']})
+        last = self.client.get('/api/travel-options/', {'page': 3}).json()
+        self.assertEqual((len(last['results']), last['next']), (4, None))
+        self.assertEqual(self.client.get('/api/travel-options/', {'page': 4}).status_code, 404)
+
+
+class SearchCacheTests(TravelTestCase):
+    """Search responses are cached per query, ordering included, until the route changes"""
+
+    @classmethod
+    def setUpTestData(cls):
+        departure = timezone.localtime() + timedelta(days=2)
+        cls.options = [
+            cls.make_option(
+                departure, 8, type='train', operator_name=f'Operator {price}', source='Chennai',
+                destination='Madurai', price=price, available_seats=5,
+            )
+            for price in (700, 300, 500)
+        ]
+
+    def setUp(self):
+        super().setUp()
+        search_cache.reset()
+        self.addCleanup(search_cache.reset)
+
+    def search(self, **params):
+        response = self.client.get('/api/travel-search/', {'source': 'Chennai', 'destination': 'Madurai', **params})
+        return [row['price'] for row in response.json()['results']]
+
+    def test_ordering_is_part_of_the_key(self):
+        self.assertEqual(self.search(ordering='price'), ['300.00', '500.00', '700.00'])
+        self.assertEqual(self.search(ordering='-price'), ['700.00', '500.00', '300.00'])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.search(ordering='price'), ['300.00', '500.00', '700.00'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.options[1].reserve_seats(5)
+        self.assertEqual(self.search(ordering='price'), ['500.00', '700.00'])
+
+    @override_settings(SEARCH_CACHE={**settings.SEARCH_CACHE, 'CACHE_ALIAS': 'default'})
+    def test_shared_cache_client_per_thread(self):
+        search_cache.reset()
+        key = search_cache.make_key({'source': [1]})
+        search_cache.set(key, {'results': []})
+        with mock.patch.object(LocMemCache, 'get', autospec=True, side_effect=LocMemCache.get) as get:
+            self.assertEqual(search_cache.get(key), {'results': []})
+            thread = threading.Thread(target=search_cache.get, args=(key,))
+            thread.start()
+            thread.join()
+        # Each thread talks to the cache through its own backend client
+        (main, _), (other, _) = (call.args for call in get.call_args_list)
+        self.assertIsNot(main, other)
+        self.assertIs(main, caches['default'])
+
+
+class TravelOptionRowTests(TravelTestCase):
+    """Listings rendered from .values() rows match TravelOptionSerializer exactly"""
+
+    @classmethod
+    def setUpTestData(cls):
+        departure = timezone.localtime() + timedelta(days=2)
+        for i, price in enumerate(('899.5', '1200', '15000.99')):
+            cls.make_option(
+                departure, i + 1.25, type=('flight', 'train', 'bus')[i], operator_name=f'Operator {i}',
+                source='Goa', destination='Hyderabad', price=price, available_seats=5, total_seats=9,
+            )
+
+    def test_rows_match_serializer(self):
+        queryset = TravelOption.objects.select_related('source', 'destination').order_by('travel_id')
+        for tz in ('UTC', 'Asia/Kolkata'):
+            with timezone.override(tz):
+                self.assertEqual(
+                    travel_option_rows_to_data(queryset.values(*TRAVEL_OPTION_ROW_FIELDS)),
+                    [dict(row) for row in TravelOptionSerializer(queryset, many=True).data],
+                )
+
+
+class BookingQueryBudgetTests(TravelTestCase):
+    """A page of bookings costs a constant number of queries, whatever its size"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('budget', password='budget-pass')
+        cls.travel_options = [
+            cls.make_option(type='flight', operator_name=f'Operator {i}', price=1000, available_seats=50)
+            for i in range(10)
+        ]
+
+    def book(self, count):
+        for i in range(count):
+            Booking.create_booking(
+                self.user, self.travel_options[i % len(self.travel_options)], 1,
+                [{'name': 'Passenger', 'age': 30}]
+            )
+
+    def test_booking_list_page_number(self):
+        self.client.force_login(self.user)
+        self.book(10)
+        # session, user, ETag validator, COUNT(*), page of bookings with joined travel options
+        with self.assertNumQueries(5):
+            response = self.client.get('/api/bookings/')
+        self.assertEqual(len(response.json()['results']), 10)
+
+    def test_booking_list_cursor(self):
+        self.client.force_login(self.user)
+        self.book(10)
+        # session, user, ETag validator, page of bookings with joined travel options
+        with self.assertNumQueries(4):
+            response = self.client.get('/api/bookings/?cursor=')
+        self.assertEqual(len(response.json()['results']), 10)
+
+    def test_booking_detail(self):
+        self.client.force_login(self.user)
+        self.book(1)
+        booking = Booking.objects.get()
+        with self.assertNumQueries(4):
+            response = self.client.get(f'/api/bookings/{booking.booking_id}/')
+        self.assertEqual(response.json()['user']['username'], 'budget')
+
+    def test_booking_list_not_modified(self):
+        self.client.force_login(self.user)
+        self.book(3)
+        etag = self.client.get('/api/bookings/').headers['ETag']
+        # session, user, ETag validator; nothing is fetched or serialized
+        with self.assertNumQueries(3):
+            response = self.client.get('/api/bookings/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.headers['ETag'], etag)
+
+        # Seats taken on a booked option change the embedded travel option
+        self.travel_options[0].reserve_seats(1)
+        response = self.client.get('/api/bookings/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers['ETag'], etag)
+
+
+class TimetableImportTests(TestCase):
+    """Re-importing an option updates it in place and keeps the seats already booked"""
+
+    def test_reimport_keeps_booked_seats(self):
+        departure = timezone.localdate() + timedelta(days=3)
+        record = {
+            'type': 'train', 'operator_name': 'Rajdhani', 'source': 'Delhi', 'destination': 'Kolkata',
+            'departure_date': departure.isoformat(), 'departure_time': '16:00',
+            'arrival_date': (departure + timedelta(days=1)).isoformat(), 'arrival_time': '10:00',
+            'price': 2500, 'total_seats': 40,
+        }
+        TimetableImporter().run([record])
+        option = TravelOption.objects.get()
+        user = User.objects.create_user('importer', password='importer-pass')
+        Booking.create_booking(user, option, 3, [{'name': 'Passenger', 'age': 30}] * 3)
+
+        report = TimetableImporter().run([{**record, 'price': 2700, 'total_seats': 50}])
+        self.assertEqual((report['created'], report['updated']), (0, 1))
+        option.refresh_from_db()
+        self.assertEqual((option.price, option.total_seats, option.available_seats), (2700, 50, 47))
+
+    def test_upload_size_limit(self):
+        departure = timezone.localdate() + timedelta(days=3)
+        timetable = (
+            'type,operator_name,source,destination,departure_date,departure_time,arrival_date,arrival_time,price,total_seats\n'
+            f'bus,Operator,Delhi,Agra,{departure},08:00,{departure},12:00,400,40\n'
+        ).encode()
+        self.client.force_login(User.objects.create_superuser('admin', password='admin-pass'))
+
+        def upload():
+            return self.client.post('/api/travel-options/import/', {
+                'file': SimpleUploadedFile('timetable.csv', timetable, content_type='text/csv'),
+            })
+
+        with override_settings(TIMETABLE_UPLOAD_MAX_BYTES=len(timetable) - 1):
+            response = upload()
+        self.assertEqual(response.status_code, 413)
+        self.assertIn('import_timetable', response.json()['error'])
+        self.assertFalse(TravelOption.objects.exists())
+
+        response = upload()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['created'], 1)
+
+
+class BookingSummaryTests(TravelTestCase):
+    """Profile statistics come from the maintained summary row and match the booking history"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('traveller', password='traveller-pass')
+        cls.options = [
+            cls.make_option(
+                timezone.localtime() + timedelta(days=days), 6, operator_name=f'Operator {days}',
+                source='Shimla', destination='Manali', price=400 + days,
+            )
+            for days in (5, 2, 9)
+        ]
+
+    def test_counters_and_next_trip(self):
+        passengers = [{'name': 'Passenger', 'age': 30}] * 2
+        later, sooner, hold_option = self.options
+        later_booking = Booking.create_booking(self.user, later, 2, passengers)
+        sooner_booking = Booking.create_booking(self.user, sooner, 2, passengers)
+        hold = Booking.hold_seats(self.user, hold_option, 2, passengers)
+        self.assertTrue(hold.confirm_hold())
+        sooner_booking.cancel_booking()
+
+        self.client.force_login(self.user)
+        # session, user, summary with the next trip joined in
+        with self.assertNumQueries(3):
+            stats = self.client.get('/api/profile/stats/').json()
+        bookings = Booking.objects.filter(user=self.user)
+        confirmed = bookings.filter(status='confirmed')
+        self.assertEqual(
+            {key: stats[key] for key in ('total_bookings', 'confirmed_bookings', 'pending_bookings', 'cancelled_bookings')},
+            {
+                'total_bookings': bookings.count(),
+                'confirmed_bookings': confirmed.count(),
+                'pending_bookings': bookings.filter(status='pending').count(),
+                'cancelled_bookings': bookings.filter(status='cancelled').count(),
+            },
+        )
+        self.assertEqual(Decimal(stats['total_spent']), sum(booking.total_price for booking in confirmed))
+        # The cancelled trip departed first; the next one is the later booking
+        self.assertEqual(stats['next_trip']['booking_id'], later_booking.booking_id)
+
+
+class ConnectionGraphTests(TravelTestCase):
+    """Itineraries with transfers come from the in-memory graph, which follows updated_at"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.nagpur, bhopal, cls.indore = (City.objects.create(name=name) for name in ('Nagpur', 'Bhopal', 'Indore'))
+        cls.start = timezone.localtime().replace(microsecond=0) + timedelta(days=1)
+
+        def option(source, destination, hours, duration, price):
+            return cls.make_option(
+                cls.start + timedelta(hours=hours), duration, operator_name=f'{source.name} {destination.name}',
+                source=source, destination=destination, price=price,
+            )
+
+        cls.direct = option(cls.nagpur, cls.indore, 0, 10, 3000)
+        cls.first_leg = option(cls.nagpur, bhopal, 0, 3, 800)
+        cls.second_leg = option(bhopal, cls.indore, 4, 2, 700)
+
+    def search(self, graph, sort='arrival'):
+        itineraries = graph.search(
+            [self.nagpur.pk], [self.indore.pk], self.start - timedelta(hours=1), self.start + timedelta(days=1), sort=sort
+        )
+        return [[leg.travel_id for leg in path] for path in itineraries]
+
+    def test_transfers_and_ranking(self):
+        graph = ConnectionGraph()
+        via_bhopal, direct = [self.first_leg.pk, self.second_leg.pk], [self.direct.pk]
+        self.assertEqual(self.search(graph), [via_bhopal, direct])
+        self.assertEqual(self.search(graph, 'price'), [via_bhopal, direct])
+        self.assertEqual(self.search(graph, 'transfers'), [direct, via_bhopal])
+
+    def test_refresh_merges_changes(self):
+        graph = ConnectionGraph(refresh_interval=0)
+        self.assertEqual(len(self.search(graph)), 2)
+        # Committed just after the rebuild, but stamped before it started
+        TravelOption.objects.filter(pk=self.second_leg.pk).update(
+            available_seats=0, updated_at=timezone.now() - timedelta(seconds=1)
+        )
+        self.assertEqual(self.search(graph), [[self.direct.pk]])
+
+        TravelOption.objects.filter(pk=self.direct.pk).update(
+            departure_at=timezone.now() + timedelta(days=60), updated_at=timezone.now()
+        )
+        self.assertEqual(self.search(graph), [])
+        legs, departures = graph._graph
+        self.assertNotIn(self.direct.pk, legs)
+        self.assertEqual([travel_id for _, travel_id in departures[self.nagpur.pk]], [self.first_leg.pk])
+
+    def test_search_endpoint(self):
+        def get(**params):
+            return self.client.get('/api/connection-search/', {
+                'source': 'Nagpur', 'destination': 'Indore', 'date': self.start.date().isoformat(), **params,
+            })
+
+        for params, error in (
+            ({'destination': ''}, 'Source and destination are required'),
+            ({'sort': 'comfort'}, 'Sort must be one of: arrival, price, transfers'),
+            ({'types': 'bus, Boat'}, 'Unknown travel type: boat'),
+        ):
+            with self.subTest(params=params):
+                response = get(**params)
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json()['error'], error)
+
+        # Built once and never refreshed during the test
+        with mock.patch('core.views.connection_graph', ConnectionGraph(refresh_interval=3600, rebuild_interval=3600)):
+            results = get().json()['results']
+            via_bhopal, direct = results
+            self.assertEqual(set(via_bhopal), {'departure_at', 'arrival_at', 'duration', 'total_price', 'transfers', 'legs'})
+            self.assertEqual(
+                [leg['travel_id'] for leg in via_bhopal['legs']], [self.first_leg.pk, self.second_leg.pk]
+            )
+            self.assertEqual((via_bhopal['total_price'], via_bhopal['transfers']), ('1500.00', 1))
+            self.assertEqual(via_bhopal['departure_at'], via_bhopal['legs'][0]['departure_at'])
+            self.assertEqual(via_bhopal['arrival_at'], via_bhopal['legs'][1]['arrival_at'])
+            self.assertEqual(via_bhopal['duration'], '06:00:00')
+            self.assertEqual((direct['transfers'], direct['legs'][0]['source']), (0, 'Nagpur'))
+
+            # Still in the graph, but gone from the table
+            self.second_leg.delete()
+            results = get().json()['results']
+            self.assertEqual([[leg['travel_id'] for leg in path['legs']] for path in results], [[self.direct.pk]])
+
+
+class FareCalendarTests(TravelTestCase):
+    """Fare calendar cells follow imports, bookings and cancellations; the endpoint reads only them"""
+
+    def test_large_multi_date_chunk(self):
+        names = [f'City {i}' for i in range(16)]
+        first_day = timezone.localdate() + timedelta(days=1)
+        records = []
+        for i in range(2000):
+            day = first_day + timedelta(days=i % 90)
+            source = i % 16
+            destination = (source + 1 + i // 7 % 15) % 16
+            records.append({
+                'type': 'bus', 'operator_name': f'Operator {i % 7}',
+                'source': names[source], 'destination': names[destination],
+                'departure_date': day.isoformat(), 'departure_time': f'{i % 24:02d}:{i // 24 % 60:02d}',
+                'arrival_date': (day + timedelta(days=1)).isoformat(), 'arrival_time': '06:00',
+                'price': 100 + i % 50, 'total_seats': 40,
+            })
+        with self.captureOnCommitCallbacks(execute=True):
+            report = TimetableImporter().run(records)
+        self.assertEqual(report['created'], TravelOption.objects.count())
+
+        expected = {
+            (row['source_id'], row['destination_id'], row['travel_date']): row
+            for row in RouteDayFare.aggregate_options(TravelOption.objects.all())
+        }
+        cells = {
+            (row['source_id'], row['destination_id'], row['travel_date']): row
+            for row in RouteDayFare.objects.values(
+                'source_id', 'destination_id', 'travel_date', 'min_price', 'option_count', 'seats_left'
+            )
+        }
+        self.assertGreater(len(cells), 1000)
+        self.assertEqual(cells, expected)
+
+    def calendar(self, first_day, days, **params):
+        return self.client.get('/api/fare-calendar/', {
+            'source': 'Delhi', 'destination': 'agra', 'date_from': first_day.isoformat(),
+            'date_to': (first_day + timedelta(days=days - 1)).isoformat(), **params,
+        })
+
+    def test_endpoint_follows_bookings(self):
+        first_day = timezone.localdate() + timedelta(days=2)
+
+        def at_ten(day):
+            return timezone.make_aware(datetime.combine(first_day + timedelta(days=day), time(10)))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.make_option(at_ten(0), destination='Agra', price=400, available_seats=10)
+            cheap = self.make_option(at_ten(0), destination='Agra', price=300, available_seats=5)
+            self.make_option(at_ten(2), destination='Agra', price=700, available_seats=2)
+
+        def days():
+            response = self.calendar(first_day, 3)
+            self.assertEqual(response.status_code, 200)
+            return [(day['min_price'], day['option_count'], day['seats_left']) for day in response.json()['results']]
+
+        # The day without options is still listed
+        self.assertEqual(days(), [('300.00', 2, 15), (None, 0, 0), ('700.00', 1, 2)])
+
+        user = User.objects.create_user('planner', password='planner-pass')
+        with self.captureOnCommitCallbacks(execute=True):
+            booking = Booking.create_booking(user, cheap, 5, [{'name': 'Passenger', 'age': 30}] * 5)
+        self.assertEqual(days()[0], ('400.00', 1, 10))
+        with self.captureOnCommitCallbacks(execute=True):
+            booking.cancel_booking()
+        self.assertEqual(days()[0], ('300.00', 2, 15))
+
+    def test_endpoint_validation(self):
+        first_day = timezone.localdate()
+        self.assertEqual(len(self.calendar(first_day, FareCalendarView.max_days).json()['results']), 92)
+        for params in ({'days': FareCalendarView.max_days + 1}, {'days': 0}):
+            with self.subTest(params=params):
+                response = self.calendar(first_day, **params)
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json()['error'], 'Date range must be between 1 and 92 days')
+        response = self.calendar(first_day, 1, destination='')
+        self.assertEqual(response.status_code, 400)
+
+
+class BookingExportTests(TravelTestCase):
+    """Exports page through bookings by key: every passenger row exactly once"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('exporter', password='exporter-pass')
+        other = User.objects.create_user('bystander', password='bystander-pass')
+        travel_option = cls.make_option(
+            timezone.localtime() + timedelta(days=3), type='flight', source='Lucknow', destination='Varanasi',
+            price=2100, available_seats=50,
+        )
+        for i in range(7):
+            seats = 1 + i % 2
+            Booking.create_booking(cls.user, travel_option, seats, [{'name': f'Passenger {i}', 'age': 30}] * seats)
+        Booking.create_booking(other, travel_option, 1, [{'name': 'Someone else', 'age': 40}])
+
+    def test_keyset_chunks_cover_every_row_once(self):
+        queryset = export_queryset(user=self.user)
+        # Three chunks of at most three bookings, then the empty one that ends the export
+        with self.assertNumQueries(4):
+            records = [json.loads(line) for line in iter_export_lines(queryset, 'ndjson', chunk_size=3)]
+        expected = [
+            (booking.booking_id, index)
+            for booking in Booking.objects.filter(user=self.user).order_by('booking_id')
+            for index in range(1, booking.number_of_seats + 1)
+        ]
+        self.assertEqual([(record['booking_id'], record['passenger_index']) for record in records], expected)
+
+        self.client.force_login(self.user)
+        response = self.client.get('/api/bookings/export/', {'output': 'csv'})
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0].split(','), EXPORT_HEADER)
+        self.assertEqual(len(lines) - 1, len(expected))
+        self.assertNotIn('Someone else', '\n'.join(lines))
+
+    def test_status_filter(self):
+        Booking.objects.filter(user=self.user).first().cancel_booking()
+        self.client.force_login(self.user)
+        response = self.client.get('/api/bookings/export/', {'output': 'ndjson', 'status': 'Cancelled'})
+        records = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual({record['status'] for record in records}, {'cancelled'})
+
+        response = self.client.get('/api/bookings/export/', {'status': 'refunded'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['error'], 'Status must be one of: pending, confirmed, cancelled')
+
+
+@override_settings(SEARCH_CACHE={**settings.SEARCH_CACHE, 'ENABLED': False})
+class AsyncViewTests(TravelTestCase):
+    """The native async read views return the same JSON as the DRF views they stand in for"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('async', password='async-pass')
+        start = timezone.localtime() + timedelta(days=1)
+        for i in range(12):
+            cls.make_option(
+                start + timedelta(hours=5 * i), 3, type=('bus', 'train')[i % 2], operator_name=f'Operator {i}',
+                source='Surat', destination=('Pune', 'Goa')[i % 3 == 0], price=500 + 37 * (i % 5), available_seats=4,
+            )
+
+    def setUp(self):
+        super().setUp()
+        search_cache.reset()
+        inventory_index.reset()
+        self.addCleanup(search_cache.reset)
+        self.addCleanup(inventory_index.reset)
+        self.headers = {'HTTP_AUTHORIZATION': f'Bearer {RefreshToken.for_user(self.user).access_token}'}
+
+    def responses(self, path, sync_view, async_view, params):
+        sync_response = sync_view.as_view()(RequestFactory().get(path, params, **self.headers)).render()
+        async_response = async_to_sync(async_view.as_view())(RequestFactory().get(path, params, **self.headers))
+        self.assertEqual(async_response.status_code, sync_response.status_code)
+        return json.loads(async_response.content), json.loads(sync_response.content)
+
+    def test_search_and_listing_match(self):
+        views_by_path = {
+            '/api/travel-search/': (TravelSearchView, TravelSearchAsyncView),
+            '/api/travel-options/': (TravelOptionListCreateView, TravelOptionListAsyncView),
+        }
+        queries = [
+            {'source': 'Surat'},
+            {'source': 'Surat', 'cursor': ''},
+            {'source': 'surat', 'destination': 'Pune', 'type': 'bus', 'max_price': '600'},
+            {'source': 'Surat', 'ordering': '-price', 'page': '2'},
+            {'cursor': 'not-a-cursor'},
+        ]
+        for path, (sync_view, async_view) in views_by_path.items():
+            for params in queries:
+                with self.subTest(path=path, params=params):
+                    async_data, sync_data = self.responses(path, sync_view, async_view, params)
+                    self.assertEqual(async_data, sync_data)
+            # Following the keyset cursor gives the same second page
+            first, _ = self.responses(path, sync_view, async_view, {'cursor': ''})
+            cursor = parse_qs(urlsplit(first['next']).query)['cursor'][0]
+            async_data, sync_data = self.responses(path, sync_view, async_view, {'cursor': cursor})
+            self.assertEqual(async_data, sync_data)
+            self.assertTrue(async_data['results'])
+
+
+class ConditionalGetTests(TravelTestCase):
+    """ETags follow writes to listed rows and differ per user and per Accept header"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('etag', password='etag-pass')
+        cls.other = User.objects.create_user('other-etag', password='other-etag-pass')
+        cls.options = [cls.make_option(operator_name=f'Operator {i}', source='Mysore') for i in range(3)]
+
+    def etag(self, path, **headers):
+        response = self.client.get(path, **headers)
+        self.assertEqual(response.status_code, 200)
+        return response.headers['ETag']
+
+    def test_writes_change_the_etag(self):
+        self.client.force_login(self.user)
+        detail = f'/api/travel-options/{self.options[1].pk}/'
+        listing, before = self.etag('/api/travel-options/'), self.etag(detail)
+        self.assertEqual(self.client.get(detail, HTTP_IF_NONE_MATCH=before).status_code, 304)
+
+        self.options[1].price = 650
+        self.options[1].save()
+        self.assertNotEqual(self.etag('/api/travel-options/'), listing)
+        response = self.client.get('/api/travel-options/', HTTP_IF_NONE_MATCH=listing)
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get(detail, HTTP_IF_NONE_MATCH=before)
+        self.assertEqual((response.status_code, response.json()['price']), (200, '650.00'))
+
+    def test_etag_is_per_user(self):
+        Booking.create_booking(self.user, self.options[0], 1, [{'name': 'Passenger', 'age': 30}])
+        Booking.create_booking(self.other, self.options[0], 1, [{'name': 'Passenger', 'age': 30}])
+        self.client.force_login(self.user)
+        mine = self.etag('/api/bookings/')
+        self.client.force_login(self.other)
+        theirs = self.etag('/api/bookings/')
+        self.assertNotEqual(theirs, mine)
+        self.assertEqual(self.client.get('/api/bookings/', HTTP_IF_NONE_MATCH=mine).status_code, 200)
+
+        # Bookings embed the user block, so renaming the user changes it too
+        self.other.first_name = 'Renamed'
+        self.other.save()
+        self.client.force_login(self.other)
+        response = self.client.get('/api/bookings/', HTTP_IF_NONE_MATCH=theirs)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'][0]['user']['first_name'], 'Renamed')
+
+    def test_etag_varies_with_accept(self):
+        self.client.force_login(self.user)
+        as_json = self.etag('/api/travel-options/', HTTP_ACCEPT='application/json')
+        self.assertNotEqual(self.etag('/api/travel-options/', HTTP_ACCEPT='text/html'), as_json)
+        response = self.client.get('/api/travel-options/', HTTP_ACCEPT='text/html', HTTP_IF_NONE_MATCH=as_json)
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get('/api/travel-options/', HTTP_ACCEPT='application/json', HTTP_IF_NONE_MATCH=as_json)
+        self.assertEqual(response.status_code, 304)
+
+
+class MetricsTests(SimpleTestCase):
+    """Multi-process metrics sum every worker; exited workers keep counters but not gauges"""
+
+    def test_exited_worker_gauges_are_dropped(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        dead_pid = os.getpid() + 100000
+        labels = (('view', 'api-bookings'), ('method', 'POST'), ('status', '201'))
+        with open(os.path.join(directory.name, f'metrics-{dead_pid}.json'), 'w') as f:
+            json.dump([
+                ['travel_http_requests_total', [list(pair) for pair in labels], 3.0],
+                ['travel_admission_writes_in_flight', [], 2.0],
+            ], f)
+
+        with override_settings(METRICS={**settings.METRICS, 'MULTIPROCESS_DIR': directory.name}):
+            registry = MetricsRegistry()
+            registry.inc('travel_http_requests_total', labels)
+            registry.set('travel_admission_writes_in_flight', (), 1)
+            samples = registry.collect()
+            self.assertEqual(samples[('travel_http_requests_total', labels)], 4.0)
+            self.assertEqual(samples[('travel_admission_writes_in_flight', ())], 3.0)
+
+            mark_process_dead(dead_pid)
+            samples = registry.collect()
+            self.assertEqual(samples[('travel_http_requests_total', labels)], 4.0)
+            self.assertEqual(samples[('travel_admission_writes_in_flight', ())], 1.0)
+            self.assertIn('travel_admission_writes_in_flight 1.0\n', registry.exposition())
+
+
+class LoadBenchmarkTests(TestCase):
+    """The load benchmark's seeded dataset and its baseline regression check"""
+
+    def test_same_seed_builds_the_same_dataset(self):
+        fields = ('type', 'operator_name', 'source__name', 'destination__name', 'departure_at', 'price', 'total_seats')
+        self.assertEqual(seed_travel_options(50, batch_size=20, seed=3), 50)
+        first = list(TravelOption.objects.order_by('travel_id').values_list(*fields))
+        TravelOption.objects.all().delete()
+        seed_travel_options(50, batch_size=20, seed=3)
+        self.assertEqual(list(TravelOption.objects.order_by('travel_id').values_list(*fields)), first)
+        self.assertEqual(
+            sum(RouteDayFare.objects.values_list('option_count', flat=True)),
+            TravelOption.objects.count(),
+        )
+        users = create_users(2)
+        self.assertEqual([user.username for user, _ in users], ['bench0', 'bench1'])
+
+    def test_regressions_against_the_baseline_fail_the_run(self):
+        baseline = json.loads((BASELINE_DIR / 'sqlite.json').read_text())['results']
+        self.assertEqual(compare(baseline, baseline, 0.5), [])
+
+        results = {name: dict(row) for name, row in baseline.items()}
+        results['search']['p95_ms'] = baseline['search']['p95_ms'] * 1.4
+        results['book']['throughput'] = baseline['book']['throughput'] * 0.6
+        self.assertEqual(compare(results, baseline, 0.5), [])
+
+        results['search']['p95_ms'] = baseline['search']['p95_ms'] * 1.6
+        results['book']['throughput'] = baseline['book']['throughput'] * 0.4
+        results['cancel']['errors'] = 2
+        failures = compare(results, baseline, 0.5)
+        self.assertEqual(len(failures), 3)
+        self.assertTrue(failures[0].startswith('search: p95'))
+        self.assertTrue(failures[1].startswith('book: '))
+        self.assertEqual(failures[2], 'cancel: 2 failed requests')
+
+    def test_percentile(self):
+        samples = [0.005, 0.001, 0.003, 0.002, 0.004]
+        self.assertEqual(percentile(samples, 50), 0.003)
+        self.assertEqual(percentile(samples, 99), 0.005)
+        self.assertEqual(percentile([], 95), 0.0)
+
+
+class SeatHoldTests(TravelTestCase):
+    """Holds reserve seats as pending bookings; the sweeper releases lapsed ones"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('holder', password='holder-pass')
+        cls.travel_option = cls.make_option(type='train', source='Pune', destination='Goa')
+
+    def hold(self, seats=1):
+        self.client.force_login(self.user)
+        response = self.client.post('/api/bookings/hold/', {
+            'travel_option': self.travel_option.travel_id,
+            'number_of_seats': seats,
+            'passenger_details': [{'name': 'Passenger', 'age': 30}] * seats,
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        return response.json()
+
+    def test_confirm_hold(self):
+        booking = self.hold(2)
+        self.assertEqual(booking['status'], 'pending')
+        response = self.client.post(f"/api/bookings/{booking['booking_id']}/confirm/")
+        self.assertEqual(response.json()['status'], 'confirmed')
+        self.assertIsNone(response.json()['expires_at'])
+        summary = BookingSummary.objects.get(user=self.user)
+        self.assertEqual((summary.pending_bookings, summary.confirmed_bookings, summary.total_spent), (0, 1, 1000))
+
+    def test_expired_holds_are_released(self):
+        kept = self.hold(1)
+        for _ in range(3):
+            self.hold(2)
+        Booking.objects.exclude(booking_id=kept['booking_id']).update(expires_at=timezone.now())
+        self.travel_option.refresh_from_db()
+        self.assertEqual(self.travel_option.available_seats, 3)
+
+        # Batches of two: three lapsed holds take two batches
+        self.assertEqual(Booking.release_expired_holds(batch_size=2), 3)
+        self.travel_option.refresh_from_db()
+        self.assertEqual(self.travel_option.available_seats, 9)
+        summary = BookingSummary.objects.get(user=self.user)
+        self.assertEqual((summary.pending_bookings, summary.cancelled_bookings), (1, 3))
+
+        lapsed = Booking.objects.filter(status='cancelled').first()
+        response = self.client.post(f'/api/bookings/{lapsed.booking_id}/confirm/')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post(f"/api/bookings/{kept['booking_id']}/confirm/")
+        self.assertEqual(response.status_code, 200)
+
+
+class IdempotencyKeyTests(TravelTestCase):
+    """Retries with the same Idempotency-Key replay the first response"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('retrier', password='retrier-pass')
+        cls.travel_option = cls.make_option(source='Indore', destination='Bhopal', price=300)
+
+    def post(self, key, seats=1):
+        return self.client.post('/api/bookings/', {
+            'travel_option': self.travel_option.travel_id,
+            'number_of_seats': seats,
+            'passenger_details': [{'name': 'Passenger', 'age': 30}] * seats,
+        }, content_type='application/json', HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_replay(self):
+        self.client.force_login(self.user)
+        first = self.post('checkout-1')
+        self.assertEqual(first.status_code, 201)
+        # session, user, key lookup; no validation, no TravelOption access
+        with self.assertNumQueries(3):
+            retry = self.post('checkout-1')
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry.json(), first.json())
+        self.assertEqual(retry.headers['Idempotent-Replayed'], 'true')
+        self.assertEqual(Booking.objects.count(), 1)
+        self.travel_option.refresh_from_db()
+        self.assertEqual(self.travel_option.available_seats, 9)
+
+        self.assertEqual(self.post('checkout-1', seats=2).status_code, 422)
+        self.assertEqual(self.post('checkout-2').status_code, 201)
+        self.assertEqual(Booking.objects.count(), 2)
+
+
+@override_settings(ADMISSION={**settings.ADMISSION, 'USER_RATE': 0.1, 'USER_BURST': 2, 'CACHE_ALIAS': None})
+class AdmissionControlTests(TravelTestCase):
+    """Booking writes beyond the user's bucket are rejected before touching the database"""
+
+    def setUp(self):
+        super().setUp()
+        admission.reset()
+        self.addCleanup(admission.reset)
+
+    def test_user_bucket(self):
+        user = User.objects.create_user('spiky', password='spiky-pass')
+        self.client.force_login(user)
+        for _ in range(2):
+            response = self.client.post('/api/bookings/999/cancel/')
+            self.assertEqual(response.status_code, 404)
+        # session, user; no booking lookup
+        with self.assertNumQueries(2):
+            response = self.client.post('/api/bookings/999/cancel/')
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.headers['Retry-After'], '10')
+
+    def test_idempotent_replays_are_not_admitted(self):
+        user = User.objects.create_user('retrying', password='retrying-pass')
+        travel_option = self.make_option(source='Ujjain', destination='Dewas', price=200)
+        payload = {
+            'travel_option': travel_option.travel_id, 'number_of_seats': 1,
+            'passenger_details': [{'name': 'Passenger', 'age': 30}],
+        }
+        self.client.force_login(user)
+        # One token for each first attempt; retries replay without spending any
+        for path, key in (('/api/bookings/', 'book-1'), ('/api/bookings/hold/', 'hold-1')):
+            for _ in range(3):
+                response = self.client.post(path, payload, content_type='application/json', HTTP_IDEMPOTENCY_KEY=key)
+                self.assertEqual(response.status_code, 201)
+        response = self.client.post('/api/bookings/', payload, content_type='application/json', HTTP_IDEMPOTENCY_KEY='book-2')
+        self.assertEqual(response.status_code, 429)
+
+    @override_settings(ADMISSION={
+        **settings.ADMISSION, 'USER_RATE': 0.1, 'USER_BURST': 2, 'TRAVEL_OPTION_RATE': 0.1, 'TRAVEL_OPTION_BURST': 1,
+        'MAX_CONCURRENT_WRITES': 1, 'CACHE_ALIAS': None,
+    })
+    def test_rejected_requests_keep_the_user_tokens(self):
+        user = User.objects.create_user('persistent', password='persistent-pass')
+        busy, quiet = self.make_option(source='Agra', destination='Delhi'), self.make_option(source='Agra')
+        self.client.force_login(user)
+
+        def book(travel_option):
+            return self.client.post('/api/bookings/', {
+                'travel_option': travel_option.travel_id, 'number_of_seats': 1,
+                'passenger_details': [{'name': 'Passenger', 'age': 30}],
+            }, content_type='application/json').status_code
+
+        self.assertEqual(book(busy), 201)
+        # The option's bucket is empty; the user's last token is not spent on it
+        self.assertEqual([book(busy) for _ in range(3)], [429] * 3)
+        # Neither while every write slot is taken
+        self.assertTrue(admission.acquire_slot())
+        self.assertEqual(admission.check(user.pk, quiet.pk)[0], 'rejected_concurrency')
+        admission.release_slot()
+        self.assertEqual(book(quiet), 201)
+        self.assertEqual(book(quiet), 429)
+
+
+class PrincipalCacheTests(TestCase):
+    """JWT requests resolve the user (and profile) from the principal cache"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('cached', password='cached-pass')
+        UserProfile.objects.create(user=self.user, phone_number='111')
+        token = RefreshToken.for_user(self.user).access_token
+        self.headers = {'HTTP_AUTHORIZATION': f'Bearer {token}'}
+
+    def test_profile_reads_and_invalidation(self):
+        self.client.get('/api/profile/', **self.headers)
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/profile/', **self.headers)
+        self.assertEqual(response.json()['phone_number'], '111')
+
+        response = self.client.patch('/api/profile/', {'phone_number': '222'},
+                                     content_type='application/json', **self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get('/api/profile/', **self.headers).json()['phone_number'], '222')
+
+    def test_claims_only_reads(self):
+        BookingSummary.objects.create(user=self.user)
+        # No user lookup at all: just the summary row
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/profile/stats/', **self.headers)
+        self.assertEqual(response.json()['total_bookings'], 0)
+
+
+@override_settings(REPLICA_ROUTING={**settings.REPLICA_ROUTING, 'REPLICAS': ['replica1'], 'CACHE_ALIAS': None})
+class ReplicaRoutingTests(SimpleTestCase):
+    """Opted-in reads go to a replica until the user writes"""
+
+    def setUp(self):
+        # Routing only needs the user's id; TestCase's transaction would pin every read
+        self.user = User(pk=1, username='sticky')
+        self.router = ReplicaRouter()
+        pins = PrimaryPins()
+        patcher = mock.patch('core.routing.primary_pins', pins)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def route(self, method='get', write=False):
+        """The alias a view's read gets, with or without a write before it"""
+        request = getattr(RequestFactory(), method)('/api/search/')
+        request.user = self.user
+        aliases = []
+
+        def view(request):
+            allow_replica_reads(request)
+            if write:
+                self.router.db_for_write(Booking)
+            aliases.append(self.router.db_for_read(TravelOption))
+            return None
+
+        ReplicaRoutingMiddleware(view)(request)
+        return aliases[0]
+
+    def test_reads_stick_to_primary_after_a_write(self):
+        self.assertEqual(self.route(), 'replica1')
+        self.assertEqual(self.route('post'), 'default')
+        self.assertEqual(self.route(write=True), 'default')
+        # Pinned for STICKY_SECONDS
+        self.assertEqual(self.route(), 'default')
+        # Outside a request (commands, the shell) everything uses the primary
+        self.assertIsNone(_state.get())
+        self.assertEqual(self.router.db_for_read(TravelOption), 'default')
+
+
+@override_settings(INVENTORY_INDEX={**settings.INVENTORY_INDEX, 'ENABLED': True, 'REFRESH_INTERVAL': 0})
+class InventoryIndexTests(TravelTestCase):
+    """Route search is answered from the columnar snapshot, refreshed from updated_at"""
+
+    @classmethod
+    def setUpTestData(cls):
+        departure = timezone.localtime() + timedelta(days=2)
+        cls.date_to = (departure + timedelta(days=1)).date().isoformat()
+        cls.options = [
+            cls.make_option(
+                departure, 10, operator_name=f'Operator {price}', source=source, destination=destination,
+                price=price, available_seats=3,
+            )
+            for source, destination, price in (('Pune', 'Goa', 900), ('Pune', 'Goa', 1500), ('Goa', 'Pune', 900))
+        ]
+
+    def setUp(self):
+        super().setUp()
+        inventory_index.reset()
+        search_cache.reset()
+        self.addCleanup(inventory_index.reset)
+
+    def search(self, **params):
+        # Bounded within the horizon, so the snapshot holds every match
+        params = {'cursor': '', 'source': 'Pune', 'date_to': self.date_to, **params}
+        response = self.client.get('/api/travel-search/', params)
+        return [row['travel_id'] for row in response.json()['results']]
+
+    def test_search_and_refresh(self):
+        cheap, dear, _ = self.options
+        self.assertEqual(self.search(), [cheap.pk, dear.pk])
+        # Only the refresh of changed rows
+        with self.assertNumQueries(1):
+            self.assertEqual(self.search(max_price='1000'), [cheap.pk])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            cheap.reserve_seats(3)
+        self.assertEqual(self.search(), [dear.pk])
+
+    def test_ordering_falls_back_to_sql(self):
+        cheap, dear, _ = self.options
+        response = self.client.get('/api/travel-search/', {'source': 'Pune', 'date_to': self.date_to, 'ordering': '-price'})
+        self.assertEqual([row['travel_id'] for row in response.json()['results']], [dear.pk, cheap.pk])
+
+
+class TravelOptionsPageTests(TravelTestCase):
+    """The travel options page embeds the API's first page instead of fetching it"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('browser', password='browser-pass')
+        for hours in range(12):
+            cls.make_option(
+                timezone.localtime() + timedelta(days=1, hours=hours), 4, operator_name=f'Operator {hours}',
+                source='Agra', destination='Jaipur', available_seats=20,
+            )
+
+    def test_first_page_is_embedded(self):
+        self.assertIsNone(self.client.get('/travel-options/').context['initial_options'])
+
+        self.client.force_login(self.user)
+        response = self.client.get('/travel-options/')
+        embedded = response.context['initial_options']
+        self.assertContains(response, 'id="initial-travel-options"')
+        api = self.client.get('/api/travel-options/', {'cursor': ''}).json()
+        self.assertEqual(embedded['results'], api['results'])
+        # The embedded cursor continues the listing like the API's own
+        self.assertEqual(self.client.get(embedded['next']).json(), self.client.get(api['next']).json())
+
+
+class AssetPipelineTests(SimpleTestCase):
+    """Built bundles are linked by hash and served precompressed with far-future caching"""
+
+    def setUp(self):
+        output = tempfile.TemporaryDirectory()
+        self.addCleanup(output.cleanup)
+        self.assets = {**settings.ASSETS, 'ENABLED': True, 'OUTPUT_DIR': output.name}
+
+    def test_minify_js_keeps_literals(self):
+        source = "const a = `x ${ b ? `//y` : '/*z*/' }`; // c\nlet r = /[/]+/g.test(a)\n/* d */ return a - -1\n"
+        self.assertEqual(minify_js(source), "const a=`x ${b?`//y`:'/*z*/'}`;let r=/[/]+/g.test(a)\nreturn a- -1")
+
+    def test_build_and_serve(self):
+        tag = Template("{% load assets %}{% asset_tags 'app.js' %}")
+        with override_settings(ASSETS=self.assets):
+            self.assertEqual(tag.render(Context()), '<script src="/static/js/scripts.js"></script>')
+            report = {bundle['name']: bundle for bundle in build()}['app.js']
+            url = f"/assets/{report['file']}"
+            self.assertEqual(tag.render(Context()), f'<script src="{url}"></script>')
+
+            response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip, deflate')
+            self.assertEqual(response['Content-Encoding'], 'gzip')
+            self.assertIn('immutable', response['Cache-Control'])
+            body = gzip.decompress(b''.join(response.streaming_content))
+            self.assertEqual(len(body), report['minified'])
+            self.assertLess(report['gzip'], report['original'])
+            self.assertEqual(self.client.get('/assets/app.000000000000.js').status_code, 404)
+
+
+class ShellPageCacheTests(TestCase):
+    """Shell pages are rendered once per visitor; pending messages are never cached"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('alice', password='alice-pass')
+        cls.other = User.objects.create_user('bob', password='bob-pass')
+
+    def setUp(self):
+        caches[settings.PAGE_CACHE['CACHE_ALIAS']].clear()
+        self.addCleanup(caches[settings.PAGE_CACHE['CACHE_ALIAS']].clear)
+
+    def test_page_is_cached_per_visitor(self):
+        self.client.force_login(self.user)
+        first = self.client.get('/bookings/')
+        with mock.patch('core.views.render') as render:
+            second = self.client.get('/bookings/')
+        render.assert_not_called()
+        self.assertEqual(second.content, first.content)
+        self.assertContains(second, 'alice')
+
+        self.client.force_login(self.other)
+        response = self.client.get('/bookings/')
+        self.assertContains(response, 'bob')
+        self.assertNotContains(response, 'alice')
+
+    def test_pending_messages_bypass_cache(self):
+        self.client.get('/')
+        self.client.force_login(self.user)
+        response = self.client.get('/logout/', follow=True)
+        self.assertContains(response, 'You have been logged out successfully.')
+        # The message is not served again from a cached copy
+        self.assertNotContains(self.client.get('/'), 'You have been logged out successfully.')
@@ -1,8 +1,22 @@
+from django.conf import settings
 from django.urls import path
 from django.contrib.auth import views as auth_views
 from . import views
+from . import async_views
+from .assets import asset_view
+from .metrics import metrics_view
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
+# Native async views for the hot read endpoints under ASGI (see settings.ASYNC_API)
+if settings.ASYNC_API:
+    travel_option_list_view = async_views.TravelOptionListAsyncView.as_view()
+    travel_search_view = async_views.TravelSearchAsyncView.as_view()
+    booking_list_view = async_views.BookingListAsyncView.as_view()
+else:
+    travel_option_list_view = views.TravelOptionListCreateView.as_view()
+    travel_search_view = views.TravelSearchView.as_view()
+    booking_list_view = views.BookingListCreateView.as_view()
+
 urlpatterns = [
     # Template URLs
     path('', views.home, name='home'),
@@ -21,20 +35,33 @@ urlpatterns = [
     path('api/login/', views.LoginView.as_view(), name='api-login'),
     path('api/logout/', views.LogoutView.as_view(), name='api-logout'),
     path('api/profile/', views.UserProfileView.as_view(), name='api-profile'),
+    path('api/profile/stats/', views.ProfileStatsView.as_view(), name='api-profile-stats'),
+    
+    # Built, content-hashed static bundles (see core.assets)
+    path('assets/<str:name>', asset_view, name='asset'),
+    
+    # Prometheus metrics (see core.metrics)
+    path('api/metrics', metrics_view, name='api-metrics'),
     
     # JWT Token URLs
     path('api/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     
     # Travel Options URLs
-    path('api/travel-options/', views.TravelOptionListCreateView.as_view(), name='api-travel-options'),
+    path('api/travel-options/', travel_option_list_view, name='api-travel-options'),
+    path('api/travel-options/import/', views.TravelOptionImportView.as_view(), name='api-travel-options-import'),
     path('api/travel-options/<int:travel_id>/', views.TravelOptionDetailView.as_view(), name='api-travel-option-detail'),
-    path('api/travel-search/', views.TravelSearchView.as_view(), name='api-travel-search'),
+    path('api/travel-search/', travel_search_view, name='api-travel-search'),
+    path('api/fare-calendar/', views.FareCalendarView.as_view(), name='api-fare-calendar'),
+    path('api/connection-search/', views.ConnectionSearchView.as_view(), name='api-connection-search'),
     
     # Booking URLs
-    path('api/bookings/', views.BookingListCreateView.as_view(), name='api-bookings'),
+    path('api/bookings/', booking_list_view, name='api-bookings'),
+    path('api/bookings/export/', views.BookingExportView.as_view(), name='api-bookings-export'),
+    path('api/bookings/hold/', views.BookingHoldView.as_view(), name='api-booking-hold'),
     path('api/bookings/<int:booking_id>/', views.BookingDetailView.as_view(), name='api-booking-detail'),
     path('api/bookings/<int:booking_id>/cancel/', views.cancel_booking, name='api-cancel-booking'),
+    path('api/bookings/<int:booking_id>/confirm/', views.confirm_booking, name='api-confirm-booking'),
 ]
 
 # Error handlers
@@ -1,24 +1,75 @@
 from django.shortcuts import render, redirect
+from django.http import StreamingHttpResponse
+from django.urls import reverse
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.models import User
 from django.contrib.auth.forms import UserCreationForm
 from django import forms
-from django.db.models import Q
+from django.conf import settings
+from django.db.models import Min, Q, Sum
 from django_filters.rest_framework import DjangoFilterBackend
-from .models import UserProfile, TravelOption, Booking
+from .models import UserProfile, TravelOption, Booking, BookingSummary, RouteDayFare, SeatsUnavailable
+from .city_index import city_index
+from .filters import TravelOptionFilter
+from .connections import SORT_KEYS, connection_graph
+from .inventory import inventory_index
+from .pagination import TravelOptionPagination, BookingPagination
+from .search_cache import search_cache
+from .ingest import TimetableImporter, detect_format, iter_timetable_records, open_text
+from .export import EXPORT_FORMATS, export_queryset, iter_export_lines
+from .conditional import ConditionalGetMixin
+from .idempotency import IdempotentCreateMixin, idempotent_response
+from .admission import AdmissionControlMixin, admission_controlled, admit
+from .authentication import CLAIMS_AUTHENTICATION_CLASSES
+from .routing import ReplicaReadMixin, allow_replica_reads
+from .page_cache import cache_shell_page
 from .serializers import (
     UserSerializer, UserProfileSerializer, RegisterSerializer, 
-    TravelOptionSerializer, BookingSerializer, CreateBookingSerializer
+    TravelOptionSerializer, BookingSerializer, CreateBookingSerializer,
+    BookingSummarySerializer, TRAVEL_OPTION_ROW_FIELDS, travel_option_rows_to_data,
+    itineraries_to_data, SoldOut
 )
 from rest_framework import generics, status, permissions, filters
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from rest_framework.parsers import MultiPartParser
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
 from django_filters.rest_framework import DjangoFilterBackend
-from datetime import timedelta
+from datetime import datetime, timedelta
+from decimal import Decimal, InvalidOperation
 from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+def local_day_start(day):
+    """Start of a calendar day in the project timezone as an aware datetime"""
+    return timezone.make_aware(datetime.combine(day, datetime.min.time()))
+
+def parse_search_date(value):
+    """Parse a YYYY-MM-DD query parameter, ignoring malformed input"""
+    try:
+        return parse_date(value) if value else None
+    except ValueError:
+        return None
+
+def parse_search_int(value, default, minimum, maximum):
+    """Parse an integer query parameter, clamped to [minimum, maximum]"""
+    try:
+        number = int(value) if value else default
+    except ValueError:
+        return default
+    return min(max(number, minimum), maximum)
+
+def parse_search_price(value):
+    """Parse a price query parameter, ignoring malformed input"""
+    try:
+        price = Decimal(value) if value else None
+    except InvalidOperation:
+        return None
+    return price if price is None or price.is_finite() else None
 
 # Add these error handler functions to your views.py file
 
@@ -29,19 +80,43 @@ def handler500(request):
     return render(request, '500.html', status=500)
 
 # Template Views
+@cache_shell_page
 def home(request):
     return render(request, 'core/home.html')
 
 # Add these template views to your existing views.py file
 
+def travel_options_first_page(request):
+    """The first cursor page of /api/travel-options/, for embedding in the page.
+
+    Same queryset, ordering and JSON as TravelOptionListCreateView, so the
+    embedded ``next`` link continues exactly where this page ends.
+    """
+    view = TravelOptionListCreateView()
+    paginator = view.pagination_class()
+    allow_replica_reads(request)
+    rows = view.get_queryset().order_by(*paginator.keyset).values(*TRAVEL_OPTION_ROW_FIELDS)
+    page = paginator.keyset_page(list(rows[:paginator.page_size + 1]))
+    next_url = None
+    if paginator.has_next:
+        next_url = replace_query_param(
+            reverse('api-travel-options'), paginator.cursor_query_param,
+            paginator.encode_cursor(paginator.next_position)
+        )
+    return {'next': next_url, 'previous': None, 'results': travel_option_rows_to_data(page)}
+
 def travel_options_view(request):
-    return render(request, 'core/travel_options.html')
+    # The listing API needs a login; anonymous visitors get the empty shell
+    initial_options = travel_options_first_page(request) if request.user.is_authenticated else None
+    return render(request, 'core/travel_options.html', {'initial_options': initial_options})
 
 @login_required
+@cache_shell_page
 def bookings_view(request):
     return render(request, 'core/bookings.html')
 
 @login_required
+@cache_shell_page
 def booking_details_view(request):
     """View for displaying detailed booking information"""
     return render(request, 'core/booking_details.html')
@@ -146,12 +221,13 @@ def profile_view(request):
         messages.success(request, 'Profile updated successfully!')
         return redirect('profile')
     
-    # Get booking statistics
-    user_bookings = Booking.objects.filter(user=request.user)
+    # Get booking statistics from the incrementally maintained summary
+    summary = BookingSummary.for_user(request.user)
     context = {
-        'total_bookings': user_bookings.count(),
-        'confirmed_bookings': user_bookings.filter(status='confirmed').count(),
-        'pending_bookings': user_bookings.filter(status='pending').count(),
+        'total_bookings': summary.total_bookings,
+        'confirmed_bookings': summary.confirmed_bookings,
+        'pending_bookings': summary.pending_bookings,
+        'booking_summary': summary,
     }
     
     return render(request, 'core/profile.html', context)
@@ -199,41 +275,102 @@ class UserProfileView(generics.RetrieveUpdateAPIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def get_object(self):
+        if self.request.method in permissions.SAFE_METHODS:
+            # Joined into the cached JWT principal; a query for session users
+            return self.request.user.userprofile
+        # Updates start from the stored row, never from a cached copy
         return UserProfile.objects.get(user=self.request.user)
 
-class TravelOptionListCreateView(generics.ListCreateAPIView):
+class ProfileStatsView(APIView):
+    # Reads only the user id, so the signed token claims are enough
+    authentication_classes = CLAIMS_AUTHENTICATION_CLASSES
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get(self, request):
+        summary = BookingSummary.for_user(request.user)
+        return Response(BookingSummarySerializer(summary).data)
+
+class TravelOptionRowListMixin:
+    """List travel options from .values() rows instead of model instances.
+
+    Emits the same JSON as TravelOptionSerializer at a fraction of the
+    per-row cost; writes still go through the regular serializer.
+    """
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        rows = queryset.values(*TRAVEL_OPTION_ROW_FIELDS)
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(travel_option_rows_to_data(page))
+        return Response(travel_option_rows_to_data(rows))
+
+class TravelOptionListCreateView(ReplicaReadMixin, ConditionalGetMixin, TravelOptionRowListMixin, generics.ListCreateAPIView):
+    authentication_classes = CLAIMS_AUTHENTICATION_CLASSES
     queryset = TravelOption.objects.all()
     serializer_class = TravelOptionSerializer
+    pagination_class = TravelOptionPagination
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
-    filterset_fields = ['type', 'source', 'destination', 'departure_date']
-    search_fields = ['operator_name', 'source', 'destination']
-    ordering_fields = ['price', 'departure_date', 'departure_time']
-    ordering = ['departure_date', 'departure_time']
+    filterset_class = TravelOptionFilter
+    search_fields = ['operator_name', 'source__name', 'destination__name']
+    ordering_fields = ['price', 'departure_at', 'departure_date', 'departure_time']
+    ordering = ['departure_at']
 
     def get_queryset(self):
-        queryset = TravelOption.objects.all()
+        queryset = TravelOption.objects.select_related('source', 'destination')
         
         # Filter out departed travel options
-        now = timezone.now()
-        queryset = queryset.filter(
-            departure_date__gte=now.date()
-        ).exclude(
-            departure_date=now.date(),
-            departure_time__lt=now.time()
-        )
+        queryset = queryset.filter(departure_at__gte=timezone.now())
         
         # Only show travel options with available seats
         queryset = queryset.filter(available_seats__gt=0)
         
         return queryset
 
-class TravelOptionDetailView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = TravelOption.objects.all()
+class TravelOptionImportView(APIView):
+    """Admin-only bulk upsert of an uploaded CSV/JSONL timetable.
+
+    The import runs inside the request, so uploads are capped at
+    TIMETABLE_UPLOAD_MAX_BYTES; larger timetables go through the
+    import_timetable management command.
+    """
+    permission_classes = [permissions.IsAdminUser]
+    parser_classes = [MultiPartParser]
+
+    def post(self, request):
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({
+                'error': 'Upload the timetable as the "file" field.'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        if upload.size > settings.TIMETABLE_UPLOAD_MAX_BYTES:
+            return Response({
+                'error': f'Timetables over {settings.TIMETABLE_UPLOAD_MAX_BYTES} bytes must be imported '
+                         'with "manage.py import_timetable".'
+            }, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        
+        fmt = request.data.get('format') or detect_format(upload.name)
+        if fmt not in ('csv', 'jsonl'):
+            return Response({
+                'error': 'Format must be csv or jsonl.'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        # Large uploads are spooled to disk by Django; rows are read lazily
+        importer = TimetableImporter()
+        report = importer.run(iter_timetable_records(open_text(upload.file), fmt))
+        return Response(report)
+
+class TravelOptionDetailView(ReplicaReadMixin, ConditionalGetMixin, generics.RetrieveUpdateDestroyAPIView):
+    authentication_classes = CLAIMS_AUTHENTICATION_CLASSES
+    queryset = TravelOption.objects.select_related('source', 'destination')
     serializer_class = TravelOptionSerializer
     lookup_field = 'travel_id'
 
-class BookingListCreateView(generics.ListCreateAPIView):
+class BookingListCreateView(ConditionalGetMixin, IdempotentCreateMixin, AdmissionControlMixin, generics.ListCreateAPIView):
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = BookingPagination
+    # Bookings embed their travel option (seats left), so both stamps count
+    validator_fields = ('updated_at', 'travel_option__updated_at')
     
     def get_serializer_class(self):
         if self.request.method == 'POST':
@@ -241,7 +378,9 @@ class BookingListCreateView(generics.ListCreateAPIView):
         return BookingSerializer
     
     def get_queryset(self):
-        return Booking.objects.filter(user=self.request.user)
+        return Booking.objects.filter(user=self.request.user).select_related(
+            'travel_option__source', 'travel_option__destination'
+        )
     
     def create(self, request, *args, **kwargs):
         try:
@@ -251,21 +390,119 @@ class BookingListCreateView(generics.ListCreateAPIView):
             print(f"❌ Error in create method: {e}")
             raise
 
-class BookingDetailView(generics.RetrieveUpdateDestroyAPIView):
+class BookingDetailView(ReplicaReadMixin, ConditionalGetMixin, generics.RetrieveUpdateDestroyAPIView):
     serializer_class = BookingSerializer
     permission_classes = [permissions.IsAuthenticated]
     lookup_field = 'booking_id'
+    validator_fields = ('updated_at', 'travel_option__updated_at')
     
     def get_queryset(self):
-        return Booking.objects.filter(user=self.request.user)
+        return Booking.objects.filter(user=self.request.user).select_related(
+            'travel_option__source', 'travel_option__destination'
+        )
+
+class BookingHoldView(APIView):
+    """Hold seats as a pending booking, confirmed later via /confirm/.
+
+    Takes the same payload (and Idempotency-Key header) as a booking
+    POST. The hold's ``expires_at`` is in the response; unconfirmed holds
+    are released after it.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def post(self, request):
+        # Replays of a stored response are not admitted again
+        return idempotent_response(request, lambda: self.hold(request))
+    
+    def hold(self, request):
+        with admit(request, request.data.get('travel_option')):
+            serializer = CreateBookingSerializer(data=request.data, context={'request': request})
+            serializer.is_valid(raise_exception=True)
+            try:
+                booking = Booking.hold_seats(
+                    user=request.user,
+                    travel_option=serializer.validated_data['travel_option'],
+                    number_of_seats=serializer.validated_data['number_of_seats'],
+                    passenger_details=serializer.validated_data['passenger_details']
+                )
+            except SeatsUnavailable:
+                raise SoldOut()
+        return Response(BookingSerializer(booking, context={'request': request}).data,
+                        status=status.HTTP_201_CREATED)
+
+class BookingExportView(APIView):
+    """Stream bookings as CSV or NDJSON, one row per passenger.
+
+    Users export their own history; staff may pass ``scope=all`` to
+    export every user's bookings.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get(self, request):
+        query_params = request.query_params
+        # Not "format": DRF reserves it for renderer selection
+        fmt = (query_params.get('output') or 'csv').lower()
+        if fmt not in EXPORT_FORMATS:
+            return Response({
+                'error': f"Output must be one of: {', '.join(EXPORT_FORMATS)}"
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        booking_status = (query_params.get('status') or '').lower() or None
+        if booking_status is not None and booking_status not in dict(Booking.STATUS_CHOICES):
+            return Response({
+                'error': f"Status must be one of: {', '.join(dict(Booking.STATUS_CHOICES))}"
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        export_all = query_params.get('scope') == 'all'
+        if export_all and not request.user.is_staff:
+            return Response({
+                'error': 'Only staff can export all bookings'
+            }, status=status.HTTP_403_FORBIDDEN)
+        
+        date_from = parse_search_date(query_params.get('date_from'))
+        date_to = parse_search_date(query_params.get('date_to'))
+        queryset = export_queryset(
+            user=None if export_all else request.user,
+            status=booking_status,
+            date_from=local_day_start(date_from) if date_from else None,
+            date_to=local_day_start(date_to + timedelta(days=1)) if date_to else None,
+        )
+        
+        response = StreamingHttpResponse(iter_export_lines(queryset, fmt), content_type=EXPORT_FORMATS[fmt])
+        response['Content-Disposition'] = f'attachment; filename="bookings.{fmt}"'
+        return response
 
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
+@admission_controlled
+def confirm_booking(request, booking_id):
+    try:
+        booking = Booking.objects.select_related(
+            'travel_option__source', 'travel_option__destination'
+        ).get(booking_id=booking_id, user=request.user)
+        
+        if booking.status != 'pending':
+            return Response({
+                'error': 'Only pending seat holds can be confirmed.'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        if not booking.confirm_hold():
+            return Response({
+                'error': 'This seat hold has expired. Please book again.'
+            }, status=status.HTTP_409_CONFLICT)
+        return Response(BookingSerializer(booking, context={'request': request}).data)
+    except Booking.DoesNotExist:
+        return Response({
+            'error': 'Booking not found'
+        }, status=status.HTTP_404_NOT_FOUND)
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+@admission_controlled
 def cancel_booking(request, booking_id):
     try:
-        booking = Booking.objects.get(booking_id=booking_id, user=request.user)
+        booking = Booking.objects.select_related('travel_option').get(booking_id=booking_id, user=request.user)
         
-        if booking.status == 'confirmed':
+        if booking.status in ('pending', 'confirmed'):
             # Use the new cancel_booking method
             if booking.cancel_booking():
                 return Response({
@@ -278,7 +515,7 @@ def cancel_booking(request, booking_id):
                 }, status=status.HTTP_400_BAD_REQUEST)
         else:
             return Response({
-                'error': 'Booking cannot be cancelled. Only confirmed bookings can be cancelled.'
+                'error': 'Booking cannot be cancelled. Only confirmed bookings and seat holds can be cancelled.'
             }, status=status.HTTP_400_BAD_REQUEST)
     except Booking.DoesNotExist:
         return Response({
@@ -290,46 +527,234 @@ def cancel_booking(request, booking_id):
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 # Search and Filter Views
-class TravelSearchView(generics.ListAPIView):
+def travel_search_params(query_params):
+    """Normalized search filters, shared by the queryset and the cache key"""
+    source = query_params.get('source', None)
+    destination = query_params.get('destination', None)
+    
+    # Resolve city text through the in-process index (exact, prefix,
+    # then typo-tolerant) so the route filter is an indexed id lookup
+    return {
+        'type': (query_params.get('type') or '').lower() or None,
+        'source': sorted(city_index.resolve(source)) if source else None,
+        'destination': sorted(city_index.resolve(destination)) if destination else None,
+        'date_from': parse_search_date(query_params.get('date_from')),
+        'date_to': parse_search_date(query_params.get('date_to')),
+        'min_price': parse_search_price(query_params.get('min_price')),
+        'max_price': parse_search_price(query_params.get('max_price')),
+    }
+
+def travel_search_queryset(params):
+    queryset = TravelOption.objects.select_related('source', 'destination')
+    
+    # Filter out departed travel options
+    queryset = queryset.filter(departure_at__gte=timezone.now())
+    
+    # Apply filters
+    if params['type']:
+        queryset = queryset.filter(type=params['type'])
+    if params['source'] is not None:
+        queryset = queryset.filter(source_id__in=params['source'])
+    if params['destination'] is not None:
+        queryset = queryset.filter(destination_id__in=params['destination'])
+    # Date bounds are local calendar days; turn them into departure_at
+    # bounds so they share the index with the "not departed" predicate
+    if params['date_from']:
+        queryset = queryset.filter(departure_at__gte=local_day_start(params['date_from']))
+    if params['date_to']:
+        queryset = queryset.filter(departure_at__lt=local_day_start(params['date_to'] + timedelta(days=1)))
+    if params['min_price'] is not None:
+        queryset = queryset.filter(price__gte=params['min_price'])
+    if params['max_price'] is not None:
+        queryset = queryset.filter(price__lte=params['max_price'])
+        
+    # Only show travel options with available seats
+    return queryset.filter(available_seats__gt=0).order_by('departure_at', 'travel_id')
+
+def travel_search_index_data(params, request, paginator, view=None):
+    """A search response page from inventory_index, or None to run the SQL query.
+
+    Call inventory_index.ensure_fresh() first.
+    """
+    # The snapshot is in (departure_at, travel_id) order only
+    if request.query_params.get(api_settings.ORDERING_PARAM):
+        return None
+    keyset = paginator.cursor_query_param in request.query_params
+    matches = inventory_index.search(
+        travel_type=params['type'],
+        source_ids=params['source'],
+        destination_ids=params['destination'],
+        departure_from=local_day_start(params['date_from']) if params['date_from'] else None,
+        departure_before=local_day_start(params['date_to'] + timedelta(days=1)) if params['date_to'] else None,
+        min_price=params['min_price'],
+        max_price=params['max_price'],
+        after=paginator.decode_cursor(request, TravelOption) if keyset else None,
+    )
+    if matches is None:
+        return None
+    if keyset:
+        # Rows past the horizon sort after every row in it, so a full page is exact
+        if not matches.complete and len(matches) <= paginator.page_size:
+            return None
+        paginator.request = request
+        page = paginator.keyset_page(matches[:paginator.page_size + 1])
+    else:
+        # Page numbers need the total count
+        if not matches.complete:
+            return None
+        paginator.fallback = paginator.fallback_class()
+        page = paginator.fallback.paginate_queryset(matches, request, view)
+    if page is None:
+        return travel_option_rows_to_data(matches[:])
+    return paginator.get_paginated_response(travel_option_rows_to_data(page)).data
+
+def travel_search_cache_params(params, request):
+    """Everything a cached search response depends on, besides route versions"""
+    return {
+        **params,
+        'cursor': request.query_params.get('cursor'),
+        'page': request.query_params.get('page'),
+        # OrderingFilter reorders page-number results
+        'ordering': request.query_params.get(api_settings.ORDERING_PARAM),
+        'host': request.get_host(),
+    }
+
+class TravelSearchView(ReplicaReadMixin, TravelOptionRowListMixin, generics.ListAPIView):
     serializer_class = TravelOptionSerializer
+    authentication_classes = CLAIMS_AUTHENTICATION_CLASSES
     permission_classes = [permissions.AllowAny]
+    pagination_class = TravelOptionPagination
+    
+    def get_search_params(self):
+        if not hasattr(self, '_search_params'):
+            self._search_params = travel_search_params(self.request.query_params)
+        return self._search_params
     
     def get_queryset(self):
-        queryset = TravelOption.objects.all()
-        
-        # Filter out departed travel options
-        now = timezone.now()
-        queryset = queryset.filter(
-            departure_date__gte=now.date()
-        ).exclude(
-            departure_date=now.date(),
-            departure_time__lt=now.time()
+        return travel_search_queryset(self.get_search_params())
+    
+    def list(self, request, *args, **kwargs):
+        params = self.get_search_params()
+        cache_key = search_cache.make_key(
+            travel_search_cache_params(params, request),
+            source_ids=params['source'],
+            destination_ids=params['destination'],
         )
+        data = search_cache.get(cache_key)
+        if data is None:
+            inventory_index.ensure_fresh()
+            data = travel_search_index_data(params, request, self.paginator, self)
+            if data is None:
+                data = super().list(request, *args, **kwargs).data
+            search_cache.set(cache_key, data)
+        return Response(data)
+
+class FareCalendarView(APIView):
+    """Cheapest fare, option count and seats left per day for a route.
+
+    Reads the RouteDayFare rollup only; the raw TravelOption table is
+    never aggregated per request.
+    """
+    authentication_classes = CLAIMS_AUTHENTICATION_CLASSES
+    permission_classes = [permissions.AllowAny]
+    max_days = 92
+    
+    def get(self, request):
+        query_params = request.query_params
+        source = query_params.get('source')
+        destination = query_params.get('destination')
+        if not source or not destination:
+            return Response({
+                'error': 'Source and destination are required'
+            }, status=status.HTTP_400_BAD_REQUEST)
         
-        # Get query parameters
-        travel_type = self.request.query_params.get('type', None)
-        source = self.request.query_params.get('source', None)
-        destination = self.request.query_params.get('destination', None)
-        date_from = self.request.query_params.get('date_from', None)
-        date_to = self.request.query_params.get('date_to', None)
-        min_price = self.request.query_params.get('min_price', None)
-        max_price = self.request.query_params.get('max_price', None)
+        date_from = parse_search_date(query_params.get('date_from')) or timezone.localdate()
+        date_to = parse_search_date(query_params.get('date_to')) or date_from + timedelta(days=30)
+        if date_to < date_from or (date_to - date_from).days >= self.max_days:
+            return Response({
+                'error': f'Date range must be between 1 and {self.max_days} days'
+            }, status=status.HTTP_400_BAD_REQUEST)
         
-        # Apply filters
-        if travel_type:
-            queryset = queryset.filter(type=travel_type)
-        if source:
-            queryset = queryset.filter(source__icontains=source)
-        if destination:
-            queryset = queryset.filter(destination__icontains=destination)
-        if date_from:
-            queryset = queryset.filter(departure_date__gte=date_from)
-        if date_to:
-            queryset = queryset.filter(departure_date__lte=date_to)
-        if min_price:
-            queryset = queryset.filter(price__gte=min_price)
-        if max_price:
-            queryset = queryset.filter(price__lte=max_price)
-            
-        # Only show travel options with available seats
-        return queryset.filter(available_seats__gt=0)
\ No newline at end of file
+        # A city name can resolve to several cities; combine their cells per day
+        cells = RouteDayFare.objects.filter(
+            source_id__in=city_index.resolve(source),
+            destination_id__in=city_index.resolve(destination),
+            travel_date__range=(date_from, date_to),
+        ).values('travel_date').annotate(
+            cell_min_price=Min('min_price'),
+            cell_option_count=Sum('option_count'),
+            cell_seats_left=Sum('seats_left'),
+        ).order_by()
+        by_day = {cell['travel_date']: cell for cell in cells}
+        
+        results = []
+        for offset in range((date_to - date_from).days + 1):
+            day = date_from + timedelta(days=offset)
+            cell = by_day.get(day)
+            min_price = cell['cell_min_price'] if cell else None
+            results.append({
+                'date': day.isoformat(),
+                'min_price': format(min_price.quantize(Decimal('0.01')), 'f') if min_price is not None else None,
+                'option_count': cell['cell_option_count'] if cell else 0,
+                'seats_left': cell['cell_seats_left'] if cell else 0,
+            })
+        return Response({
+            'source': source,
+            'destination': destination,
+            'date_from': date_from.isoformat(),
+            'date_to': date_to.isoformat(),
+            'results': results,
+        })
+
+class ConnectionSearchView(APIView):
+    """Multi-leg itineraries between two cities, including transfers.
+
+    Routing runs over the in-memory ConnectionGraph; only the legs of the
+    returned itineraries are read from the database, in one query.
+    """
+    authentication_classes = CLAIMS_AUTHENTICATION_CLASSES
+    permission_classes = [permissions.AllowAny]
+    
+    def get(self, request):
+        query_params = request.query_params
+        source = query_params.get('source')
+        destination = query_params.get('destination')
+        if not source or not destination:
+            return Response({
+                'error': 'Source and destination are required'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        sort = (query_params.get('sort') or 'arrival').lower()
+        if sort not in SORT_KEYS:
+            return Response({
+                'error': f"Sort must be one of: {', '.join(SORT_KEYS)}"
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        types = {t.strip().lower() for t in query_params.get('types', '').split(',') if t.strip()}
+        unknown = types - set(dict(TravelOption.TRAVEL_TYPE_CHOICES))
+        if unknown:
+            return Response({
+                'error': f"Unknown travel type: {', '.join(sorted(unknown))}"
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        day = parse_search_date(query_params.get('date')) or timezone.localdate()
+        itineraries = connection_graph.search(
+            city_index.resolve(source),
+            city_index.resolve(destination),
+            window_start=local_day_start(day),
+            window_end=local_day_start(day + timedelta(days=1)),
+            sort=sort,
+            limit=parse_search_int(query_params.get('limit'), 5, 1, 20),
+            max_legs=parse_search_int(query_params.get('max_legs'), 3, 1, 4),
+            seats=parse_search_int(query_params.get('seats'), 1, 1, 10),
+            types=types or None,
+        )
+        
+        travel_ids = {leg.travel_id for path in itineraries for leg in path}
+        rows = {
+            row['travel_id']: row
+            for row in TravelOption.objects.filter(travel_id__in=travel_ids).values(*TRAVEL_OPTION_ROW_FIELDS)
+        }
+        # Drop itineraries whose legs were deleted since the last graph refresh
+        itineraries = [path for path in itineraries if all(leg.travel_id in rows for leg in path)]
+        return Response({'results': itineraries_to_data(itineraries, rows)})
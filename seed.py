@@ -8,7 +8,7 @@ import random
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Travel_Booking.settings')
 django.setup()
 
-from core.models import TravelOption
+from core.models import City, TravelOption
 
 def seed_travel_options():
     """Seed the database with travel options for flights, trains, and buses"""
@@ -253,6 +253,13 @@ def seed_travel_options():
     
     created_count = 0
     
+    # Resolve each city name to its City row once
+    cities = {}
+    for option in all_travel_options:
+        for name in (option['source'], option['destination']):
+            if name not in cities:
+                cities[name] = City.get_or_create_by_name(name)
+    
     for option in all_travel_options:
         # Create multiple dates for each route
         for day_offset in range(30):  # Next 30 days
@@ -326,8 +333,8 @@ def seed_travel_options():
             travel_option = TravelOption.objects.create(
                 type=option['type'],
                 operator_name=option['operator_name'],
-                source=option['source'],
-                destination=option['destination'],
+                source=cities[option['source']],
+                destination=cities[option['destination']],
                 departure_date=travel_date,
                 departure_time=departure_time,
                 arrival_date=arrival_date,
@@ -0,0 +1,179 @@
+// Initialize search on page load
+document.addEventListener('DOMContentLoaded', function() {
+    // Show the embedded first page; fetch only if the server sent none
+    if (!hydrateCursorList('initial-travel-options', displaySearchResults)) {
+        loadTravelOptions();
+    }
+    
+    // Set minimum date to today (prevent past dates)
+    const today = new Date().toISOString().split('T')[0];
+    document.getElementById('date_from').min = today;
+    
+    // Set default date to tomorrow
+    const tomorrow = new Date();
+    tomorrow.setDate(tomorrow.getDate() + 1);
+    const tomorrowFormatted = tomorrow.toISOString().split('T')[0];
+    document.getElementById('date_from').value = tomorrowFormatted;
+});
+
+// Update current time every minute
+function updateCurrentTime() {
+    const now = new Date();
+    const options = { 
+        timeZone: 'Asia/Kolkata',
+        year: 'numeric', 
+        month: 'long', 
+        day: 'numeric',
+        hour: '2-digit', 
+        minute: '2-digit',
+        second: '2-digit'
+    };
+    document.getElementById('current-time').textContent = now.toLocaleString('en-IN', options);
+}
+
+updateCurrentTime();
+setInterval(updateCurrentTime, 60000); // Update every minute
+
+// Load travel options without filters
+async function loadTravelOptions() {
+    try {
+        showLoading(true);
+        await loadCursorList(withCursor('/api/travel-options/'), displaySearchResults);
+    } catch (error) {
+        console.error('Failed to load travel options:', error);
+        showNoResults();
+    } finally {
+        showLoading(false);
+    }
+}
+
+// Show/hide loading spinner
+function showLoading(show) {
+    const spinner = document.getElementById('loading-spinner');
+    const results = document.getElementById('search-results');
+    const noResults = document.getElementById('no-results');
+    
+    if (show) {
+        spinner.style.display = 'block';
+        results.style.display = 'none';
+        noResults.style.display = 'none';
+    } else {
+        spinner.style.display = 'none';
+        results.style.display = 'flex';
+    }
+}
+
+// Show no results message
+function showNoResults() {
+    const spinner = document.getElementById('loading-spinner');
+    const results = document.getElementById('search-results');
+    const noResults = document.getElementById('no-results');
+    
+    spinner.style.display = 'none';
+    results.style.display = 'none';
+    noResults.style.display = 'block';
+}
+
+// Format price in INR
+function formatPriceINR(price) {
+    return new Intl.NumberFormat('en-IN', {
+        style: 'currency',
+        currency: 'INR',
+        minimumFractionDigits: 0,
+        maximumFractionDigits: 0
+    }).format(price);
+}
+
+// Override the displaySearchResults function to handle empty results better
+function displaySearchResults(results, append = false) {
+    const resultsContainer = document.getElementById('search-results');
+    const noResults = document.getElementById('no-results');
+    
+    if (!results || results.length === 0) {
+        if (!append) showNoResults();
+        return;
+    }
+    
+    noResults.style.display = 'none';
+    
+    const html = results.map(option => `
+        <div class="col-md-6 col-lg-4 mb-4">
+            <div class="card travel-option-card h-100">
+                <div class="card-header">
+                    <div class="d-flex justify-content-between align-items-center">
+                        <span class="badge bg-${getTypeColor(option.type)}">${option.type.toUpperCase()}</span>
+                        <span class="price">${formatPriceINR(option.price)}</span>
+                    </div>
+                </div>
+                <div class="card-body">
+                    <h5 class="card-title">${option.operator_name}</h5>
+                    <div class="route-info">
+                        <div class="route-item">
+                            <i class="fas fa-${getRouteIcon(option.type)} text-primary"></i>
+                            <span><strong>From:</strong> ${option.source}</span>
+                        </div>
+                        <div class="route-item">
+                            <i class="fas fa-${getRouteIcon(option.type)} text-success"></i>
+                            <span><strong>To:</strong> ${option.destination}</span>
+                        </div>
+                    </div>
+                    <div class="schedule-info">
+                        <div class="schedule-item">
+                            <i class="fas fa-calendar-alt"></i>
+                            <span>${formatDate(option.departure_date)}</span>
+                        </div>
+                        <div class="schedule-item">
+                            <i class="fas fa-clock"></i>
+                            <span>${option.departure_time}</span>
+                        </div>
+                    </div>
+                    <div class="seats-info">
+                        <i class="fas fa-chair"></i>
+                        <span>${option.available_seats} seats available</span>
+                    </div>
+                </div>
+                <div class="card-footer">
+                    <button class="btn btn-primary w-100" onclick="bookTravel(${option.travel_id})">
+                        <i class="fas fa-ticket-alt me-2"></i>Book Now
+                    </button>
+                </div>
+            </div>
+        </div>
+    `).join('');
+    
+    if (append) {
+        resultsContainer.insertAdjacentHTML('beforeend', html);
+    } else {
+        resultsContainer.innerHTML = html;
+    }
+}
+
+// Helper function to get color for travel type
+function getTypeColor(type) {
+    switch(type) {
+        case 'flight': return 'primary';
+        case 'train': return 'success';
+        case 'bus': return 'warning';
+        default: return 'secondary';
+    }
+}
+
+// Helper function to get appropriate icon for travel type
+function getRouteIcon(type) {
+    switch(type) {
+        case 'flight': return 'plane';
+        case 'train': return 'train';
+        case 'bus': return 'bus';
+        default: return 'map-marker-alt';
+    }
+}
+
+// Helper function to format date
+function formatDate(dateString) {
+    const date = new Date(dateString);
+    return date.toLocaleDateString('en-IN', { 
+        weekday: 'short', 
+        month: 'short', 
+        day: 'numeric' 
+    });
+}
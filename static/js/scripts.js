@@ -75,20 +75,45 @@ function validateForm(form) {
     return isValid;
 }
 
+// Last ETag and body per GET URL, so unchanged resources come back as
+// an empty 304 instead of the full JSON
+const ETAG_CACHE_SIZE = 50;
+const etagCache = new Map();
+
+function rememberResponse(url, etag, data) {
+    etagCache.delete(url);
+    etagCache.set(url, { etag, data });
+    if (etagCache.size > ETAG_CACHE_SIZE) {
+        etagCache.delete(etagCache.keys().next().value);
+    }
+}
+
 // AJAX helper function
 async function makeRequest(url, options = {}) {
     try {
+        const isGet = !options.method || options.method.toUpperCase() === 'GET';
+        const cached = isGet ? etagCache.get(url) : null;
         const response = await fetch(url, {
+            ...options,
             headers: {
                 'Content-Type': 'application/json',
                 'X-CSRFToken': getCookie('csrftoken'),
+                ...(cached ? { 'If-None-Match': cached.etag } : {}),
                 ...options.headers
-            },
-            ...options
+            }
         });
         
+        if (response.status === 304 && cached) {
+            rememberResponse(url, cached.etag, cached.data);
+            return cached.data;
+        }
+        
         const data = await response.json();
         
+        if (isGet && response.ok && response.headers.get('ETag')) {
+            rememberResponse(url, response.headers.get('ETag'), data);
+        }
+        
         if (!response.ok) {
             // Debug: Log the actual response structure
             console.log('Error response data:', data);
@@ -170,8 +195,7 @@ function initializeSearch() {
             }
             
             try {
-                const data = await makeRequest(`/api/travel-search/?${params}`);
-                displaySearchResults(data.results || data);
+                await loadCursorList(withCursor(`/api/travel-search/?${params}`), displaySearchResults);
             } catch (error) {
                 console.error('Search failed:', error);
             }
@@ -179,13 +203,64 @@ function initializeSearch() {
     }
 }
 
+// Add the keyset cursor parameter so list endpoints page without COUNT(*)
+function withCursor(url) {
+    return url + (url.includes('?') ? '&' : '?') + 'cursor=';
+}
+
+// Load one page of a cursor-paginated list and wire the "Load more" button
+// to follow the `next` cursor until the list is exhausted
+async function loadCursorList(url, render, append = false) {
+    const data = await makeRequest(url);
+    render(data.results || data, append);
+    updateLoadMore(data.next || null, render);
+    return data;
+}
+
+// Render a cursor page the server embedded with json_script instead of
+// fetching it; returns false when there is none, so the caller can fetch
+function hydrateCursorList(elementId, render) {
+    const element = document.getElementById(elementId);
+    const data = element ? JSON.parse(element.textContent) : null;
+    if (!data) return false;
+    render(data.results || data, false);
+    updateLoadMore(data.next || null, render);
+    return true;
+}
+
+function updateLoadMore(nextUrl, render) {
+    const container = document.getElementById('load-more-container');
+    if (!container) return;
+    
+    container.innerHTML = '';
+    if (!nextUrl) return;
+    
+    const button = document.createElement('button');
+    button.type = 'button';
+    button.className = 'btn btn-outline-primary';
+    button.innerHTML = '<i class="fas fa-chevron-down me-2"></i>Load more';
+    button.addEventListener('click', async () => {
+        button.disabled = true;
+        try {
+            await loadCursorList(nextUrl, render, true);
+        } catch (error) {
+            console.error('Failed to load more results:', error);
+            button.disabled = false;
+            showToast('Failed to load more results', 'error');
+        }
+    });
+    container.appendChild(button);
+}
+
 // Display search results
-function displaySearchResults(results) {
+function displaySearchResults(results, append = false) {
     const resultsContainer = document.getElementById('search-results');
     if (!resultsContainer) return;
     
     if (results.length === 0) {
-        resultsContainer.innerHTML = '<p class="text-center">No travel options found.</p>';
+        if (!append) {
+            resultsContainer.innerHTML = '<p class="text-center">No travel options found.</p>';
+        }
         return;
     }
     
@@ -210,7 +285,11 @@ function displaySearchResults(results) {
         </div>
     `).join('');
     
-    resultsContainer.innerHTML = html;
+    if (append) {
+        resultsContainer.insertAdjacentHTML('beforeend', html);
+    } else {
+        resultsContainer.innerHTML = html;
+    }
 }
 
 // Booking functionality